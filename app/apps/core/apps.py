@@ -6,5 +6,8 @@ class DemoConfig(AppConfig):
     name = "app.apps.core"
 
     def ready(self) -> None:
+        # Without this import, in-memory caches will not follow database changes
+        from app.apps.core import signals  # noqa: F401 (unused-import)
+
         # Without this import, admin panel will not include this app
         from app.apps.core.web import admin  # noqa: F401 (unused-import)
@@ -0,0 +1,56 @@
+from types import MappingProxyType
+from typing import Final, Iterable, Mapping
+
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+
+from ..changes import CHANGE_WATCHER
+from ..models import Text
+
+
+class ButtonRegistry:
+    # Labels of reply and inline buttons are `Text` rows with `is_button=True`.
+    # They are loaded in one query on startup and swapped as a whole on every refresh,
+    # so keyboards and `ButtonFilter` always see one consistent set of labels.
+
+    def __init__(self) -> None:
+        self._labels: Mapping[str, str] = MappingProxyType({})
+
+    def load(self) -> None:
+        self._set_labels(Text.objects.filter(is_button=True))
+
+    async def aload(self) -> None:
+        self._set_labels([text async for text in Text.objects.filter(is_button=True)])
+
+    def update(self, text: Text) -> None:
+        self._labels = MappingProxyType({**self._labels, text.name: text.text})
+
+    def discard(self, text: Text) -> None:
+        self._labels = MappingProxyType(
+            {name: label for name, label in self._labels.items() if name != text.name}
+        )
+
+    def __getitem__(self, name: str) -> str:
+        return self._labels.get(name, "")
+
+    def _set_labels(self, texts: Iterable[Text]) -> None:
+        self._labels = MappingProxyType({text.name: text.text for text in texts})
+
+
+BUTTONS: Final[ButtonRegistry] = ButtonRegistry()
+
+CHANGE_WATCHER.subscribe(Text, BUTTONS.aload)
+
+
+class ButtonFilter(BaseFilter):
+    """
+    Matches messages sent with the current label of a button.
+    Unlike `F.text == label`, the label is looked up on every update,
+    so edited labels are routed without restarting the bot.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    async def __call__(self, message: Message) -> bool:
+        return message.text is not None and message.text == BUTTONS[self.name]
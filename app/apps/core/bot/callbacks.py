@@ -0,0 +1,196 @@
+from typing import Any, Awaitable, Callable, Literal, Optional, TypeVar, Union
+
+from aiogram import BaseMiddleware, Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters.callback_data import CallbackData, CallbackQueryFilter
+from aiogram.types import CallbackQuery, TelegramObject
+from magic_filter import MagicFilter
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_INT_TYPES = (int, Optional[int])
+
+C = TypeVar("C", bound="CompactCallback")
+
+# Every `CompactCallback` type by its prefix
+_TYPES: dict[str, type["CompactCallback"]] = {}
+
+
+def pack_int(value: int) -> str:
+    """
+    Packs an integer in base 36, which `int(packed, 36)` unpacks.
+    """
+    if value < 0:
+        return "-" + pack_int(-value)
+    digits = []
+    while True:
+        value, digit = divmod(value, 36)
+        digits.append(_DIGITS[digit])
+        if not value:
+            return "".join(reversed(digits))
+
+
+class CompactCallback(CallbackData, prefix=""):
+    # Callback data with a short prefix, unique among all the types, and integer fields
+    # packed in base 36, e.g. `pl:2s` for the place 100, to stay far from the 64 bytes
+    # Telegram allows. The data is decoded once by `CallbackDecoder`, and only
+    # the handlers with a `filter()` of its type are tried, see `CallbackRouter`.
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.__prefix__ in _TYPES:
+            raise ValueError(
+                f"Prefix {cls.__prefix__!r} of {cls.__name__} is already used"
+                f" by {_TYPES[cls.__prefix__].__name__}"
+            )
+        _TYPES[cls.__prefix__] = cls
+
+    def _encode_value(self, key: str, value: Any) -> str:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return pack_int(value)
+        return super()._encode_value(key, value)
+
+    @classmethod
+    def unpack(cls: type[C], value: str) -> C:
+        prefix, *parts = value.split(cls.__separator__)
+        if prefix != cls.__prefix__:
+            raise ValueError(f"Bad prefix ({prefix!r} != {cls.__prefix__!r})")
+        fields = cls.model_fields
+        if len(parts) != len(fields):
+            raise TypeError(
+                f"Callback data {cls.__name__!r} takes {len(fields)} arguments "
+                f"but {len(parts)} were given"
+            )
+
+        payload: dict[str, Any] = {}
+        for (name, field), part in zip(fields.items(), parts):
+            if part == "" and not field.is_required():
+                payload[name] = None
+            elif field.annotation in _INT_TYPES:
+                payload[name] = int(part, 36)
+            else:
+                payload[name] = part
+        return cls(**payload)
+
+    @classmethod
+    def filter(cls, rule: Optional[MagicFilter] = None) -> CallbackQueryFilter:
+        return DecodedCallbackFilter(callback_data=cls, rule=rule)
+
+
+def decode_callback(data: str) -> Optional[CompactCallback]:
+    """
+    Unpacks callback data by the type registered for its prefix.
+    """
+    callback_type = _TYPES.get(data.partition(":")[0])
+    if callback_type is None:
+        return None
+    try:
+        return callback_type.unpack(data)
+    except (TypeError, ValueError):
+        return None
+
+
+class DecodedCallbackFilter(CallbackQueryFilter):
+    """
+    Matches callback queries whose data `CallbackDecoder` decoded to the given type,
+    or whose data it decodes itself on routers without a `CallbackDecoder`.
+    """
+
+    async def __call__(
+        self, query: CallbackQuery, callback_data: Optional[CallbackData] = None
+    ) -> Union[Literal[False], dict[str, Any]]:
+        if callback_data is None and query.data is not None:
+            callback_data = decode_callback(query.data)
+        if type(callback_data) is not self.callback_data:
+            return False
+        if self.rule is None or self.rule.resolve(callback_data):
+            return {"callback_data": callback_data}
+        return False
+
+
+class CallbackDecoder(BaseMiddleware):
+    # An outer middleware of callback queries, it decodes their data with a single
+    # lookup of its prefix, for the filters and the handlers.
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: CallbackQuery,  # type: ignore[override]
+        data: dict[str, Any],
+    ) -> Any:
+        if event.data:
+            callback_data = decode_callback(event.data)
+            if callback_data is not None:
+                data["callback_data"] = callback_data
+        return await handler(event, data)
+
+
+class CallbackObserver(TelegramEventObserver):
+    # Handlers of callback queries indexed by the `CompactCallback` type of their filter,
+    # a query is only checked against the handlers of the type its data was decoded to,
+    # and the ones without such a filter, in the order they were registered.
+
+    def __init__(self, router: Router, event_name: str) -> None:
+        super().__init__(router, event_name)
+        self._routes: dict[Optional[type[CallbackData]], list[HandlerObject]] = {}
+        self._indexed = 0
+
+    def candidates(self, callback_data: Optional[CallbackData]) -> list[HandlerObject]:
+        if self._indexed != len(self.handlers):
+            self._index()
+        untyped = self._routes[None]
+        if callback_data is None:
+            return untyped
+        return self._routes.get(type(callback_data), untyped)
+
+    async def trigger(self, event: TelegramObject, **kwargs: Any) -> Any:
+        # `TelegramEventObserver.trigger()` over the candidates only
+        for handler in self.candidates(kwargs.get("callback_data")):
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data, handler=handler)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+    def _index(self) -> None:
+        typed = {
+            id(handler): callback_filter.callback_data
+            for handler in self.handlers
+            for callback_filter in (
+                filter_object.callback for filter_object in handler.filters or ()
+            )
+            if isinstance(callback_filter, DecodedCallbackFilter)
+        }
+        self._routes = {
+            callback_type: [
+                handler
+                for handler in self.handlers
+                if typed.get(id(handler)) in (callback_type, None)
+            ]
+            for callback_type in {None, *typed.values()}
+        }
+        self._indexed = len(self.handlers)
+
+
+class CallbackRouter(Router):
+    """
+    A router whose callback queries are decoded once and routed by their prefix.
+    """
+
+    def __init__(self, *, name: Optional[str] = None) -> None:
+        super().__init__(name=name)
+        self.callback_query = self.observers["callback_query"] = CallbackObserver(
+            router=self, event_name="callback_query"
+        )
+        self.callback_query.outer_middleware(CallbackDecoder())
@@ -1,16 +1,26 @@
-from typing import Union
+from typing import Any, Final, Union
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
-from asgiref.sync import sync_to_async
 
-from ..models import Course, Link, Phone, Place, PrerequisiteCourse
-from ..use_case import CORE_USE_CASE, TEXT_USE_CASE
+from ..models import Course, Link, Phone, Place
+from ..read_pool import READ_POOL
+from ..single_flight import SingleFlight
+from ..use_case import CORE_USE_CASE, COURSE_USE_CASE, PLACE_USE_CASE, TEXT_USE_CASE
 from . import keyboards
+from .buttons import ButtonFilter
+from .callbacks import CallbackRouter
 
-router = Router()
+NEAREST_PLACES_COUNT: Final[int] = 5
+
+# Phones and links are read by everyone who opens their menu at once, so the same
+# query is shared by concurrent requests and its rows are reused for a second
+SHARED_QUERIES: Final[SingleFlight] = SingleFlight(ttl=1.0)
+
+router = CallbackRouter()
 
 
 @router.message(Command(commands=["start"]))
@@ -18,7 +28,7 @@ async def start_message_handler(message: Message) -> None:
     if message.from_user is None:
         return
 
-    _, is_new = await CORE_USE_CASE.register_bot_user(
+    is_new = await CORE_USE_CASE.register_bot_user(
         user_id=message.from_user.id,
         username=message.from_user.username,
         full_name=message.from_user.full_name,
@@ -39,7 +49,7 @@ async def start_message_handler(message: Message) -> None:
         )
     await message.answer(
         text=text,
-        reply_markup=keyboards.MainKeyboard().as_markup(resize_keyboard=True),
+        reply_markup=keyboards.main_markup(),
     )
 
 
@@ -53,17 +63,17 @@ async def back_main_menu_callback_query_handler(query: CallbackQuery) -> None:
     await query.message.delete()
     await query.message.answer(
         text=await TEXT_USE_CASE.aget_text("BACK_MAIN_MENU"),
-        reply_markup=keyboards.MainKeyboard().as_markup(resize_keyboard=True),
+        reply_markup=keyboards.main_markup(),
     )
 
 
-@router.message(F.text == keyboards.MainKeyboard.freshman_button)
+@router.message(ButtonFilter(keyboards.MainKeyboard.freshman_button))
 @router.callback_query(keyboards.FreshmanKeyboard.Callback.filter(F.mode == "menu"))
 async def freshman_message_handler(query_message: Union[CallbackQuery, Message]) -> None:
     if isinstance(query_message, Message):
         await query_message.answer(
             text=await TEXT_USE_CASE.aget_text("FRESHMAN_MENU"),
-            reply_markup=keyboards.FreshmanKeyboard().as_markup(),
+            reply_markup=keyboards.freshman_markup(),
         )
     else:
         if not query_message.message:
@@ -73,7 +83,7 @@ async def freshman_message_handler(query_message: Union[CallbackQuery, Message])
 
         await query_message.message.edit_text(
             text=await TEXT_USE_CASE.aget_text("FRESHMAN_MENU"),
-            reply_markup=keyboards.FreshmanKeyboard().as_markup(),
+            reply_markup=keyboards.freshman_markup(),
         )
 
 
@@ -87,17 +97,17 @@ async def freshman_register_callback_query_handler(query: CallbackQuery) -> None
     try:
         await query.message.edit_text(
             text=await TEXT_USE_CASE.aget_text("FRESHMAN_REGISTER"),
-            reply_markup=keyboards.FreshmanKeyboard(back=True).as_markup(),
+            reply_markup=keyboards.freshman_markup(back=True),
         )
     except TelegramBadRequest:
         pass
 
 
-@router.message(F.text == keyboards.MainKeyboard.course_button)
+@router.message(ButtonFilter(keyboards.MainKeyboard.course_button))
 async def courses_message_handler(message: Message) -> None:
     await message.answer(
         text=await TEXT_USE_CASE.aget_text("COURSE_MENU"),
-        reply_markup=keyboards.CourseKeyboard().as_markup(),
+        reply_markup=await keyboards.courses_markup(),
     )
 
 
@@ -113,43 +123,28 @@ async def courses_filter_callback_query_handler(
 
     if callback_data.filter_by == "semester":
         if callback_data.value is not None:
-            courses = [
-                course
-                async for course in Course.objects.filter(
-                    offering_semester=callback_data.value
-                ).all()
-            ]
             text = await TEXT_USE_CASE.aget_text(
                 "SEMESTER_COURSES_MENU",
                 offering_semester=callback_data.value,
             )
         else:
-            courses = None
             text = await TEXT_USE_CASE.aget_text("COURSES_BY_SEMESTER_MENU")
     elif callback_data.filter_by == "type":
         if callback_data.value is not None:
-            courses = [
-                course
-                async for course in Course.objects.filter(
-                    course_type=callback_data.value
-                ).all()
-            ]
             text = await TEXT_USE_CASE.aget_text(
                 "TYPE_COURSES_MENU",
                 course_type=Course.CourseType(callback_data.value).label,
             )
         else:
-            courses = None
             text = await TEXT_USE_CASE.aget_text("COURSES_BY_TYPE_MENU")
     else:
-        courses = None
         text = await TEXT_USE_CASE.aget_text("COURSE_MENU")
 
     await query.message.edit_text(
         text=text,
-        reply_markup=keyboards.CourseKeyboard(
-            filter_by=callback_data.filter_by, courses=courses
-        ).as_markup(),
+        reply_markup=await keyboards.courses_markup(
+            callback_data.filter_by, callback_data.value
+        ),
     )
 
 
@@ -158,21 +153,18 @@ async def course_details_callback_query_handler(
     query: CallbackQuery,
     callback_data: keyboards.CourseKeyboard.CourseCallback,
 ) -> None:
-    @sync_to_async
-    def get_prerequisite_courses_text(_course: Course) -> str:
-        prerequisite_courses = PrerequisiteCourse.objects.filter(course=_course).all()
-        if prerequisite_courses:
-            return "، ".join(
-                [_.prerequisite_course.fa_title for _ in prerequisite_courses]
-            )
-        return "-"
-
     if query.message is None:
         return
 
     await query.answer()
 
-    course = await Course.objects.aget(id=callback_data.id)
+    catalog = await COURSE_USE_CASE.aget_catalog()
+    course = catalog.by_id.get(callback_data.id)
+    if course is None:
+        return
+
+    prerequisite_courses = catalog.prerequisite_chain(course.id)
+    unlocked_courses = catalog.unlocked_courses(course.id)
 
     text = await TEXT_USE_CASE.aget_text(
         "COURSE_DETAILS",
@@ -183,7 +175,14 @@ async def course_details_callback_query_handler(
         ),
         credit=course.credit,
         quiz_credit=course.quiz_credit,
-        prerequisite_courses=await get_prerequisite_courses_text(_course=course),
+        prerequisite_courses=(
+            "، ".join(_.fa_title for _ in prerequisite_courses)
+            if prerequisite_courses
+            else "-"
+        ),
+        unlocked_courses=(
+            "، ".join(_.fa_title for _ in unlocked_courses) if unlocked_courses else "-"
+        ),
         unit_type=Course.UnitType(course.unit_type).label,
         course_type=Course.CourseType(course.course_type).label,
         has_exam="✅" if course.has_exam else "❌",
@@ -191,19 +190,15 @@ async def course_details_callback_query_handler(
     )
     await query.message.edit_text(
         text=text,
-        reply_markup=keyboards.CourseKeyboard(
-            filter_by=callback_data.filter_by, course=course
-        ).as_markup(),
+        reply_markup=keyboards.course_markup(callback_data.filter_by, course),
     )
 
 
-@router.message(F.text == keyboards.MainKeyboard.place_button)
+@router.message(ButtonFilter(keyboards.MainKeyboard.place_button))
 async def places_message_handler(message: Message) -> None:
     await message.answer(
         text=await TEXT_USE_CASE.aget_text("GROUPS"),
-        reply_markup=keyboards.PlaceKeyboard(
-            mode="group",
-        ).as_markup(resize_keyboard=True),
+        reply_markup=keyboards.places_markup(),
     )
 
 
@@ -226,30 +221,20 @@ async def places_callback_query_handler(
     if isinstance(callback_data, keyboards.PlaceKeyboard.Callback):
         await query.message.edit_text(
             text=await TEXT_USE_CASE.aget_text("GROUPS"),
-            reply_markup=keyboards.PlaceKeyboard(
-                mode="group",
-            ).as_markup(resize_keyboard=True),
+            reply_markup=keyboards.places_markup(),
         )
     elif isinstance(callback_data, keyboards.PlaceKeyboard.GroupCallback):
-        places = [
-            place async for place in Place.objects.filter(group=callback_data.group).all()
-        ]
         text = await TEXT_USE_CASE.aget_text(
             "GROUP_PLACES",
             group=Place.Group(callback_data.group).label,
         )
         await query.message.edit_text(
             text=text,
-            reply_markup=keyboards.PlaceKeyboard(
-                mode="location", places=places
-            ).as_markup(),
+            reply_markup=await keyboards.group_places_markup(callback_data.group),
         )
     elif isinstance(callback_data, keyboards.PlaceKeyboard.LocationCallback):
-        place = await Place.objects.aget(
-            latitude=callback_data.latitude,
-            longitude=callback_data.longitude,
-        )
-        if place:
+        place = (await PLACE_USE_CASE.aget_index()).by_id.get(callback_data.id)
+        if place is not None:
             await query.message.delete()
             await query.message.answer_location(
                 latitude=place.latitude,
@@ -264,44 +249,110 @@ async def places_callback_query_handler(
             await query.message.send_copy(chat_id=query.from_user.id)
 
 
-@router.message(F.text == keyboards.MainKeyboard.phone_button)
-async def phones_message_handler(message: Message) -> None:
-    text = await TEXT_USE_CASE.aget_text(
-        "PHONES",
-        phones="\n\n".join(
-            [
-                await TEXT_USE_CASE.aget_text(
-                    "PHONE_TEMPLATE",
-                    name=phone.name,
-                    phone_number=phone.phone_number,
-                )
-                async for phone in Phone.objects.filter().all()
-            ]
+@router.callback_query(keyboards.PlaceKeyboard.NearestCallback.filter())
+async def nearest_places_callback_query_handler(
+    query: CallbackQuery,
+    callback_data: keyboards.PlaceKeyboard.NearestCallback,
+    state: FSMContext,
+) -> None:
+    if query.message is None:
+        return
+
+    await query.answer()
+
+    # The location message can't carry the group, so it waits in the chat's state
+    await state.update_data(nearest_group=callback_data.group)
+    await query.message.answer(
+        text=await TEXT_USE_CASE.aget_text(
+            "NEAREST_LOCATION_REQUEST",
+            group=(
+                Place.Group(callback_data.group).label
+                if callback_data.group is not None
+                else "-"
+            ),
         ),
+        reply_markup=keyboards.nearest_markup(),
     )
-    await message.answer(text=text)
 
 
-@router.message(F.text == keyboards.MainKeyboard.link_button)
-async def links_message_handler(message: Message) -> None:
-    text = await TEXT_USE_CASE.aget_text(
-        "LINKS",
-        links="\n\n".join(
-            [
-                await TEXT_USE_CASE.aget_text(
-                    "LINK_TEMPLATE",
-                    name=link.name,
-                    address=link.address,
-                )
-                async for link in Link.objects.filter().all()
-            ]
-        ),
+@router.message(ButtonFilter(keyboards.MainKeyboard.back_button))
+async def back_main_menu_message_handler(message: Message, state: FSMContext) -> None:
+    await state.update_data(nearest_group=None)
+    await message.answer(
+        text=await TEXT_USE_CASE.aget_text("BACK_MAIN_MENU"),
+        reply_markup=keyboards.main_markup(),
+    )
+
+
+@router.message(F.location)
+async def nearest_places_message_handler(message: Message, state: FSMContext) -> None:
+    if message.location is None:
+        return
+
+    group = (await state.get_data()).get("nearest_group")
+    await state.update_data(nearest_group=None)
+
+    index = await PLACE_USE_CASE.aget_index()
+    texts = await TEXT_USE_CASE.aget_texts("NEAREST_PLACES", "NEAREST_PLACE_TEMPLATE")
+    places = [
+        texts["NEAREST_PLACE_TEMPLATE"].render(
+            name=nearby.place.name,
+            group=Place.Group(nearby.place.group).label,
+            distance=f"{nearby.distance:,.0f}",
+        )
+        for nearby in index.nearest(
+            latitude=message.location.latitude,
+            longitude=message.location.longitude,
+            k=NEAREST_PLACES_COUNT,
+            group=group,
+        )
+    ]
+    await message.answer(
+        text=texts["NEAREST_PLACES"].render(places="\n\n".join(places)),
+        reply_markup=keyboards.main_markup(),
     )
-    await message.answer(text=text)
 
 
-@router.message(F.text == keyboards.MainKeyboard.about_button)
+@router.message(ButtonFilter(keyboards.MainKeyboard.phone_button))
+async def phones_message_handler(message: Message) -> None:
+    texts = await TEXT_USE_CASE.aget_texts("PHONES", "PHONE_TEMPLATE")
+    phones = [
+        texts["PHONE_TEMPLATE"].render(**phone)
+        for phone in await SHARED_QUERIES.do("phones", _aget_phones)
+    ]
+    await message.answer(text=texts["PHONES"].render(phones="\n\n".join(phones)))
+
+
+@router.message(ButtonFilter(keyboards.MainKeyboard.link_button))
+async def links_message_handler(message: Message) -> None:
+    texts = await TEXT_USE_CASE.aget_texts("LINKS", "LINK_TEMPLATE")
+    links = [
+        texts["LINK_TEMPLATE"].render(**link)
+        for link in await SHARED_QUERIES.do("links", _aget_links)
+    ]
+    await message.answer(text=texts["LINKS"].render(links="\n\n".join(links)))
+
+
+@router.message(ButtonFilter(keyboards.MainKeyboard.about_button))
 async def about_message_handler(message: Message) -> None:
     await message.answer(
         text=await TEXT_USE_CASE.aget_text("ABOUT"),
     )
+
+
+async def _aget_phones() -> list[dict[str, Any]]:
+    return [
+        {"name": name, "phone_number": phone_number}
+        for name, phone_number in await READ_POOL.afetch(
+            Phone.objects.values_list("name", "phone_number")
+        )
+    ]
+
+
+async def _aget_links() -> list[dict[str, Any]]:
+    return [
+        {"name": name, "address": address}
+        for name, address in await READ_POOL.afetch(
+            Link.objects.values_list("name", "address")
+        )
+    ]
@@ -1,10 +1,15 @@
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Final, Hashable, Optional, TypeVar, Union
 
-from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
-from ..models import Course, Place
-from ..use_case import TEXT_USE_CASE
+from ..changes import CHANGE_WATCHER
+from ..models import Course, Place, Text
+from ..use_case import COURSE_USE_CASE, PLACE_USE_CASE
+from .buttons import BUTTONS
+from .callbacks import CompactCallback
+
+Markup = TypeVar("Markup", bound=Union[InlineKeyboardMarkup, ReplyKeyboardMarkup])
 
 
 def right_to_left_markup(old_list: list[Any]) -> list[Any]:
@@ -19,93 +24,109 @@ def right_to_left_markup(old_list: list[Any]) -> list[Any]:
     return new_list
 
 
+class MarkupCache:
+    # Finished markups keyed by view state, e.g. `("main",)` or `("courses", "semester", 3)`.
+    # Their content only depends on `Course`, `Place` and `Text` rows,
+    # so the whole cache is dropped whenever one of those changes.
+
+    def __init__(self) -> None:
+        self._markups: dict[Hashable, Any] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Markup]) -> Markup:
+        if key in self._markups:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._markups[key] = build()
+        markup: Markup = self._markups[key]
+        return markup
+
+    async def aget(self, key: Hashable, build: Callable[[], Awaitable[Markup]]) -> Markup:
+        if key in self._markups:
+            self.hits += 1
+        else:
+            self.misses += 1
+            version = self._version
+            built = await build()
+            # The rows changed during the build, so the next request builds it again
+            if version != self._version:
+                return built
+            self._markups[key] = built
+        markup: Markup = self._markups[key]
+        return markup
+
+    def clear(self) -> None:
+        self._markups = {}
+        self._version += 1
+
+
+MARKUPS: Final[MarkupCache] = MarkupCache()
+
+for _model in (Course, Place, Text):
+    CHANGE_WATCHER.subscribe_invalidate(_model, MARKUPS.clear)
+
+
 class MainKeyboard(ReplyKeyboardBuilder):
-    freshman_button = TEXT_USE_CASE.get_text(
-        "MAIN_FRESHMAN",
-        is_button=True,
-    )
-    course_button = TEXT_USE_CASE.get_text(
-        "MAIN_COURSE",
-        is_button=True,
-    )
-    place_button = TEXT_USE_CASE.get_text(
-        "MAIN_PLACE",
-        is_button=True,
-    )
-    phone_button = TEXT_USE_CASE.get_text(
-        "MAIN_PHONE",
-        is_button=True,
-    )
-    link_button = TEXT_USE_CASE.get_text(
-        "MAIN_LINK",
-        is_button=True,
-    )
-    about_button = TEXT_USE_CASE.get_text(
-        "MAIN_ABOUT",
-        is_button=True,
-    )
-    back_button = TEXT_USE_CASE.get_text(
-        "MAIN_BACK",
-        is_button=True,
-    )
+    # Names of the button texts, see `BUTTONS` for their current labels
+    freshman_button = "MAIN_FRESHMAN"
+    course_button = "MAIN_COURSE"
+    place_button = "MAIN_PLACE"
+    phone_button = "MAIN_PHONE"
+    link_button = "MAIN_LINK"
+    about_button = "MAIN_ABOUT"
+    back_button = "MAIN_BACK"
 
-    class Callback(CallbackData, prefix="main_menu"):
+    class Callback(CompactCallback, prefix="m"):
         pass
 
     def __init__(self) -> None:
         super().__init__()
-        self.button(text=self.freshman_button)
-        self.button(text=self.course_button)
-        self.button(text=self.place_button)
-        self.button(text=self.phone_button)
-        self.button(text=self.link_button)
-        self.button(text=self.about_button)
+        self.button(text=BUTTONS[self.freshman_button])
+        self.button(text=BUTTONS[self.course_button])
+        self.button(text=BUTTONS[self.place_button])
+        self.button(text=BUTTONS[self.phone_button])
+        self.button(text=BUTTONS[self.link_button])
+        self.button(text=BUTTONS[self.about_button])
         self.adjust(1, 2, 2, 1)
 
 
 class FreshmanKeyboard(InlineKeyboardBuilder):
-    register_button = TEXT_USE_CASE.get_text(
-        "FRESHMAN_REGISTER",
-        is_button=True,
-    )
+    register_button = "FRESHMAN_REGISTER"
 
-    class Callback(CallbackData, prefix="freshman"):
+    class Callback(CompactCallback, prefix="f"):
         mode: str
 
     def __init__(self, back: bool = False) -> None:
         super().__init__()
         if back:
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.Callback(mode="menu"),
             )
         else:
             self.button(
-                text=self.register_button,
+                text=BUTTONS[self.register_button],
                 callback_data=self.Callback(mode="register"),
             )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=MainKeyboard.Callback(),
             )
         self.adjust(1)
 
 
 class CourseKeyboard(InlineKeyboardBuilder):
-    courses_by_semester_button = TEXT_USE_CASE.get_text(
-        "COURSE_COURSES_BY_SEMESTER",
-        is_button=True,
-    )
-    courses_by_type_button = TEXT_USE_CASE.get_text(
-        "COURSE_COURSES_BY_TYPE",
-        is_button=True,
-    )
+    courses_by_semester_button = "COURSE_COURSES_BY_SEMESTER"
+    courses_by_type_button = "COURSE_COURSES_BY_TYPE"
 
-    class CoursesFilterCallback(CallbackData, prefix="courses"):
+    class CoursesFilterCallback(CompactCallback, prefix="cs"):
         filter_by: Optional[str] = None
         value: Optional[int] = None
 
-    class CourseCallback(CallbackData, prefix="course"):
+    class CourseCallback(CompactCallback, prefix="c"):
         filter_by: str
         id: int
 
@@ -119,15 +140,15 @@ class CourseKeyboard(InlineKeyboardBuilder):
 
         if filter_by is None:
             self.button(
-                text=self.courses_by_semester_button,
+                text=BUTTONS[self.courses_by_semester_button],
                 callback_data=self.CoursesFilterCallback(filter_by="semester"),
             )
             self.button(
-                text=self.courses_by_type_button,
+                text=BUTTONS[self.courses_by_type_button],
                 callback_data=self.CoursesFilterCallback(filter_by="type"),
             )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=MainKeyboard.Callback(),
             )
             self.adjust(1)
@@ -159,7 +180,7 @@ class CourseKeyboard(InlineKeyboardBuilder):
         if course is not None:
             markup_length = 0
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(
                     filter_by="semester", value=course.offering_semester
                 ),
@@ -174,7 +195,7 @@ class CourseKeyboard(InlineKeyboardBuilder):
                     ),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(filter_by="semester"),
             )
         else:
@@ -188,7 +209,7 @@ class CourseKeyboard(InlineKeyboardBuilder):
                     ),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(),
             )
         return markup_length
@@ -201,7 +222,7 @@ class CourseKeyboard(InlineKeyboardBuilder):
         if course is not None:
             markup_length = 0
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(
                     filter_by="type", value=course.course_type
                 ),
@@ -214,7 +235,7 @@ class CourseKeyboard(InlineKeyboardBuilder):
                     callback_data=self.CourseCallback(filter_by="type", id=_course.id),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(filter_by="type"),
             )
         else:
@@ -228,27 +249,33 @@ class CourseKeyboard(InlineKeyboardBuilder):
                     ),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.CoursesFilterCallback(),
             )
         return markup_length
 
 
 class PlaceKeyboard(InlineKeyboardBuilder):
-    class Callback(CallbackData, prefix="place"):
+    nearest_button = "PLACE_NEAREST"
+
+    class Callback(CompactCallback, prefix="p"):
         pass
 
-    class GroupCallback(CallbackData, prefix="place"):
+    class GroupCallback(CompactCallback, prefix="pg"):
         group: int
 
-    class LocationCallback(CallbackData, prefix="place"):
-        latitude: float
-        longitude: float
+    class LocationCallback(CompactCallback, prefix="pl"):
+        id: int
+
+    class NearestCallback(CompactCallback, prefix="n"):
+        # All groups when it isn't set
+        group: Optional[int] = None
 
     def __init__(
         self,
         mode: Optional[str] = None,
         places: Optional[list[Place]] = None,
+        group: Optional[int] = None,
     ) -> None:
         super().__init__()
 
@@ -262,7 +289,11 @@ class PlaceKeyboard(InlineKeyboardBuilder):
                     callback_data=self.GroupCallback(group=group_id),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[self.nearest_button],
+                callback_data=self.NearestCallback(),
+            )
+            self.button(
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=MainKeyboard.Callback(),
             )
         elif mode == "location" and places is not None:
@@ -270,16 +301,87 @@ class PlaceKeyboard(InlineKeyboardBuilder):
             for place in right_to_left_markup(places):
                 self.button(
                     text=place.name,
-                    callback_data=self.LocationCallback(
-                        latitude=place.latitude, longitude=place.longitude
-                    ),
+                    callback_data=self.LocationCallback(id=place.id),
                 )
             self.button(
-                text=MainKeyboard.back_button,
+                text=BUTTONS[self.nearest_button],
+                callback_data=self.NearestCallback(group=group),
+            )
+            self.button(
+                text=BUTTONS[MainKeyboard.back_button],
                 callback_data=self.Callback(),
             )
 
-        if markup_length % 2:
-            self.adjust(*[2 for _ in range(markup_length // 2)] + [1, 1])
-        else:
-            self.adjust(2)
+        # Pairs of places, then the nearest places and back buttons on their own rows
+        self.adjust(
+            *[2 for _ in range(markup_length // 2)] + [1] * (markup_length % 2 + 2)
+        )
+
+
+class NearestKeyboard(ReplyKeyboardBuilder):
+    location_button = "NEAREST_LOCATION"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.button(text=BUTTONS[self.location_button], request_location=True)
+        self.button(text=BUTTONS[MainKeyboard.back_button])
+        self.adjust(1)
+
+
+# Every cached markup is served by one of the functions below, which pair the key of
+# a view state with the only builder of its markup.
+
+
+def main_markup() -> ReplyKeyboardMarkup:
+    return MARKUPS.get(("main",), lambda: MainKeyboard().as_markup(resize_keyboard=True))
+
+
+def freshman_markup(back: bool = False) -> InlineKeyboardMarkup:
+    return MARKUPS.get(
+        ("freshman", back), lambda: FreshmanKeyboard(back=back).as_markup()
+    )
+
+
+async def courses_markup(
+    filter_by: Optional[str] = None, value: Optional[int] = None
+) -> InlineKeyboardMarkup:
+    async def build() -> InlineKeyboardMarkup:
+        courses = None
+        if value is not None:
+            catalog = await COURSE_USE_CASE.aget_catalog()
+            if filter_by == "semester":
+                courses = list(catalog.by_semester.get(value, ()))
+            elif filter_by == "type":
+                courses = list(catalog.by_type.get(value, ()))
+        return CourseKeyboard(filter_by=filter_by, courses=courses).as_markup()
+
+    return await MARKUPS.aget(("courses", filter_by, value), build)
+
+
+def course_markup(filter_by: str, course: Course) -> InlineKeyboardMarkup:
+    # The markup only leads back to the course's semester or type
+    value = course.course_type if filter_by == "type" else course.offering_semester
+    return MARKUPS.get(
+        ("course", filter_by, value),
+        lambda: CourseKeyboard(filter_by=filter_by, course=course).as_markup(),
+    )
+
+
+def places_markup() -> InlineKeyboardMarkup:
+    return MARKUPS.get(
+        ("places",), lambda: PlaceKeyboard(mode="group").as_markup(resize_keyboard=True)
+    )
+
+
+def nearest_markup() -> ReplyKeyboardMarkup:
+    return MARKUPS.get(
+        ("nearest",), lambda: NearestKeyboard().as_markup(resize_keyboard=True)
+    )
+
+
+async def group_places_markup(group: int) -> InlineKeyboardMarkup:
+    async def build() -> InlineKeyboardMarkup:
+        places = list((await PLACE_USE_CASE.aget_index()).by_group.get(group, ()))
+        return PlaceKeyboard(mode="location", places=places, group=group).as_markup()
+
+    return await MARKUPS.aget(("places", group), build)
@@ -0,0 +1,85 @@
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+from .graph import PrerequisiteGraph
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CourseCatalog:
+    """
+    Immutable snapshot of `Course` and `PrerequisiteCourse` rows with precomputed indexes.
+    It is never changed in place; a new snapshot is built and swapped in instead.
+    """
+
+    courses: tuple[Course, ...] = ()
+    by_id: Mapping[int, Course] = field(default_factory=lambda: MappingProxyType({}))
+    by_semester: Mapping[int, tuple[Course, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_type: Mapping[int, tuple[Course, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    prerequisites: Mapping[int, tuple[int, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    graph: PrerequisiteGraph = field(default_factory=lambda: PrerequisiteGraph({}))
+
+    @classmethod
+    def build(
+        cls,
+        courses: Iterable[Course],
+        prerequisites: Iterable[tuple[int, int]],
+    ) -> "CourseCatalog":
+        """
+        Builds a snapshot from courses and `(course_id, prerequisite_course_id)` pairs.
+        """
+        courses = tuple(courses)
+
+        by_semester: dict[int, list[Course]] = {}
+        by_type: dict[int, list[Course]] = {}
+        for course in courses:
+            if course.offering_semester is not None:
+                by_semester.setdefault(course.offering_semester, []).append(course)
+            by_type.setdefault(course.course_type, []).append(course)
+
+        adjacency: dict[int, list[int]] = {}
+        for course_id, prerequisite_course_id in prerequisites:
+            adjacency.setdefault(course_id, []).append(prerequisite_course_id)
+
+        graph = PrerequisiteGraph(adjacency)
+        if graph.cycle is not None:
+            logger.warning("Prerequisite courses have a cycle: %s", graph.cycle)
+
+        return cls(
+            courses=courses,
+            by_id=MappingProxyType({course.id: course for course in courses}),
+            by_semester=MappingProxyType(
+                {semester: tuple(items) for semester, items in by_semester.items()}
+            ),
+            by_type=MappingProxyType(
+                {course_type: tuple(items) for course_type, items in by_type.items()}
+            ),
+            prerequisites=MappingProxyType(
+                {course_id: tuple(items) for course_id, items in adjacency.items()}
+            ),
+            graph=graph,
+        )
+
+    def prerequisite_courses(self, course_id: int) -> tuple[Course, ...]:
+        return self._courses(self.prerequisites.get(course_id, ()))
+
+    def prerequisite_chain(self, course_id: int) -> tuple[Course, ...]:
+        return self._courses(self.graph.prerequisites(course_id))
+
+    def unlocked_courses(self, course_id: int) -> tuple[Course, ...]:
+        return self._courses(self.graph.unlocks(course_id))
+
+    def _courses(self, course_ids: Iterable[int]) -> tuple[Course, ...]:
+        return tuple(
+            self.by_id[course_id] for course_id in course_ids if course_id in self.by_id
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Final, Optional
+
+from django.db.models import F, Model
+
+from .models import (
+    Broadcast,
+    Course,
+    Link,
+    ModelVersion,
+    Phone,
+    Place,
+    PrerequisiteCourse,
+    Text,
+)
+
+logger = logging.getLogger(__name__)
+
+# The admin panel and the bot run in different processes, so in-memory caches of the bot
+# can not see model signals sent by the admin panel. Instead, every change of these models
+# bumps a version row, and the bot polls all the versions with a single query.
+TRACKED_MODELS: Final[tuple[type[Model], ...]] = (
+    Text,
+    Course,
+    PrerequisiteCourse,
+    Place,
+    Phone,
+    Link,
+    # New broadcasts are sent by the bot
+    Broadcast,
+)
+
+ReloadCallback = Callable[[], Awaitable[None]]
+InvalidateCallback = Callable[[], None]
+
+
+def bump_version(model: type[Model]) -> None:
+    name = model._meta.label
+    if not ModelVersion.objects.filter(name=name).update(version=F("version") + 1):
+        ModelVersion.objects.get_or_create(name=name, defaults={"version": 1})
+
+
+class ChangeWatcher:
+    def __init__(self) -> None:
+        self._callbacks: dict[str, list[ReloadCallback]] = {}
+        self._invalidate_callbacks: dict[str, list[InvalidateCallback]] = {}
+        self._versions: Optional[dict[str, int]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def subscribe(self, model: type[Model], callback: ReloadCallback) -> None:
+        self._callbacks.setdefault(model._meta.label, []).append(callback)
+
+    def subscribe_invalidate(
+        self, model: type[Model], callback: InvalidateCallback
+    ) -> None:
+        """
+        Registers a callback for caches derived from other caches (e.g. keyboard markups).
+        It runs after every reload callback of the poll, so it never sees outdated data.
+        """
+        self._invalidate_callbacks.setdefault(model._meta.label, []).append(callback)
+
+    async def poll(self) -> list[str]:
+        """
+        Calls the reload callbacks of models changed since the previous poll.
+        Returns the names of the changed models.
+        """
+        versions = {
+            name: version
+            async for name, version in ModelVersion.objects.values_list("name", "version")
+        }
+        if self._versions is None:
+            # The first poll only records the versions the caches are loaded against
+            self._versions = versions
+            return []
+
+        changed = [
+            name
+            for name, version in versions.items()
+            if self._versions.get(name) != version
+        ]
+
+        # A callback subscribed to several changed models is called only once
+        callbacks: dict[ReloadCallback, list[str]] = {}
+        for name in changed:
+            for callback in self._callbacks.get(name, []):
+                callbacks.setdefault(callback, []).append(name)
+
+        failed: set[str] = set()
+        for callback, names in callbacks.items():
+            try:
+                await callback()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to reload %s", ", ".join(names))
+                failed.update(names)
+
+        invalidate_callbacks = {
+            callback: None
+            for name in changed
+            for callback in self._invalidate_callbacks.get(name, [])
+        }
+        for invalidate_callback in invalidate_callbacks:
+            invalidate_callback()
+
+        for name in changed:
+            if name not in failed:
+                self._versions[name] = versions[name]
+        return changed
+
+    async def start(self, interval: float) -> None:
+        await self.poll()
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._versions = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.poll()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to poll model versions")
+
+
+CHANGE_WATCHER: Final[ChangeWatcher] = ChangeWatcher()
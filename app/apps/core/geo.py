@@ -0,0 +1,168 @@
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+from .models import Place
+
+EARTH_RADIUS: float = 6_371_008.8  # meters
+
+Point = tuple[float, float, float]
+
+
+def to_point(latitude: float, longitude: float) -> Point:
+    """
+    Maps a coordinate onto the unit sphere. The straight-line (chord) distance between
+    two such points grows monotonically with their great-circle distance, so the nearest
+    points in 3D are exactly the nearest places by haversine distance.
+    """
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return (
+        math.cos(phi) * math.cos(lam),
+        math.cos(phi) * math.sin(lam),
+        math.sin(phi),
+    )
+
+
+def chord_to_meters(squared_chord: float) -> float:
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+def haversine(
+    latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float
+) -> float:
+    phi_1, phi_2 = math.radians(latitude_1), math.radians(latitude_2)
+    d_phi = phi_2 - phi_1
+    d_lambda = math.radians(longitude_2 - longitude_1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi_1) * math.cos(phi_2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class KDTree:
+    """
+    A static 3D k-d tree stored in flat lists, nodes are indexes of `points`.
+    """
+
+    def __init__(self, points: Sequence[Point]) -> None:
+        self._points = list(points)
+        self._axis = [0] * len(self._points)
+        self._left = [-1] * len(self._points)
+        self._right = [-1] * len(self._points)
+        self._root = self._build(list(range(len(self._points))), 0)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, indexes: list[int], depth: int) -> int:
+        if not indexes:
+            return -1
+
+        axis = depth % 3
+        indexes.sort(key=lambda index: self._points[index][axis])
+        middle = len(indexes) // 2
+        node = indexes[middle]
+        self._axis[node] = axis
+        self._left[node] = self._build(indexes[:middle], depth + 1)
+        self._right[node] = self._build(indexes[middle + 1 :], depth + 1)
+        return node
+
+    def nearest(self, point: Point, k: int) -> list[tuple[float, int]]:
+        """
+        Returns up to `k` tuples of (squared distance, index), nearest first.
+        """
+        if k <= 0 or self._root == -1:
+            return []
+
+        # Max-heap of the best candidates so far, by negated distance
+        best: list[tuple[float, int]] = []
+        points, axes, left, right = self._points, self._axis, self._left, self._right
+        x, y, z = point
+
+        def search(node: int) -> None:
+            node_x, node_y, node_z = points[node]
+            distance = (x - node_x) ** 2 + (y - node_y) ** 2 + (z - node_z) ** 2
+            if len(best) < k:
+                heapq.heappush(best, (-distance, node))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, node))
+
+            difference = point[axes[node]] - points[node][axes[node]]
+            near, far = (
+                (left[node], right[node]) if difference < 0 else (right[node], left[node])
+            )
+            if near != -1:
+                search(near)
+            if far != -1 and (len(best) < k or difference**2 < -best[0][0]):
+                search(far)
+
+        search(self._root)
+        return sorted((-distance, node) for distance, node in best)
+
+
+@dataclass(frozen=True)
+class NearbyPlace:
+    place: Place
+    distance: float  # meters
+
+
+@dataclass(frozen=True)
+class PlaceIndex:
+    """
+    Immutable in-memory index of `Place` rows: places by id and by group, and k-d trees
+    over their coordinates (one for all places and one per group).
+    """
+
+    places: tuple[Place, ...] = ()
+    by_id: dict[int, Place] = field(default_factory=dict)
+    by_group: dict[int, tuple[Place, ...]] = field(default_factory=dict)
+    trees: dict[Optional[int], tuple[KDTree, tuple[Place, ...]]] = field(
+        default_factory=dict
+    )
+
+    @classmethod
+    def build(cls, places: Iterable[Place]) -> "PlaceIndex":
+        places = tuple(places)
+
+        by_group: dict[int, list[Place]] = {}
+        for place in places:
+            by_group.setdefault(place.group, []).append(place)
+
+        trees: dict[Optional[int], tuple[KDTree, tuple[Place, ...]]] = {
+            None: cls._tree(places)
+        }
+        for group, group_places in by_group.items():
+            trees[group] = cls._tree(group_places)
+
+        return cls(
+            places=places,
+            by_id={place.id: place for place in places},
+            by_group={group: tuple(items) for group, items in by_group.items()},
+            trees=trees,
+        )
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        group: Optional[int] = None,
+    ) -> list[NearbyPlace]:
+        if group not in self.trees:
+            return []
+
+        tree, places = self.trees[group]
+        return [
+            NearbyPlace(place=places[index], distance=chord_to_meters(distance))
+            for distance, index in tree.nearest(to_point(latitude, longitude), k)
+        ]
+
+    @staticmethod
+    def _tree(places: Sequence[Place]) -> tuple[KDTree, tuple[Place, ...]]:
+        return (
+            KDTree([to_point(place.latitude, place.longitude) for place in places]),
+            tuple(places),
+        )
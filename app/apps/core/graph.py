@@ -0,0 +1,141 @@
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+
+class PrerequisiteGraph:
+    """
+    Precomputed view of the prerequisite relation between courses.
+
+    For every course it keeps the full (transitive) chain of prerequisites and the
+    courses it unlocks, both sorted in topological order, so nothing is walked per request.
+    """
+
+    def __init__(self, prerequisites: Mapping[int, Iterable[int]]) -> None:
+        edges = {course_id: tuple(items) for course_id, items in prerequisites.items()}
+        nodes = set(edges).union(*edges.values())
+
+        dependents: dict[int, list[int]] = {node: [] for node in nodes}
+        for course_id, prerequisite_ids in edges.items():
+            for prerequisite_id in prerequisite_ids:
+                dependents[prerequisite_id].append(course_id)
+
+        self.order = self._topological_order(nodes, edges, dependents)
+        self.cycle = find_cycle(edges) if len(self.order) < len(nodes) else None
+
+        # Courses on a cycle have no topological position, they are sorted after the rest
+        position = {node: index for index, node in enumerate(self.order)}
+        for node in sorted(nodes - set(position)):
+            position[node] = len(position)
+
+        self._prerequisites = self._closure(nodes, edges, position)
+        self._unlocks = self._closure(
+            nodes,
+            {node: tuple(items) for node, items in dependents.items()},
+            position,
+        )
+
+    def prerequisites(self, course_id: int) -> tuple[int, ...]:
+        """
+        Returns every course that has to be passed before `course_id`.
+        """
+        return self._prerequisites.get(course_id, ())
+
+    def unlocks(self, course_id: int) -> tuple[int, ...]:
+        """
+        Returns every course that requires `course_id`, directly or transitively.
+        """
+        return self._unlocks.get(course_id, ())
+
+    @staticmethod
+    def _topological_order(
+        nodes: set[int],
+        edges: Mapping[int, tuple[int, ...]],
+        dependents: Mapping[int, list[int]],
+    ) -> tuple[int, ...]:
+        # Kahn's algorithm; courses on a cycle never reach zero in-degree
+        in_degree = {node: len(edges.get(node, ())) for node in nodes}
+        ready = sorted(node for node, degree in in_degree.items() if not degree)
+        order = []
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for dependent in dependents[node]:
+                in_degree[dependent] -= 1
+                if not in_degree[dependent]:
+                    ready.append(dependent)
+        return tuple(order)
+
+    @staticmethod
+    def _closure(
+        nodes: set[int],
+        edges: Mapping[int, tuple[int, ...]],
+        position: Mapping[int, int],
+    ) -> Mapping[int, tuple[int, ...]]:
+        closure = {}
+        for node in nodes:
+            reachable: set[int] = set()
+            stack = list(edges.get(node, ()))
+            while stack:
+                current = stack.pop()
+                if current not in reachable:
+                    reachable.add(current)
+                    stack.extend(edges.get(current, ()))
+            reachable.discard(node)
+            if reachable:
+                closure[node] = tuple(sorted(reachable, key=position.__getitem__))
+        return MappingProxyType(closure)
+
+
+def find_cycle(prerequisites: Mapping[int, Iterable[int]]) -> Optional[tuple[int, ...]]:
+    """
+    Returns a cycle of the prerequisite relation as `(a, b, ..., a)`, if there is any.
+    """
+    edges = {course_id: tuple(items) for course_id, items in prerequisites.items()}
+    visited: set[int] = set()
+
+    for start in sorted(edges):
+        if start in visited:
+            continue
+
+        # Iterative depth-first search keeping the current path on the stack
+        path: list[int] = [start]
+        on_path = {start}
+        iterators = [iter(edges.get(start, ()))]
+        while iterators:
+            node = next(iterators[-1], None)
+            if node is None:
+                finished = path.pop()
+                on_path.discard(finished)
+                visited.add(finished)
+                iterators.pop()
+                continue
+            if node in on_path:
+                return tuple(path[path.index(node) :]) + (node,)
+            if node not in visited:
+                path.append(node)
+                on_path.add(node)
+                iterators.append(iter(edges.get(node, ())))
+    return None
+
+
+def find_path(
+    prerequisites: Mapping[int, Iterable[int]], start: int, target: int
+) -> Optional[tuple[int, ...]]:
+    """
+    Returns a chain of prerequisites from `start` to `target` as `(start, ..., target)`,
+    if `target` is reachable.
+    """
+    parents: dict[int, Optional[int]] = {start: None}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node == target:
+            path = [node]
+            while (parent := parents[path[-1]]) is not None:
+                path.append(parent)
+            return tuple(reversed(path))
+        for prerequisite in prerequisites.get(node, ()):
+            if prerequisite not in parents:
+                parents[prerequisite] = node
+                stack.append(prerequisite)
+    return None
@@ -0,0 +1,60 @@
+from typing import TYPE_CHECKING, Any
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from app.apps.core.models import Broadcast
+from app.apps.core.use_case import BROADCAST_USE_CASE
+
+if TYPE_CHECKING:
+    from app.delivery.bot.broadcast import BroadcastReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends a message to every active bot user, or resumes an interrupted broadcast."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("text", nargs="?", help="Text of a new broadcast")
+        parser.add_argument(
+            "--resume",
+            type=int,
+            metavar="ID",
+            help="Resume the broadcast with this ID, e.g. after a crash",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if (options["text"] is None) == (options["resume"] is None):
+            raise CommandError("Pass either the text of a new broadcast or --resume ID")
+
+        if options["resume"] is not None:
+            broadcast_id = options["resume"]
+            if (
+                not Broadcast.objects.filter(id=broadcast_id)
+                .exclude(status=Broadcast.Status.DONE)
+                .exists()
+            ):
+                raise CommandError(f"There is no unfinished broadcast #{broadcast_id}")
+        else:
+            broadcast_id = BROADCAST_USE_CASE.create(Broadcast(text=options["text"])).id
+
+        report = async_to_sync(self._send)(broadcast_id)
+        self.stdout.write(
+            f"Broadcast #{broadcast_id}: {report.sent} sent, {report.blocked} blocked, "
+            f"{report.failed} failed in {report.seconds:.1f} s ({report.rate:.1f} messages/s)"
+        )
+
+    @staticmethod
+    async def _send(broadcast_id: int) -> "BroadcastReport":
+        # Imported here, as the bot needs `TG_TOKEN` that other commands don't
+        from app.delivery.bot.dispatcher import BROADCASTS, bot
+
+        # A crashed run's broadcast is claimed once its heartbeat is old enough
+        broadcast = await BROADCAST_USE_CASE.aclaim(broadcast_id)
+        if broadcast is None:
+            raise CommandError(
+                f"Broadcast #{broadcast_id} is being sent by another process"
+            )
+        async with bot.context():
+            return await BROADCASTS.arun(broadcast)
@@ -0,0 +1,398 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:23
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="BotMetadata",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True, verbose_name="Key")),
+                ("value", models.TextField(verbose_name="Value")),
+            ],
+            options={
+                "db_table": "bot_metadata",
+            },
+        ),
+        migrations.CreateModel(
+            name="Broadcast",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.TextField(verbose_name="Text")),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[(1, "Pending"), (2, "Running"), (3, "Done")],
+                        default=1,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created At"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Finished At"
+                    ),
+                ),
+                (
+                    "recipients",
+                    models.PositiveIntegerField(default=0, verbose_name="Recipients"),
+                ),
+                ("sent", models.PositiveIntegerField(default=0, verbose_name="Sent")),
+                (
+                    "blocked",
+                    models.PositiveIntegerField(default=0, verbose_name="Blocked"),
+                ),
+                ("failed", models.PositiveIntegerField(default=0, verbose_name="Failed")),
+            ],
+            options={
+                "db_table": "broadcast",
+            },
+        ),
+        migrations.CreateModel(
+            name="Course",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fa_title",
+                    models.CharField(max_length=64, verbose_name="Course Persian Title"),
+                ),
+                (
+                    "en_title",
+                    models.CharField(
+                        blank=True,
+                        max_length=64,
+                        null=True,
+                        verbose_name="Course English Title",
+                    ),
+                ),
+                (
+                    "offering_semester",
+                    models.IntegerField(
+                        blank=True,
+                        null=True,
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(8),
+                        ],
+                        verbose_name="Offering Semester",
+                    ),
+                ),
+                ("credit", models.IntegerField(verbose_name="Course Credit")),
+                (
+                    "quiz_credit",
+                    models.IntegerField(default=0, verbose_name="Course Quiz Credit"),
+                ),
+                (
+                    "unit_type",
+                    models.IntegerField(
+                        choices=[(1, "نظری"), (2, "عملی")], verbose_name="Unit Type"
+                    ),
+                ),
+                (
+                    "course_type",
+                    models.IntegerField(
+                        choices=[(1, "عمومی"), (2, "پایه"), (3, "تخصصی"), (4, "اختیاری")],
+                        verbose_name="Course Type",
+                    ),
+                ),
+                (
+                    "has_exam",
+                    models.BooleanField(default=True, verbose_name="Course Has Exam?"),
+                ),
+                (
+                    "has_project",
+                    models.BooleanField(
+                        default=False, verbose_name="Course Has Project?"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "course",
+            },
+        ),
+        migrations.CreateModel(
+            name="Link",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, verbose_name="Name")),
+                ("address", models.URLField(verbose_name="URL Address")),
+            ],
+            options={
+                "db_table": "link",
+            },
+        ),
+        migrations.CreateModel(
+            name="ModelVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Model Name"
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Version"),
+                ),
+            ],
+            options={
+                "db_table": "model_version",
+            },
+        ),
+        migrations.CreateModel(
+            name="Phone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, verbose_name="Name")),
+                (
+                    "phone_number",
+                    models.CharField(
+                        max_length=13,
+                        validators=[
+                            django.core.validators.RegexValidator(
+                                "^((0|00|\\+)?98|0)?(\\d{10})$"
+                            )
+                        ],
+                        verbose_name="Phone Number",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "phone",
+            },
+        ),
+        migrations.CreateModel(
+            name="Place",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, verbose_name="Name")),
+                (
+                    "group",
+                    models.IntegerField(
+                        choices=[
+                            (1, "🚪 درب\u200cهای ورودی"),
+                            (2, "🍕 غذاخوری\u200cها"),
+                            (3, "🛏 خوابگاه\u200cها"),
+                            (4, "📚 دانشکده\u200cها"),
+                            (5, "🏦 بانک\u200cها"),
+                            (6, "🏢 ساختمان\u200cهای اداری"),
+                            (7, "🛟 مکان\u200cهای رفاهی و تفریحی"),
+                        ],
+                        verbose_name="Group",
+                    ),
+                ),
+                ("latitude", models.FloatField(verbose_name="Latitude")),
+                ("longitude", models.FloatField(verbose_name="Longitude")),
+            ],
+            options={
+                "db_table": "place",
+            },
+        ),
+        migrations.CreateModel(
+            name="Text",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, verbose_name="Variable Name")),
+                ("is_button", models.BooleanField(verbose_name="Is Button")),
+                ("text", models.TextField(verbose_name="Text")),
+            ],
+            options={
+                "db_table": "text",
+            },
+        ),
+        migrations.CreateModel(
+            name="TGUser",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="Telegram ID"
+                    ),
+                ),
+                ("full_name", models.CharField(max_length=64, verbose_name="Full Name")),
+                (
+                    "username",
+                    models.CharField(
+                        max_length=64, null=True, verbose_name="Telegram Username"
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="Is Active"),
+                ),
+            ],
+            options={
+                "db_table": "tg_user",
+            },
+        ),
+        migrations.CreateModel(
+            name="PrerequisiteCourse",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.course",
+                        verbose_name="Course",
+                    ),
+                ),
+                (
+                    "prerequisite_course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.course",
+                        verbose_name="Prerequisite Course",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "prerequisite_course",
+                "unique_together": {("course", "prerequisite_course")},
+            },
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="prerequisite_courses",
+            field=models.ManyToManyField(
+                through="core.PrerequisiteCourse", to="core.course"
+            ),
+        ),
+        migrations.CreateModel(
+            name="BroadcastDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[
+                            (1, "Pending"),
+                            (2, "Sending"),
+                            (3, "Sent"),
+                            (4, "Blocked"),
+                            (5, "Failed"),
+                        ],
+                        default=1,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "broadcast",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.broadcast",
+                        verbose_name="Broadcast",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.tguser",
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "broadcast_delivery",
+                "unique_together": {("broadcast", "user")},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["offering_semester"], name="course_semester_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["course_type"], name="course_type_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="place",
+            index=models.Index(fields=["group"], name="place_group_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="place",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="place_location_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="text",
+            constraint=models.UniqueConstraint(
+                fields=("name", "is_button"), name="text_name_is_button_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_text_unique_and_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="place",
+            name="place_location_idx",
+        ),
+    ]
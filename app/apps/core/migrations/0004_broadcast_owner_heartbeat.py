@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_drop_place_location_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="broadcast",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Heartbeat At"
+            ),
+        ),
+        migrations.AddField(
+            model_name="broadcast",
+            name="owner",
+            field=models.CharField(blank=True, max_length=64, verbose_name="Owner"),
+        ),
+    ]
@@ -1,14 +1,24 @@
 import re
 from typing import Iterable
 
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from .text_template import TEXT_PLACEHOLDERS, TextTemplate
+
 
 class Text(models.Model):
     class Meta:
         db_table = "text"
+        constraints = [
+            # Texts are looked up by both, through this constraint's index
+            models.UniqueConstraint(
+                fields=["name", "is_button"],
+                name="text_name_is_button_unique",
+            ),
+        ]
 
     name = models.CharField(
         max_length=64,
@@ -24,6 +34,18 @@ class Text(models.Model):
 
     objects: models.manager.BaseManager["Text"]
 
+    def clean(self) -> None:
+        _, unknown = TextTemplate(self.text).check(
+            TEXT_PLACEHOLDERS.get(self.name.upper(), frozenset())
+        )
+        if unknown:
+            raise ValidationError(
+                {
+                    "text": "Unknown placeholders: "
+                    + ", ".join("{" + name + "}" for name in sorted(unknown))
+                }
+            )
+
     def save(
         self,
         force_insert: bool = False,
@@ -62,6 +84,11 @@ class TGUser(models.Model):
         null=True,
         verbose_name="Telegram Username",
     )
+    # Cleared when a broadcast finds the user has blocked the bot or was deleted
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Is Active",
+    )
 
     objects: models.manager.BaseManager["TGUser"]
 
@@ -72,6 +99,10 @@ class TGUser(models.Model):
 class Course(models.Model):
     class Meta:
         db_table = "course"
+        indexes = [
+            models.Index(fields=["offering_semester"], name="course_semester_idx"),
+            models.Index(fields=["course_type"], name="course_type_idx"),
+        ]
 
     class UnitType(models.IntegerChoices):
         THEORETICAL = 1, _("نظری")
@@ -164,6 +195,9 @@ class PrerequisiteCourse(models.Model):
 class Place(models.Model):
     class Meta:
         db_table = "place"
+        indexes = [
+            models.Index(fields=["group"], name="place_group_idx"),
+        ]
 
     class Group(models.IntegerChoices):
         GATE = 1, _("🚪 درب‌های ورودی")
@@ -251,3 +285,144 @@ class Link(models.Model):
 
     def __str__(self) -> str:
         return f"{self.name}"
+
+
+class ModelVersion(models.Model):
+    class Meta:
+        db_table = "model_version"
+
+    name = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Model Name",
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Version",
+    )
+
+    objects: models.manager.BaseManager["ModelVersion"]
+
+    def __str__(self) -> str:
+        return f"{self.name} v{self.version}"
+
+
+class BotMetadata(models.Model):
+    class Meta:
+        db_table = "bot_metadata"
+
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Key",
+    )
+    value = models.TextField(
+        verbose_name="Value",
+    )
+
+    objects: models.manager.BaseManager["BotMetadata"]
+
+    def __str__(self) -> str:
+        return f"{self.key}"
+
+
+class Broadcast(models.Model):
+    class Meta:
+        db_table = "broadcast"
+
+    class Status(models.IntegerChoices):
+        PENDING = 1, _("Pending")
+        RUNNING = 2, _("Running")
+        DONE = 3, _("Done")
+
+    text = models.TextField(
+        verbose_name="Text",
+    )
+    status = models.IntegerField(
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Status",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Created At",
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Finished At",
+    )
+    recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Recipients",
+    )
+    sent = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Sent",
+    )
+    blocked = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Blocked",
+    )
+    failed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Failed",
+    )
+    # The process sending a running broadcast, it is taken over by another one
+    # once the heartbeat, refreshed after every chunk, gets too old
+    owner = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Owner",
+    )
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Heartbeat At",
+    )
+
+    objects: models.manager.BaseManager["Broadcast"]
+
+    def __str__(self) -> str:
+        return f"Broadcast #{self.pk}"
+
+
+class BroadcastDelivery(models.Model):
+    # One row per recipient, created with the broadcast. The rows are both its
+    # audience and its progress, so an interrupted broadcast resumes where it stopped.
+
+    class Meta:
+        db_table = "broadcast_delivery"
+        unique_together = ("broadcast", "user")
+
+    class Status(models.IntegerChoices):
+        PENDING = 1, _("Pending")
+        # Being sent, left as is if the broadcast is interrupted meanwhile,
+        # so the message is never sent twice
+        SENDING = 2, _("Sending")
+        SENT = 3, _("Sent")
+        BLOCKED = 4, _("Blocked")
+        FAILED = 5, _("Failed")
+
+    broadcast = models.ForeignKey(
+        to=Broadcast,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Broadcast",
+    )
+    user = models.ForeignKey(
+        to=TGUser,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="User",
+    )
+    status = models.IntegerField(
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Status",
+    )
+
+    objects: models.manager.BaseManager["BroadcastDelivery"]
+
+    def __str__(self) -> str:
+        return f"{self.broadcast} {self.user}"
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Any, Callable, Final, Optional, Sequence, TypeVar
+
+import aiosqlite
+from asgiref.sync import sync_to_async
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX, DatabaseWrapper
+from django.db.models import QuerySet
+
+from app.config.database import DB_READ_POOL_SIZE
+
+from .routers import READ_DATABASE, SQLITE_PRAGMAS, SQLITE_READ_PRAGMAS
+from .tracing import TRACER
+
+M = TypeVar("M", bound=models.Model)
+
+Row = tuple[Any, ...]
+
+# Called with the seconds of every query the pool runs outside of Django's connections,
+# whose `execute_wrappers` don't see them
+QueryObserver = Callable[[float], None]
+
+
+class ReadPool:
+    # The bot's hot read queries are built with the ORM but run through a `ReadPool`,
+    # so their execution is pluggable. This base class runs them with the ORM through
+    # `sync_to_async` and is used for the database engines without an async driver.
+
+    def __init__(self) -> None:
+        self.observers: list[QueryObserver] = []
+
+    async def afetch(self, queryset: QuerySet[Any]) -> list[Row]:
+        """
+        Returns the rows of a `values_list()` queryset.
+        """
+        return await sync_to_async(self._fetch)(queryset)
+
+    async def ainstances(self, queryset: QuerySet[M]) -> list[M]:
+        return [instance async for instance in queryset]
+
+    async def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _fetch(queryset: QuerySet[Any]) -> list[Row]:
+        return [tuple(row) for row in queryset]
+
+
+class SQLiteReadPool(ReadPool):
+    # Up to `size` read-only aiosqlite connections to the `alias` database, each with its
+    # own thread, so concurrent reads no longer queue on Django's `sync_to_async` thread.
+    # The SQL and the conversion of the rows are still Django's.
+    # An in-memory database (e.g. the tests') can't be shared between connections
+    # without locking whole tables, so its reads stay on Django's connections.
+
+    def __init__(self, alias: str = READ_DATABASE, size: int = 4) -> None:
+        super().__init__()
+        self.alias = alias
+        self.size = size
+        self._idle: list[aiosqlite.Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def afetch(self, queryset: QuerySet[Any]) -> list[Row]:
+        if self._is_in_memory():
+            return await super().afetch(queryset)
+
+        compiler = queryset.query.get_compiler(using=self.alias)
+        try:
+            sql, params = compiler.as_sql()
+        except EmptyResultSet:
+            return []
+        rows = await self._aexecute(sql, params)
+        return [tuple(row) for row in compiler.results_iter(results=[rows])]
+
+    async def ainstances(self, queryset: QuerySet[M]) -> list[M]:
+        """
+        Returns the model instances of a queryset, with their concrete fields only.
+        """
+        if self._is_in_memory():
+            return await super().ainstances(queryset)
+
+        model = queryset.model
+        names = [field.attname for field in model._meta.fields]
+        rows = await self.afetch(queryset.values_list(*names))
+        return [model.from_db(self.alias, names, row) for row in rows]
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.close()
+
+    async def _aexecute(self, sql: str, params: Sequence[Any]) -> list[Sequence[Any]]:
+        async with self._get_semaphore():
+            connection = self._idle.pop() if self._idle else await self._aconnect()
+            done = False
+            started = time.perf_counter()
+            try:
+                with TRACER.span("db.query", sql=sql, database=self.alias):
+                    async with connection.execute(
+                        FORMAT_QMARK_REGEX.sub("?", sql).replace("%%", "%"), params
+                    ) as cursor:
+                        rows = await cursor.fetchall()
+                done = True
+            finally:
+                seconds = time.perf_counter() - started
+                for observer in self.observers:
+                    observer(seconds)
+                # A failed or cancelled query may leave its cursor open, so the
+                # connection isn't reused
+                if done:
+                    self._idle.append(connection)
+                else:
+                    await connection.close()
+        return [tuple(row) for row in rows]
+
+    def _is_in_memory(self) -> bool:
+        connection = connections[self.alias]
+        return isinstance(connection, DatabaseWrapper) and connection.is_in_memory_db()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore belongs to the event loop it was first used in
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.size)
+            self._loop = loop
+        return self._semaphore
+
+    async def _aconnect(self) -> aiosqlite.Connection:
+        # The same parameters as Django's connections, so the rows are converted alike
+        params = connections[self.alias].get_connection_params()
+        connection = await aiosqlite.connect(**params)
+        for pragma in SQLITE_PRAGMAS + SQLITE_READ_PRAGMAS:
+            await connection.execute(pragma)
+        return connection
+
+
+def create_read_pool(alias: str = READ_DATABASE, size: int = 0) -> ReadPool:
+    """
+    Returns a pool of `size` async connections if the database has an async driver,
+    otherwise (or if `size` is 0) the reads run with the ORM.
+    """
+    if size > 0 and connections[alias].vendor == "sqlite":
+        return SQLiteReadPool(alias, size)
+    return ReadPool()
+
+
+READ_POOL: Final[ReadPool] = create_read_pool(size=DB_READ_POOL_SIZE)
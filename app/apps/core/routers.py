@@ -0,0 +1,67 @@
+from contextvars import ContextVar
+from typing import Any, Final, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from .models import Course, Link, Phone, Place, PrerequisiteCourse, Text
+
+# An alias of the same database (or a replica), used for the bot's reads only
+READ_DATABASE: Final[str] = "read"
+
+# Set by the bot's startup, so the tasks it starts route their reads to `READ_DATABASE`,
+# while the admin panel (even when it shares the process with a webhook) never does
+BOT_READS: ContextVar[bool] = ContextVar("BOT_READS", default=False)
+
+# Read on every bot update, written by the admin panel only
+READ_MODELS: Final[frozenset[type[models.Model]]] = frozenset(
+    {Text, Course, PrerequisiteCourse, Place, Phone, Link}
+)
+
+# With WAL, readers never wait for a writer (and the writer never waits for readers)
+SQLITE_PRAGMAS: Final[tuple[str, ...]] = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA busy_timeout = 5000",
+)
+SQLITE_READ_PRAGMAS: Final[tuple[str, ...]] = (
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA query_only = ON",
+)
+
+
+class ReadWriteRouter:
+    # The bot's reads go to the `read` connection, so they never queue behind the
+    # admin panel's writes on the primary one. Reads inside a transaction of the primary
+    # stay on it, to see the transaction's own writes.
+
+    def db_for_read(self, model: type[models.Model], **hints: Any) -> Optional[str]:
+        if (
+            BOT_READS.get()
+            and model in READ_MODELS
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return READ_DATABASE
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model: type[models.Model], **hints: Any) -> Optional[str]:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(
+        self, obj1: models.Model, obj2: models.Model, **hints: Any
+    ) -> bool:
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any
+    ) -> bool:
+        return db == DEFAULT_DB_ALIAS
+
+
+def configure_connection(connection: BaseDatabaseWrapper) -> None:
+    if connection.vendor != "sqlite":
+        return
+    pragmas = SQLITE_PRAGMAS
+    if connection.alias == READ_DATABASE:
+        pragmas += SQLITE_READ_PRAGMAS
+    for pragma in pragmas:
+        connection.connection.execute(pragma)
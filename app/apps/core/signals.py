@@ -0,0 +1,81 @@
+from typing import Any
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .bot.buttons import BUTTONS
+from .bot.keyboards import MARKUPS
+from .changes import TRACKED_MODELS, bump_version
+from .models import Course, Place, PrerequisiteCourse, Text
+from .routers import configure_connection
+from .tracing import trace_queries
+from .use_case import COURSE_USE_CASE, PLACE_USE_CASE, TEXT_USE_CASE
+
+
+@receiver(connection_created)
+def connection_opened(connection: BaseDatabaseWrapper, **_: Any) -> None:
+    configure_connection(connection)
+    if trace_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_queries)
+
+
+@receiver(post_save, sender=Text)
+def text_saved(instance: Text, **_: Any) -> None:
+    TEXT_USE_CASE.update(instance)
+    if instance.is_button:
+        BUTTONS.update(instance)
+
+
+@receiver(post_delete, sender=Text)
+def text_deleted(instance: Text, **_: Any) -> None:
+    TEXT_USE_CASE.discard(instance)
+    if instance.is_button:
+        BUTTONS.discard(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+@receiver(post_save, sender=Text)
+@receiver(post_delete, sender=Text)
+def keyboard_content_changed(**_: Any) -> None:
+    MARKUPS.clear()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=PrerequisiteCourse)
+@receiver(post_delete, sender=PrerequisiteCourse)
+def catalog_changed(**_: Any) -> None:
+    COURSE_USE_CASE.invalidate()
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def place_changed(**_: Any) -> None:
+    PLACE_USE_CASE.invalidate()
+
+
+def model_changed(sender: type[Model], **_: Any) -> None:
+    bump_version(sender)
+
+
+def prerequisite_courses_changed(action: str, **_: Any) -> None:
+    # `Course.prerequisite_courses.set()` writes through `bulk_create()` without signals
+    if action in ("post_add", "post_remove", "post_clear"):
+        COURSE_USE_CASE.invalidate()
+        bump_version(PrerequisiteCourse)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(model_changed, sender=model)
+    post_delete.connect(model_changed, sender=model)
+
+m2m_changed.connect(
+    prerequisite_courses_changed,
+    sender=Course.prerequisite_courses.through,
+)
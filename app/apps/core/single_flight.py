@@ -0,0 +1,66 @@
+import asyncio
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlightInfo(NamedTuple):
+    calls: int
+    collapsed: int
+    in_flight: int
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight task instead of each running
+    # the same query, e.g. when a whole class opens the same menu at once. With a `ttl`,
+    # the result is also reused for that many seconds after the task is done.
+    # Failures are never reused, and cancelling a caller doesn't cancel the shared task.
+
+    def __init__(self, ttl: float = 0.0) -> None:
+        self.ttl = ttl
+        self.calls = 0
+        self.collapsed = 0
+        self._tasks: dict[Hashable, asyncio.Future[Any]] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        result = self._results.get(key)
+        if result is not None and result[0] > time.monotonic():
+            self.collapsed += 1
+            return result[1]  # type: ignore[no-any-return]
+
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._tasks[key] = asyncio.ensure_future(function())
+            task.add_done_callback(partial(self._done, key))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """
+        Makes the next call of `key` (or of every key) run again, e.g. after a write.
+        """
+        if key is None:
+            self._tasks = {}
+            self._results = {}
+        else:
+            self._tasks.pop(key, None)
+            self._results.pop(key, None)
+
+    def info(self) -> SingleFlightInfo:
+        return SingleFlightInfo(
+            calls=self.calls, collapsed=self.collapsed, in_flight=len(self._tasks)
+        )
+
+    def _done(self, key: Hashable, task: asyncio.Future[Any]) -> None:
+        failed = task.cancelled() or task.exception() is not None
+        if self._tasks.get(key) is not task:
+            # Forgotten while running, so the result may be stale
+            return
+        del self._tasks[key]
+        if not failed and self.ttl > 0:
+            self._results[key] = (time.monotonic() + self.ttl, task.result())
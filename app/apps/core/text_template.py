@@ -0,0 +1,105 @@
+import logging
+import re
+from typing import Any, Final, Mapping
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN: Final[re.Pattern[str]] = re.compile(r"\{(\w+)\}")
+
+# Placeholders each `Text` is rendered with. Texts that are not listed take no arguments.
+TEXT_PLACEHOLDERS: Final[Mapping[str, frozenset[str]]] = {
+    "START_NEW_USER": frozenset({"full_name", "bot_name"}),
+    "START_EXISTED_USER": frozenset({"full_name", "bot_name"}),
+    "SEMESTER_COURSES_MENU": frozenset({"offering_semester"}),
+    "TYPE_COURSES_MENU": frozenset({"course_type"}),
+    "COURSE_DETAILS": frozenset(
+        {
+            "fa_title",
+            "en_title",
+            "offering_semester",
+            "credit",
+            "quiz_credit",
+            "prerequisite_courses",
+            "unlocked_courses",
+            "unit_type",
+            "course_type",
+            "has_exam",
+            "has_project",
+        }
+    ),
+    "GROUP_PLACES": frozenset({"group"}),
+    "PLACE": frozenset({"name", "group"}),
+    "NEAREST_LOCATION_REQUEST": frozenset({"group"}),
+    "NEAREST_PLACES": frozenset({"places"}),
+    "NEAREST_PLACE_TEMPLATE": frozenset({"name", "group", "distance"}),
+    "PHONES": frozenset({"phones"}),
+    "PHONE_TEMPLATE": frozenset({"name", "phone_number"}),
+    "LINKS": frozenset({"links"}),
+    "LINK_TEMPLATE": frozenset({"name", "address"}),
+}
+
+
+class TextTemplate:
+    """
+    A `Text` compiled once into literal runs and placeholder slots.
+
+    Rendering copies the literal runs, fills the slots and joins everything in one pass,
+    instead of rescanning the whole text once per argument.
+    """
+
+    __slots__ = ("source", "placeholders", "_parts", "_slots")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+        parts: list[str] = []
+        slots: list[tuple[int, str]] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                parts.append(source[position : match.start()])
+            slots.append((len(parts), match.group(1)))
+            # Keep the placeholder itself, so a slot without an argument renders as-is
+            parts.append(match.group(0))
+            position = match.end()
+        if position < len(source):
+            parts.append(source[position:])
+
+        self.placeholders = frozenset(name for _, name in slots)
+        self._parts = tuple(parts)
+        self._slots = tuple(slots)
+
+    def render(self, **kwargs: Any) -> str:
+        if not self._slots:
+            return self.source
+
+        parts = list(self._parts)
+        for index, name in self._slots:
+            if name in kwargs:
+                parts[index] = str(kwargs[name])
+        return "".join(parts)
+
+    def check(self, expected: frozenset[str]) -> tuple[frozenset[str], frozenset[str]]:
+        """
+        Returns a tuple of (missing, unknown) placeholders compared to the `expected` ones.
+        """
+        return expected - self.placeholders, self.placeholders - expected
+
+    def __repr__(self) -> str:
+        return f"TextTemplate({self.source!r})"
+
+
+def compile_text(name: str, source: str) -> TextTemplate:
+    template = TextTemplate(source)
+
+    missing, unknown = template.check(TEXT_PLACEHOLDERS.get(name, frozenset()))
+    if missing:
+        logger.warning(
+            "Text %s is missing placeholders: %s", name, ", ".join(sorted(missing))
+        )
+    if unknown:
+        logger.warning(
+            "Text %s has unknown placeholders: %s", name, ", ".join(sorted(unknown))
+        )
+
+    return template
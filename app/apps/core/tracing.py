@@ -0,0 +1,288 @@
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Final, Iterator, Optional, ParamSpec, TypeVar
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    # Unix time, in seconds
+    start: float
+    duration: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: list[Span] = field(default_factory=list)
+    # Spans over the limit of a trace are counted only
+    dropped: int = 0
+
+
+# The trace being recorded and its innermost open span, copied into `sync_to_async` threads
+_TRACE: ContextVar[Optional[Trace]] = ContextVar("_TRACE", default=None)
+_SPAN: ContextVar[Optional[Span]] = ContextVar("_SPAN", default=None)
+
+
+class TraceExporter:
+    # Finished traces are written by a thread, so the event loop never waits for them.
+    # When `max_pending` traces are waiting, the new ones are dropped.
+
+    def __init__(self, max_pending: int = 1000) -> None:
+        self.dropped = 0
+        self._queue: queue.Queue[Optional[Trace]] = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, trace: Trace) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="trace-exporter", daemon=True
+            )
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """
+        Writes the waiting traces and stops the thread.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def write(self, trace: Trace) -> None:
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        while (trace := self._queue.get()) is not None:
+            try:
+                self.write(trace)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to export trace %s", trace.trace_id)
+
+
+class JsonLinesExporter(TraceExporter):
+    # A line per trace, with all its spans
+
+    def __init__(self, path: Path, max_pending: int = 1000) -> None:
+        super().__init__(max_pending)
+        self.path = path
+
+    def write(self, trace: Trace) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write(json.dumps(asdict(trace), default=str) + "\n")
+
+
+class OtlpExporter(TraceExporter):
+    # Posts the traces to an OpenTelemetry collector in the OTLP/HTTP JSON encoding,
+    # e.g. to `http://localhost:4318/v1/traces`
+
+    def __init__(
+        self,
+        url: str,
+        service: str = "bot",
+        timeout: float = 5.0,
+        max_pending: int = 1000,
+    ) -> None:
+        super().__init__(max_pending)
+        self.url = url
+        self.service = service
+        self.timeout = timeout
+
+    def write(self, trace: Trace) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.encode(trace)).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def encode(self, trace: Trace) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(service_name=self.service)
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [_otlp_span(span) for span in trace.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    start = int(span.start * 1e9)
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        # Internal
+        "kind": 1,
+        "startTimeUnixNano": str(start),
+        "endTimeUnixNano": str(start + int(span.duration * 1e9)),
+        "attributes": _otlp_attributes(**span.attributes),
+    }
+    if span.parent_id is not None:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+def _otlp_attributes(**attributes: Any) -> list[dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        typed: dict[str, Any]
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key.replace("_", "."), "value": typed})
+    return encoded
+
+
+class Tracer:
+    # A trace is started per update, for a `sample_rate` fraction of them, and each
+    # `span()` opened while handling it becomes a child of the innermost open one.
+    # Outside of a sampled trace a span costs a context variable lookup, and a trace
+    # keeps at most `max_spans` spans. Disabled until `configure()`d with an exporter.
+
+    def __init__(self) -> None:
+        self.sample_rate = 0.0
+        self.max_spans = 256
+        self.exporter: Optional[TraceExporter] = None
+        self._random = random.Random()
+
+    def configure(
+        self, sample_rate: float, exporter: TraceExporter, max_spans: int = 256
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.max_spans = max_spans
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Opens the root span of a new trace, if sampled, and exports the trace once closed.
+        """
+        exporter = self.exporter
+        if exporter is None or self._random.random() >= self.sample_rate:
+            yield None
+            return
+
+        trace = Trace(trace_id=secrets.token_hex(16))
+        trace_token = _TRACE.set(trace)
+        span_token = _SPAN.set(None)
+        try:
+            with self.span(name, **attributes) as span:
+                yield span
+        finally:
+            _SPAN.reset(span_token)
+            _TRACE.reset(trace_token)
+            exporter.export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        trace = _TRACE.get()
+        if trace is None:
+            yield None
+            return
+        if len(trace.spans) >= self.max_spans:
+            trace.dropped += 1
+            yield None
+            return
+
+        parent = _SPAN.get()
+        span = Span(
+            name=name,
+            trace_id=trace.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent is not None else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+        trace.spans.append(span)
+        token = _SPAN.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as error:
+            span.attributes["error"] = type(error).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _SPAN.reset(token)
+
+    def traced(
+        self, name: str
+    ) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+        """
+        Wraps every call of a coroutine function in a span.
+        """
+
+        def decorate(function: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+            @wraps(function)
+            async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+                if _TRACE.get() is None:
+                    return await function(*args, **kwargs)
+                with self.span(name):
+                    return await function(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+
+def trace_queries(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """
+    A Django `execute_wrapper` opening a span per query made in a trace.
+    """
+    if _TRACE.get() is None:
+        return execute(sql, params, many, context)
+    with TRACER.span("db.query", sql=sql, database=context["connection"].alias):
+        return execute(sql, params, many, context)
+
+
+TRACER: Final[Tracer] = Tracer()
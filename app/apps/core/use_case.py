@@ -1,6 +1,32 @@
-from typing import Any, Final, Optional
+import asyncio
+import logging
+import os
+import secrets
+import socket
+from datetime import timedelta
+from typing import Any, Final, Iterable, NamedTuple, Optional
 
-from .models import Text, TGUser
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from .catalog import CourseCatalog
+from .changes import CHANGE_WATCHER, bump_version
+from .geo import PlaceIndex
+from .models import (
+    Broadcast,
+    BroadcastDelivery,
+    Course,
+    Place,
+    PrerequisiteCourse,
+    Text,
+    TGUser,
+)
+from .read_pool import READ_POOL
+from .single_flight import SingleFlight
+from .text_template import TextTemplate, compile_text
+from .tracing import TRACER
 
 # The `UseCase` classes are used to separate the business logic from the rest of the code.
 # Also, because of this, we can easily use the same business logic in different places.
@@ -9,47 +35,511 @@ from .models import Text, TGUser
 # The main reason to use classes instead of functions is that
 # the `UseCase` classes may depend on different services.
 
+logger = logging.getLogger(__name__)
+
+
+# Username, full name and whether the user is active
+Profile = tuple[Optional[str], str, bool]
+
 
 class CoreUseCase:
-    @staticmethod
+    # Users are registered write-behind: `/start` answers `is_new` from the in-memory
+    # profiles of known users and only queues changed profiles, which are written
+    # periodically with one `bulk_create(update_conflicts=True)`.
+    # The bot is the only process registering users, so the profiles loaded at startup
+    # stay complete, and only `is_active` is changed elsewhere: broadcasts deactivate
+    # users, and their next `/start` activates them again.
+
+    def __init__(self, flush_size: int = 500) -> None:
+        self.flush_size = flush_size
+        self._profiles: dict[int, Profile] = {}
+        self._pending: dict[int, Profile] = {}
+        self._inactive: set[int] = set()
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def aload_users(self) -> None:
+        profiles: dict[int, Profile] = {
+            user_id: (username, full_name, is_active)
+            async for user_id, username, full_name, is_active in TGUser.objects.values_list(
+                "id", "username", "full_name", "is_active"
+            )
+        }
+        self._inactive = {
+            user_id for user_id, (_, _, is_active) in profiles.items() if not is_active
+        }
+        # The queued profiles are not saved yet, and newer than the saved ones
+        self._profiles = {**profiles, **self._pending}
+
+    async def arefresh_active(self) -> None:
+        """
+        Applies `is_active` changed by broadcasts to the profiles of those users only.
+        """
+        inactive = {
+            user_id
+            async for user_id in TGUser.objects.filter(is_active=False).values_list(
+                "id", flat=True
+            )
+        }
+        for user_id in inactive.symmetric_difference(self._inactive):
+            profile = self._profiles.get(user_id)
+            if profile is not None and user_id not in self._pending:
+                username, full_name, _ = profile
+                self._profiles[user_id] = (username, full_name, user_id not in inactive)
+        self._inactive = inactive
+
+    @TRACER.traced("CoreUseCase.register_bot_user")
     async def register_bot_user(
+        self,
         user_id: int,
         username: Optional[str],
         full_name: str,
-    ) -> tuple[TGUser, bool]:
-        return await TGUser.objects.aupdate_or_create(
-            id=user_id,
-            defaults={
-                "username": username,
-                "full_name": full_name,
-            },
+    ) -> bool:
+        """
+        Queues the user's profile to be saved and returns whether the user is new.
+        """
+        profile = (username, full_name, True)
+        is_new = user_id not in self._profiles
+        if self._profiles.get(user_id) != profile:
+            self._profiles[user_id] = profile
+            self._pending[user_id] = profile
+            if len(self._pending) >= self.flush_size and self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_logged())
+
+        return is_new
+
+    @TRACER.traced("CoreUseCase.flush")
+    async def flush(self) -> int:
+        """
+        Writes all queued profiles with a single query and returns their count.
+        """
+        pending, self._pending = self._pending, {}
+        try:
+            if pending:
+                await TGUser.objects.abulk_create(
+                    [
+                        TGUser(
+                            id=user_id,
+                            username=username,
+                            full_name=full_name,
+                            is_active=is_active,
+                        )
+                        for user_id, (username, full_name, is_active) in pending.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=["username", "full_name", "is_active"],
+                )
+        except Exception:
+            # Profiles queued in the meantime are newer, so they are kept
+            self._pending = {**pending, **self._pending}
+            raise
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+        return len(pending)
+
+    async def start(self, interval: float) -> None:
+        await self.aload_users()
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self._flush_logged()
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to save registered users")
+
+
+class BroadcastTakenOver(RuntimeError):
+    """
+    Raised when another process took over a broadcast this one was sending.
+    """
+
+
+class BroadcastUseCase:
+    # A broadcast is created with a `BroadcastDelivery` row per recipient, then sent in
+    # chunks of pending deliveries read by keyset (`user_id > last one`), so neither
+    # step loads the whole users table. Deliveries are marked `SENDING` before a chunk
+    # is sent, so a resumed broadcast never messages anyone twice.
+    # A running broadcast is owned by the process that claimed it, and its heartbeat is
+    # refreshed after every chunk. Another process takes it over only once the heartbeat
+    # is older than `heartbeat_timeout` seconds, e.g. after a crash.
+
+    def __init__(self, chunk_size: int = 500, heartbeat_timeout: float = 300.0) -> None:
+        self.chunk_size = chunk_size
+        self.heartbeat_timeout = heartbeat_timeout
+
+    def create(
+        self, broadcast: Broadcast, users: Optional[QuerySet[TGUser]] = None
+    ) -> Broadcast:
+        """
+        Saves the broadcast for the active `users` (all of them by default).
+        """
+        users = (TGUser.objects.all() if users is None else users).filter(is_active=True)
+        # Other processes start pending broadcasts, so they must see all the deliveries
+        with transaction.atomic():
+            broadcast.status = Broadcast.Status.PENDING
+            broadcast.save()
+            last_user_id = None
+            while True:
+                chunk = users.order_by("id")
+                if last_user_id is not None:
+                    chunk = chunk.filter(id__gt=last_user_id)
+                user_ids = list(chunk.values_list("id", flat=True)[: self.chunk_size])
+                if not user_ids:
+                    break
+                BroadcastDelivery.objects.bulk_create(
+                    BroadcastDelivery(broadcast=broadcast, user_id=user_id)
+                    for user_id in user_ids
+                )
+                broadcast.recipients += len(user_ids)
+                last_user_id = user_ids[-1]
+            Broadcast.objects.filter(id=broadcast.id).update(
+                recipients=broadcast.recipients
+            )
+        return broadcast
+
+    async def aclaim(self, broadcast_id: Optional[int] = None) -> Optional[Broadcast]:
+        """
+        Marks a pending broadcast (the oldest by default), or a running one whose owner
+        stopped, as running by this process and returns it, unless another process
+        claimed it first.
+        """
+        now = timezone.now()
+        stale = Q(heartbeat_at__lt=now - timedelta(seconds=self.heartbeat_timeout)) | Q(
+            heartbeat_at=None
         )
+        broadcasts = Broadcast.objects.filter(
+            Q(status=Broadcast.Status.PENDING) | Q(stale, status=Broadcast.Status.RUNNING)
+        )
+        if broadcast_id is not None:
+            broadcasts = broadcasts.filter(id=broadcast_id)
+        broadcast = await broadcasts.order_by("id").afirst()
+        if broadcast is None:
+            return None
 
+        owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{secrets.token_hex(4)}"
+        # Only claimed if nobody claimed it since it was read
+        claimed = await Broadcast.objects.filter(
+            id=broadcast.id,
+            status=broadcast.status,
+            owner=broadcast.owner,
+            heartbeat_at=broadcast.heartbeat_at,
+        ).aupdate(status=Broadcast.Status.RUNNING, owner=owner, heartbeat_at=now)
+        if not claimed:
+            return None
+        broadcast.status = Broadcast.Status.RUNNING
+        broadcast.owner = owner
+        broadcast.heartbeat_at = now
+        return broadcast
+
+    async def arelease(self, broadcast: Broadcast) -> None:
+        """
+        Returns an interrupted broadcast to the pending ones.
+        """
+        await self._owned(broadcast).aupdate(
+            status=Broadcast.Status.PENDING, owner="", heartbeat_at=None
+        )
+        await self._abump_users(broadcast)
+
+    async def anext_chunk(self, broadcast: Broadcast, after: int) -> list[int]:
+        """
+        Returns the next pending recipients after the user `after` and marks them as being sent.
+        Raises `BroadcastTakenOver` if another process marked any of them first.
+        """
+        user_ids = [
+            user_id
+            async for user_id in BroadcastDelivery.objects.filter(
+                broadcast=broadcast,
+                status=BroadcastDelivery.Status.PENDING,
+                user_id__gt=after,
+            )
+            .order_by("user_id")
+            .values_list("user_id", flat=True)[: self.chunk_size]
+        ]
+        if user_ids:
+            claimed = await BroadcastDelivery.objects.filter(
+                broadcast=broadcast,
+                user_id__in=user_ids,
+                status=BroadcastDelivery.Status.PENDING,
+            ).aupdate(status=BroadcastDelivery.Status.SENDING)
+            if claimed != len(user_ids):
+                raise BroadcastTakenOver(f"{broadcast} is sent by another process")
+        return user_ids
+
+    async def arecord(
+        self,
+        broadcast: Broadcast,
+        results: dict[BroadcastDelivery.Status, list[int]],
+    ) -> None:
+        """
+        Saves the results of a chunk and deactivates the users who can't be messaged.
+        Raises `BroadcastTakenOver` if another process owns the broadcast now.
+        """
+        for status, user_ids in results.items():
+            if user_ids:
+                await BroadcastDelivery.objects.filter(
+                    broadcast=broadcast, user_id__in=user_ids
+                ).aupdate(status=status)
+
+        sent = len(results.get(BroadcastDelivery.Status.SENT, []))
+        blocked = results.get(BroadcastDelivery.Status.BLOCKED, [])
+        failed = len(results.get(BroadcastDelivery.Status.FAILED, []))
+        if blocked:
+            await TGUser.objects.filter(id__in=blocked).aupdate(is_active=False)
+
+        broadcast.heartbeat_at = timezone.now()
+        owned = await self._owned(broadcast).aupdate(
+            sent=F("sent") + sent,
+            blocked=F("blocked") + len(blocked),
+            failed=F("failed") + failed,
+            heartbeat_at=broadcast.heartbeat_at,
+        )
+        if not owned:
+            raise BroadcastTakenOver(f"{broadcast} was taken over by another process")
+        broadcast.sent += sent
+        broadcast.blocked += len(blocked)
+        broadcast.failed += failed
+
+    async def afinish(self, broadcast: Broadcast) -> None:
+        broadcast.status = Broadcast.Status.DONE
+        broadcast.finished_at = timezone.now()
+        await self._owned(broadcast).aupdate(
+            status=broadcast.status, finished_at=broadcast.finished_at
+        )
+        await self._abump_users(broadcast)
 
-class TextUseCase:
     @staticmethod
-    def get_text(_name: str, is_button: bool = False, **kwargs: Any) -> str:
-        if Text.objects.filter(name=_name, is_button=is_button).exists():
-            text = Text.objects.get(name=_name, is_button=is_button).text
-            if text:
-                for old, new in kwargs.items():
-                    text = text.replace("{" + str(old) + "}", str(new))
-                return text
-        return ""
+    def _owned(broadcast: Broadcast) -> QuerySet[Broadcast]:
+        return Broadcast.objects.filter(
+            id=broadcast.id, status=Broadcast.Status.RUNNING, owner=broadcast.owner
+        )
 
     @staticmethod
-    async def aget_text(_name: str, is_button: bool = False, **kwargs: Any) -> str:
-        if await Text.objects.filter(name=_name, is_button=is_button).aexists():
-            text = (await Text.objects.aget(name=_name, is_button=is_button)).text
-            if text:
-                for old, new in kwargs.items():
-                    text = text.replace("{" + str(old) + "}", str(new))
-                return text
-        return ""
+    async def _abump_users(broadcast: Broadcast) -> None:
+        # Once per run rather than per chunk, each bump makes the bot refresh its users
+        if broadcast.blocked:
+            await sync_to_async(bump_version)(TGUser)
+
+
+EMPTY_TEMPLATE: Final[TextTemplate] = TextTemplate("")
+
+
+class CourseUseCase:
+    # Courses are a small, read-mostly table, so the bot serves them from an in-memory
+    # `CourseCatalog`. It is loaded with two queries on first use and replaced as a whole
+    # when courses or their prerequisites change. Requests arriving while it is being
+    # (re)built wait for the same build.
+
+    def __init__(self) -> None:
+        self._catalog: Optional[CourseCatalog] = None
+        self._version = 0
+        self.builds = SingleFlight()
+
+    @TRACER.traced("CourseUseCase.aget_catalog")
+    async def aget_catalog(self) -> CourseCatalog:
+        catalog = self._catalog
+        if catalog is None:
+            version = self._version
+            catalog = await self.builds.do("catalog", self._abuild_catalog)
+            # Courses changed during the build, so the next request builds it again
+            if version == self._version:
+                self._catalog = catalog
+        return catalog
+
+    async def aload(self) -> None:
+        self._catalog = await self._abuild_catalog()
+
+    def invalidate(self) -> None:
+        self._catalog = None
+        self._version += 1
+        self.builds.forget()
+
+    @staticmethod
+    async def _abuild_catalog() -> CourseCatalog:
+        return CourseCatalog.build(
+            courses=await READ_POOL.ainstances(Course.objects.order_by("id")),
+            prerequisites=await READ_POOL.afetch(
+                PrerequisiteCourse.objects.values_list(
+                    "course_id", "prerequisite_course_id"
+                )
+            ),
+        )
+
+
+class PlaceUseCase:
+    # Places are served from an in-memory `PlaceIndex`, so listing a group or looking up
+    # the nearest places never scans the table or computes distances in SQL.
+
+    def __init__(self) -> None:
+        self._index: Optional[PlaceIndex] = None
+        self._version = 0
+        self.builds = SingleFlight()
+
+    @TRACER.traced("PlaceUseCase.aget_index")
+    async def aget_index(self) -> PlaceIndex:
+        index = self._index
+        if index is None:
+            version = self._version
+            index = await self.builds.do("index", self._abuild_index)
+            if version == self._version:
+                self._index = index
+        return index
+
+    async def aload(self) -> None:
+        self._index = await self._abuild_index()
+
+    def invalidate(self) -> None:
+        self._index = None
+        self._version += 1
+        self.builds.forget()
+
+    @staticmethod
+    async def _abuild_index() -> PlaceIndex:
+        return PlaceIndex.build(await READ_POOL.ainstances(Place.objects.order_by("id")))
+
+
+class TextCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+class TextUseCase:
+    # All `Text` rows are kept in memory as compiled templates, keyed by `(name, is_button)`.
+    # The cache is warmed once on startup and kept fresh by the signals in `signals.py`
+    # (or by `CHANGE_WATCHER` when texts are edited from another process),
+    # so a lookup is a dictionary hit instead of two database queries.
+
+    def __init__(self) -> None:
+        self._texts: dict[tuple[str, bool], TextTemplate] = {}
+        self._is_loaded = False
+        self.hits = 0
+        self.misses = 0
+        # Identical lookups of texts that aren't cached yet share one query
+        self.queries = SingleFlight()
+
+    def load(self) -> None:
+        self._set_texts(Text.objects.all())
+
+    async def aload(self) -> None:
+        self._set_texts(await READ_POOL.ainstances(Text.objects.all()))
+
+    def update(self, text: Text) -> None:
+        self._texts[(text.name, text.is_button)] = compile_text(text.name, text.text)
+
+    def discard(self, text: Text) -> None:
+        self._texts.pop((text.name, text.is_button), None)
+
+    def clear(self) -> None:
+        self._texts = {}
+        self._is_loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.queries.forget()
+
+    def cache_info(self) -> TextCacheInfo:
+        return TextCacheInfo(hits=self.hits, misses=self.misses, size=len(self._texts))
+
+    def get_text(self, _name: str, is_button: bool = False, **kwargs: Any) -> str:
+        return self.get_texts(_name, is_button=is_button)[_name].render(**kwargs)
+
+    @TRACER.traced("TextUseCase.aget_text")
+    async def aget_text(self, _name: str, is_button: bool = False, **kwargs: Any) -> str:
+        return (await self.aget_texts(_name, is_button=is_button))[_name].render(**kwargs)
+
+    def get_texts(self, *names: str, is_button: bool = False) -> dict[str, TextTemplate]:
+        missing = self._count_misses(names, is_button)
+        if missing:
+            self._store(
+                missing,
+                is_button,
+                dict(
+                    Text.objects.filter(
+                        name__in=missing, is_button=is_button
+                    ).values_list("name", "text")
+                ),
+            )
+        return self._templates(names, is_button)
+
+    @TRACER.traced("TextUseCase.aget_texts")
+    async def aget_texts(
+        self, *names: str, is_button: bool = False
+    ) -> dict[str, TextTemplate]:
+        # All the missing texts are fetched in a single `IN` query
+        missing = self._count_misses(names, is_button)
+        if missing:
+
+            async def fetch() -> dict[str, str]:
+                return dict(
+                    await READ_POOL.afetch(
+                        Text.objects.filter(
+                            name__in=missing, is_button=is_button
+                        ).values_list("name", "text")
+                    )
+                )
+
+            texts = await self.queries.do((tuple(missing), is_button), fetch)
+            self._store(missing, is_button, texts)
+        return self._templates(names, is_button)
+
+    def _count_misses(self, names: tuple[str, ...], is_button: bool) -> list[str]:
+        missing = [name for name in names if (name, is_button) not in self._texts]
+        self.hits += len(names) - len(missing)
+        self.misses += len(missing)
+        # A loaded cache holds every text, the missing ones don't exist
+        return [] if self._is_loaded else missing
+
+    def _store(self, names: list[str], is_button: bool, texts: dict[str, str]) -> None:
+        for name in names:
+            self._texts[(name, is_button)] = compile_text(name, texts.get(name, ""))
+
+    def _templates(
+        self, names: tuple[str, ...], is_button: bool
+    ) -> dict[str, TextTemplate]:
+        return {
+            name: self._texts.get((name, is_button), EMPTY_TEMPLATE) for name in names
+        }
+
+    def _set_texts(self, texts: Iterable[Text]) -> None:
+        # Swap the whole dictionary at once, so readers never see a half-loaded cache
+        self._texts = {
+            (text.name, text.is_button): compile_text(text.name, text.text)
+            for text in texts
+        }
+        self._is_loaded = True
 
 
 # Alternative: use a DI middleware to inject the use case into the handler.
 # To provide DI middleware, you need to use a third-party library.
 # For example, https://github.com/MaximZayats/aiogram-di
 CORE_USE_CASE: Final[CoreUseCase] = CoreUseCase()
+BROADCAST_USE_CASE: Final[BroadcastUseCase] = BroadcastUseCase()
+COURSE_USE_CASE: Final[CourseUseCase] = CourseUseCase()
+PLACE_USE_CASE: Final[PlaceUseCase] = PlaceUseCase()
 TEXT_USE_CASE: Final[TextUseCase] = TextUseCase()
+
+# Broadcasts deactivate users from other processes
+CHANGE_WATCHER.subscribe(TGUser, CORE_USE_CASE.arefresh_active)
+CHANGE_WATCHER.subscribe(Text, TEXT_USE_CASE.aload)
+CHANGE_WATCHER.subscribe(Course, COURSE_USE_CASE.aload)
+CHANGE_WATCHER.subscribe(PrerequisiteCourse, COURSE_USE_CASE.aload)
+CHANGE_WATCHER.subscribe(Place, PLACE_USE_CASE.aload)
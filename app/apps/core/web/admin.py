@@ -2,11 +2,24 @@ from typing import Any, Optional
 
 from django import forms
 from django.contrib import admin
-from django.contrib.admin import ModelAdmin, widgets
+from django.contrib.admin import ModelAdmin, helpers, widgets
+from django.db.models import QuerySet
 from django.http import HttpRequest
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
 
-from ..models import Course, Link, Phone, Place, Text, TGUser
+from ..graph import find_path
+from ..models import (
+    Broadcast,
+    Course,
+    Link,
+    Phone,
+    Place,
+    PrerequisiteCourse,
+    Text,
+    TGUser,
+)
+from ..use_case import BROADCAST_USE_CASE
 
 
 @admin.register(Text)
@@ -41,12 +54,49 @@ class TextAdmin(ModelAdmin[Text]):
 
 @admin.register(TGUser)
 class TGUserAdmin(ModelAdmin[TGUser]):
+    class BroadcastForm(forms.Form):
+        text = forms.CharField(widget=forms.Textarea)
+
     list_display = (
         "id",
         "full_name",
         "username",
+        "is_active",
     )
 
+    list_filter = ("is_active",)
+
+    actions = ("broadcast",)
+
+    @admin.action(description="Broadcast a message to selected users")
+    def broadcast(
+        self, request: HttpRequest, queryset: QuerySet[TGUser]
+    ) -> Optional[TemplateResponse]:
+        form = self.BroadcastForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            broadcast = BROADCAST_USE_CASE.create(
+                Broadcast(text=form.cleaned_data["text"]), queryset
+            )
+            self.message_user(
+                request,
+                f"{broadcast} will be sent to {broadcast.recipients} active users by the bot.",
+            )
+            return None
+
+        return TemplateResponse(
+            request,
+            "admin/core/tguser/broadcast.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Broadcast a message",
+                "opts": self.model._meta,
+                "form": form,
+                "queryset": queryset,
+                "select_across": request.POST.get("select_across") == "1",
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            },
+        )
+
     def has_add_permission(self, request: HttpRequest) -> bool:
         super().has_add_permission(request)
         return False
@@ -64,6 +114,49 @@ class TGUserAdmin(ModelAdmin[TGUser]):
         return False
 
 
+@admin.register(Broadcast)
+class BroadcastAdmin(ModelAdmin[Broadcast]):
+    list_display = (
+        "__str__",
+        "status",
+        "created_at",
+        "recipients",
+        "sent",
+        "blocked",
+        "failed",
+    )
+
+    readonly_fields = (
+        "status",
+        "created_at",
+        "finished_at",
+        "recipients",
+        "sent",
+        "blocked",
+        "failed",
+        "owner",
+        "heartbeat_at",
+    )
+
+    def save_model(
+        self, request: HttpRequest, obj: Broadcast, form: Any, change: bool
+    ) -> None:
+        # Added broadcasts go to every active user
+        BROADCAST_USE_CASE.create(obj)
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: Optional[Broadcast] = None
+    ) -> bool:
+        super().has_change_permission(request, obj)
+        return False
+
+    def has_delete_permission(
+        self, request: HttpRequest, obj: Optional[Broadcast] = None
+    ) -> bool:
+        super().has_delete_permission(request, obj)
+        return False
+
+
 @admin.register(Course)
 class CourseAdmin(ModelAdmin[Course]):
     class CourseForm(forms.ModelForm[Course]):
@@ -80,6 +173,33 @@ class CourseAdmin(ModelAdmin[Course]):
             ),
         )
 
+        def clean_prerequisite_courses(self) -> Any:
+            prerequisite_courses = self.cleaned_data["prerequisite_courses"]
+            if self.instance.pk is None:
+                # A new course can not be a prerequisite of another course yet
+                return prerequisite_courses
+
+            edges: dict[int, list[int]] = {}
+            for course_id, prerequisite_course_id in PrerequisiteCourse.objects.exclude(
+                course_id=self.instance.pk
+            ).values_list("course_id", "prerequisite_course_id"):
+                edges.setdefault(course_id, []).append(prerequisite_course_id)
+
+            # Only a cycle through this course is new, the catalog logs any other one
+            for prerequisite_course in prerequisite_courses:
+                path = find_path(edges, prerequisite_course.pk, self.instance.pk)
+                if path is None:
+                    continue
+                cycle = (self.instance.pk,) + path
+                titles = dict(
+                    Course.objects.filter(pk__in=cycle).values_list("pk", "fa_title")
+                )
+                raise forms.ValidationError(
+                    "Prerequisite courses can not form a cycle: "
+                    + " → ".join(titles[course_id] for course_id in cycle)
+                )
+            return prerequisite_courses
+
     form = CourseForm
 
     list_display = (
@@ -1,4 +1,5 @@
 from enum import Enum
+from pathlib import Path
 
 from app.config import env
 
@@ -12,3 +13,66 @@ TG_TOKEN = env("TG_TOKEN", cast=str)
 
 RUNNING_MODE = env("RUNNING_MODE", cast=RunningMode, default=RunningMode.LONG_POLLING)
 WEBHOOK_URL = env("WEBHOOK_URL", cast=str, default="")
+# Sent by Telegram in the `X-Telegram-Bot-Api-Secret-Token` header of webhook requests
+WEBHOOK_SECRET = env("WEBHOOK_SECRET", cast=str, default="")
+# Path of the webhook in the web application, `WEBHOOK_URL` should point to it
+WEBHOOK_PATH = env("WEBHOOK_PATH", cast=str, default="bot/webhook/")
+# Maximum simultaneous webhook requests Telegram makes
+WEBHOOK_MAX_CONNECTIONS = env("WEBHOOK_MAX_CONNECTIONS", cast=int, default=40)
+# Locked by the only web worker handling updates, the others fail to start in webhook mode
+WEBHOOK_LOCK_FILE = env("WEBHOOK_LOCK_FILE", cast=Path, default=Path("webhook.lock"))
+
+# Path of the Prometheus metrics in the web application (keep it private), empty to disable
+METRICS_PATH = env("METRICS_PATH", cast=str, default="metrics/")
+# Port of the Prometheus metrics of the long polling process, 0 to disable
+METRICS_PORT = env("METRICS_PORT", cast=int, default=0)
+
+# Seconds between the event loop lag measurements, 0 to disable, the loop blocked
+# longer than the threshold is logged with the stack of the code blocking it,
+# strict mode fails the updates that blocked it
+LOOP_MONITOR_INTERVAL = env("LOOP_MONITOR_INTERVAL", cast=float, default=0.1)
+LOOP_BLOCK_THRESHOLD = env("LOOP_BLOCK_THRESHOLD", cast=float, default=0.25)
+LOOP_MONITOR_STRICT = env("LOOP_MONITOR_STRICT", cast=bool, default=False)
+
+# Fraction of updates profiled, 0 to disable, only updates slower than the threshold
+# (in seconds) are kept, as the newest `.pstats` files in `PROFILE_DIR`
+PROFILE_SAMPLE_RATE = env("PROFILE_SAMPLE_RATE", cast=float, default=0.0)
+PROFILE_THRESHOLD = env("PROFILE_THRESHOLD", cast=float, default=1.0)
+PROFILE_DIR = env("PROFILE_DIR", cast=Path, default=Path("profiles"))
+# At least one file is kept, otherwise the directory would grow without a bound
+PROFILE_MAX_FILES = max(1, env("PROFILE_MAX_FILES", cast=int, default=100))
+
+# Fraction of updates traced, 0 to disable, traces are appended to `TRACE_FILE`
+# as JSON lines, or posted to an OTLP/HTTP collector at `TRACE_OTLP_URL` when it is set
+# (e.g. `http://localhost:4318/v1/traces`)
+TRACE_SAMPLE_RATE = env("TRACE_SAMPLE_RATE", cast=float, default=0.0)
+TRACE_FILE = env("TRACE_FILE", cast=Path, default=Path("traces.jsonl"))
+TRACE_OTLP_URL = env("TRACE_OTLP_URL", cast=str, default="")
+TRACE_MAX_SPANS = env("TRACE_MAX_SPANS", cast=int, default=256)
+
+# Seconds the bot's name, description and commands are cached, `/start` uses the name
+BOT_METADATA_TTL = env("BOT_METADATA_TTL", cast=float, default=3600.0)
+
+# Seconds between polls for data changed by other processes (e.g. the admin panel)
+CACHE_SYNC_INTERVAL = env("CACHE_SYNC_INTERVAL", cast=float, default=5.0)
+
+# Updates handled at once, updates of a chat are always handled one at a time
+UPDATE_WORKERS = env("UPDATE_WORKERS", cast=int, default=16)
+# Updates waiting to be handled before receiving new ones is paused
+UPDATE_QUEUE_SIZE = env("UPDATE_QUEUE_SIZE", cast=int, default=1000)
+# Seconds between logs of the update queues' depth
+UPDATE_STATS_INTERVAL = env("UPDATE_STATS_INTERVAL", cast=float, default=60.0)
+
+# Outgoing Bot API requests per second, see https://core.telegram.org/bots/faq#broadcasting-to-users
+OUTBOUND_RATE = env("OUTBOUND_RATE", cast=float, default=30.0)
+# Outgoing requests per second to a private chat, and how many may go at once
+OUTBOUND_CHAT_RATE = env("OUTBOUND_CHAT_RATE", cast=float, default=1.0)
+OUTBOUND_CHAT_BURST = env("OUTBOUND_CHAT_BURST", cast=float, default=5.0)
+# Outgoing requests per second to a group or channel (20 per minute)
+OUTBOUND_GROUP_RATE = env("OUTBOUND_GROUP_RATE", cast=float, default=20 / 60)
+
+# Broadcast messages in flight at once, their rate is limited by `OUTBOUND_RATE`
+BROADCAST_CONCURRENCY = env("BROADCAST_CONCURRENCY", cast=int, default=30)
+
+# Seconds between writes of queued user registrations
+REGISTRATION_FLUSH_INTERVAL = env("REGISTRATION_FLUSH_INTERVAL", cast=float, default=1.0)
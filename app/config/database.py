@@ -3,8 +3,17 @@ import dj_database_url
 from app.config import env
 
 DATABASE_URL = env("DATABASE_URL", cast=str, default="sqlite:///db.sqlite3")
+# The bot's reads go to this database, e.g. a replica (the primary one by default)
+DATABASE_READ_URL = env("DATABASE_READ_URL", cast=str, default=DATABASE_URL)
 CONN_MAX_AGE = env("CONN_MAX_AGE", cast=int, default=600)
+# Async connections for the bot's reads, 0 runs them on Django's connection instead
+DB_READ_POOL_SIZE = env("DB_READ_POOL_SIZE", cast=int, default=4)
 
 DATABASES = {
     "default": dj_database_url.parse(DATABASE_URL, conn_max_age=CONN_MAX_AGE),
+    "read": {
+        **dj_database_url.parse(DATABASE_READ_URL, conn_max_age=CONN_MAX_AGE),
+        "TEST": {"MIRROR": "default"},
+    },
 }
+DATABASE_ROUTERS = ["app.apps.core.routers.ReadWriteRouter"]
@@ -1,51 +1,53 @@
+import asyncio
 import logging
 
-from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
-from aiogram.types import BotCommand
+from prometheus_client import start_http_server
 
-from app.apps.core.bot.handlers import router as core_router
-from app.config.bot import RUNNING_MODE, TG_TOKEN, RunningMode
-
-bot = Bot(
-    TG_TOKEN,
-    parse_mode=ParseMode.HTML,
-    disable_web_page_preview=True,
+from app.config.bot import (
+    METRICS_PORT,
+    RUNNING_MODE,
+    WEBHOOK_MAX_CONNECTIONS,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    RunningMode,
 )
+from app.delivery.bot.dispatcher import bot, dispatcher, set_bot_commands
 
-dispatcher = Dispatcher()
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
 
 
-def _register_routers() -> None:
-    dispatcher.include_router(core_router)
-
-
-async def _set_bot_commands() -> None:
-    await bot.set_my_commands(
-        [
-            BotCommand(command="/start", description="Start bot"),
-        ]
-    )
-
+def run_polling() -> None:
+    # Set default commands
+    dispatcher.startup.register(set_bot_commands)
 
-@dispatcher.startup()
-async def on_startup() -> None:
-    # Register all routers
-    _register_routers()
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
 
-    # Set default commands
-    await _set_bot_commands()
+    # Updates are handed over to the scheduler, which handles them concurrently
+    dispatcher.run_polling(bot, handle_as_tasks=False)
 
 
-def run_polling() -> None:
-    dispatcher.run_polling(bot)
+async def _set_webhook() -> None:
+    async with bot.context():
+        await set_bot_commands()
+        await bot.set_webhook(
+            WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
 
 
 def run_webhook() -> None:
-    raise NotImplementedError("Webhook mode is not implemented yet")
+    # Updates are handled by the web application (see `app.delivery.bot.webhook`),
+    # so this only registers the webhook and exits.
+    if not WEBHOOK_URL or not WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_URL and WEBHOOK_SECRET are required in webhook mode")
+
+    asyncio.run(_set_webhook())
+    logger.info("Webhook is set to %s", WEBHOOK_URL)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import NamedTuple, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+)
+
+from app.apps.core.models import Broadcast, BroadcastDelivery
+from app.apps.core.use_case import BROADCAST_USE_CASE, BroadcastUseCase
+from app.delivery.bot.throttling import Priority, send_priority
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastReport(NamedTuple):
+    sent: int
+    blocked: int
+    failed: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return (self.sent + self.blocked + self.failed) / (self.seconds or 1)
+
+
+class BroadcastEngine:
+    # Sends broadcasts chunk by chunk with `concurrency` messages in flight. The rate is
+    # left to the bot session's `SendScheduler`, where broadcasts are bulk traffic,
+    # so users waiting for replies are served first.
+
+    def __init__(
+        self,
+        bot: Bot,
+        concurrency: int,
+        use_case: BroadcastUseCase = BROADCAST_USE_CASE,
+    ) -> None:
+        self.bot = bot
+        self.concurrency = concurrency
+        self.use_case = use_case
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def arun(self, broadcast: Broadcast) -> BroadcastReport:
+        """
+        Sends a claimed broadcast to its pending recipients.
+        """
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sent, blocked, failed = broadcast.sent, broadcast.blocked, broadcast.failed
+
+        async def send(user_id: int) -> BroadcastDelivery.Status:
+            async with semaphore:
+                return await self._send(broadcast.text, user_id)
+
+        last_user_id = 0
+        with send_priority(Priority.BULK):
+            while user_ids := await self.use_case.anext_chunk(
+                broadcast, after=last_user_id
+            ):
+                statuses = await asyncio.gather(*map(send, user_ids))
+                results: dict[BroadcastDelivery.Status, list[int]] = {}
+                for user_id, status in zip(user_ids, statuses):
+                    results.setdefault(status, []).append(user_id)
+                await self.use_case.arecord(broadcast, results)
+                last_user_id = user_ids[-1]
+
+                report = self._report(broadcast, sent, blocked, failed, started_at)
+                logger.info(
+                    "%s: %d of %d sent, %d blocked, %d failed (%.1f messages/s)",
+                    broadcast,
+                    broadcast.sent,
+                    broadcast.recipients,
+                    broadcast.blocked,
+                    broadcast.failed,
+                    report.rate,
+                )
+
+        await self.use_case.afinish(broadcast)
+        return self._report(broadcast, sent, blocked, failed, started_at)
+
+    async def run_pending(self) -> None:
+        """
+        Starts sending pending broadcasts in the background, unless it already does.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_pending())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run_pending(self) -> None:
+        while broadcast := await self.use_case.aclaim():
+            try:
+                report = await self.arun(broadcast)
+            except asyncio.CancelledError:
+                # Resumed by the next startup
+                await asyncio.shield(self.use_case.arelease(broadcast))
+                raise
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to send %s", broadcast)
+                await self.use_case.arelease(broadcast)
+                return
+            logger.info("%s is done: %s", broadcast, report)
+
+    async def _send(self, text: str, user_id: int) -> BroadcastDelivery.Status:
+        try:
+            await self.bot.send_message(user_id, text)
+        except TelegramForbiddenError:
+            # The user blocked the bot or was deactivated
+            return BroadcastDelivery.Status.BLOCKED
+        except TelegramBadRequest as error:
+            if "chat not found" in error.message.lower():
+                return BroadcastDelivery.Status.BLOCKED
+            logger.warning("Failed to send a broadcast to %s: %s", user_id, error)
+            return BroadcastDelivery.Status.FAILED
+        except TelegramAPIError as error:
+            logger.warning("Failed to send a broadcast to %s: %s", user_id, error)
+            return BroadcastDelivery.Status.FAILED
+        return BroadcastDelivery.Status.SENT
+
+    @staticmethod
+    def _report(
+        broadcast: Broadcast, sent: int, blocked: int, failed: int, started_at: float
+    ) -> BroadcastReport:
+        # Only counts this run, a resumed broadcast starts with earlier results
+        return BroadcastReport(
+            sent=broadcast.sent - sent,
+            blocked=broadcast.blocked - blocked,
+            failed=broadcast.failed - failed,
+            seconds=asyncio.get_running_loop().time() - started_at,
+        )
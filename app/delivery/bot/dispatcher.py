@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.enums import ParseMode
+from aiogram.types import BotCommand
+from django.db.backends.signals import connection_created
+from prometheus_client import REGISTRY
+
+from app.apps.core.bot.buttons import BUTTONS
+from app.apps.core.bot.handlers import SHARED_QUERIES
+from app.apps.core.bot.handlers import router as core_router
+from app.apps.core.changes import CHANGE_WATCHER
+from app.apps.core.models import BotMetadata, Broadcast
+from app.apps.core.read_pool import READ_POOL
+from app.apps.core.routers import BOT_READS
+from app.apps.core.tracing import TRACER, JsonLinesExporter, OtlpExporter
+from app.apps.core.use_case import (
+    CORE_USE_CASE,
+    COURSE_USE_CASE,
+    PLACE_USE_CASE,
+    TEXT_USE_CASE,
+)
+from app.config.bot import (
+    BOT_METADATA_TTL,
+    BROADCAST_CONCURRENCY,
+    CACHE_SYNC_INTERVAL,
+    LOOP_BLOCK_THRESHOLD,
+    LOOP_MONITOR_INTERVAL,
+    LOOP_MONITOR_STRICT,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GROUP_RATE,
+    OUTBOUND_RATE,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_THRESHOLD,
+    REGISTRATION_FLUSH_INTERVAL,
+    TG_TOKEN,
+    TRACE_FILE,
+    TRACE_MAX_SPANS,
+    TRACE_OTLP_URL,
+    TRACE_SAMPLE_RATE,
+    UPDATE_QUEUE_SIZE,
+    UPDATE_STATS_INTERVAL,
+    UPDATE_WORKERS,
+)
+from app.delivery.bot.broadcast import BroadcastEngine
+from app.delivery.bot.loop_monitor import LoopMonitor
+from app.delivery.bot.metadata import MetadataCache
+from app.delivery.bot.metrics import (
+    BotApiMetrics,
+    SchedulersCollector,
+    UpdateMetrics,
+    instrument_connection,
+    instrument_read_pool,
+)
+from app.delivery.bot.profiler import UpdateProfiler
+from app.delivery.bot.scheduler import UpdateScheduler
+from app.delivery.bot.throttling import SendScheduler
+from app.delivery.bot.tracing import BotApiTracing, UpdateTracing
+
+logger = logging.getLogger(__name__)
+
+# The bot and the dispatcher are shared by the long polling process and
+# the webhook served from the web application.
+
+bot = Bot(
+    TG_TOKEN,
+    parse_mode=ParseMode.HTML,
+    disable_web_page_preview=True,
+)
+
+# The outermost middleware, so the spans of requests include waiting for the rate limits
+if TRACE_SAMPLE_RATE > 0:
+    bot.session.middleware(BotApiTracing())
+
+SEND_SCHEDULER = SendScheduler(
+    rate=OUTBOUND_RATE,
+    chat_rate=OUTBOUND_CHAT_RATE,
+    chat_burst=OUTBOUND_CHAT_BURST,
+    group_rate=OUTBOUND_GROUP_RATE,
+)
+bot.session.middleware(SEND_SCHEDULER)
+
+METADATA_CACHE = MetadataCache(ttl=BOT_METADATA_TTL)
+bot.session.middleware(METADATA_CACHE)
+
+# The innermost middleware, so waiting for the rate limits and cached requests are excluded
+bot.session.middleware(BotApiMetrics())
+
+BROADCASTS = BroadcastEngine(bot, concurrency=BROADCAST_CONCURRENCY)
+CHANGE_WATCHER.subscribe(Broadcast, BROADCASTS.run_pending)
+
+dispatcher = Dispatcher()
+
+SCHEDULER = UpdateScheduler(
+    workers=UPDATE_WORKERS,
+    max_pending=UPDATE_QUEUE_SIZE,
+    stats_interval=UPDATE_STATS_INTERVAL,
+)
+dispatcher.update.outer_middleware(SCHEDULER)
+
+# After the scheduler, so the time spent in the queues is excluded
+UPDATE_METRICS = UpdateMetrics()
+dispatcher.update.outer_middleware(UPDATE_METRICS)
+connection_created.connect(instrument_connection)
+instrument_read_pool(READ_POOL)
+REGISTRY.register(
+    SchedulersCollector(
+        SCHEDULER,
+        SEND_SCHEDULER,
+        flights={
+            "shared_queries": SHARED_QUERIES,
+            "course_catalog": COURSE_USE_CASE.builds,
+            "place_index": PLACE_USE_CASE.builds,
+            "texts": TEXT_USE_CASE.queries,
+        },
+    )
+)
+
+# Inside the update metrics, so the handler blocking the event loop is named
+LOOP_MONITOR = LoopMonitor(
+    interval=LOOP_MONITOR_INTERVAL,
+    threshold=LOOP_BLOCK_THRESHOLD,
+    strict=LOOP_MONITOR_STRICT,
+)
+if LOOP_MONITOR_INTERVAL > 0:
+    dispatcher.update.outer_middleware(LOOP_MONITOR)
+
+UPDATE_TRACING = UpdateTracing()
+if TRACE_SAMPLE_RATE > 0:
+    TRACER.configure(
+        sample_rate=TRACE_SAMPLE_RATE,
+        exporter=(
+            OtlpExporter(TRACE_OTLP_URL)
+            if TRACE_OTLP_URL
+            else JsonLinesExporter(TRACE_FILE)
+        ),
+        max_spans=TRACE_MAX_SPANS,
+    )
+    dispatcher.update.outer_middleware(UPDATE_TRACING)
+
+# Registered only when enabled, so it costs nothing otherwise
+if PROFILE_SAMPLE_RATE > 0:
+    dispatcher.update.outer_middleware(
+        UpdateProfiler(
+            sample_rate=PROFILE_SAMPLE_RATE,
+            threshold=PROFILE_THRESHOLD,
+            directory=PROFILE_DIR,
+            max_files=PROFILE_MAX_FILES,
+        )
+    )
+
+
+def _register_routers() -> None:
+    dispatcher.include_router(core_router)
+
+    # Names the handler of every event in the update metrics
+    for name, observer in dispatcher.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(UPDATE_METRICS)
+            if TRACE_SAMPLE_RATE > 0:
+                observer.middleware(UPDATE_TRACING)
+
+
+async def set_bot_commands() -> None:
+    commands = [
+        BotCommand(command="/start", description="Start bot"),
+    ]
+
+    # Every process sets the commands on start, only the first one after a change is sent
+    key = f"commands:{bot.id}"
+    commands_hash = hashlib.sha256(
+        json.dumps(
+            [command.model_dump() for command in commands], sort_keys=True
+        ).encode()
+    ).hexdigest()
+    if await BotMetadata.objects.filter(key=key, value=commands_hash).aexists():
+        logger.info("Bot commands are unchanged")
+        return
+
+    await bot.set_my_commands(commands)
+    await BotMetadata.objects.aupdate_or_create(
+        key=key, defaults={"value": commands_hash}
+    )
+
+
+@dispatcher.startup()
+async def on_startup() -> None:
+    # Copied into the tasks started below, e.g. the update workers
+    BOT_READS.set(True)
+
+    # Watch for changes made by other processes, then warm up in-memory caches
+    await CHANGE_WATCHER.start(CACHE_SYNC_INTERVAL)
+    await TEXT_USE_CASE.aload()
+    await BUTTONS.aload()
+    await COURSE_USE_CASE.aload()
+
+    # Start saving registered users in batches
+    await CORE_USE_CASE.start(REGISTRATION_FLUSH_INTERVAL)
+
+    await SCHEDULER.start()
+
+    if LOOP_MONITOR_INTERVAL > 0:
+        await LOOP_MONITOR.start()
+
+    # Send broadcasts created while the bot was down
+    await BROADCASTS.run_pending()
+
+
+@dispatcher.shutdown()
+async def on_shutdown() -> None:
+    # Interrupted broadcasts are resumed by the next startup
+    await BROADCASTS.stop()
+
+    # Handle the updates already received
+    await SCHEDULER.stop()
+
+    await LOOP_MONITOR.stop()
+
+    await CHANGE_WATCHER.stop()
+
+    # Save users queued since the last flush
+    await CORE_USE_CASE.stop()
+
+    await READ_POOL.close()
+
+    # Write the traces still waiting
+    await asyncio.to_thread(TRACER.close)
+
+
+# Register all routers
+_register_routers()
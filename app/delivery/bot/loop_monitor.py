@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.delivery.bot.metrics import LOOP_BLOCKS, LOOP_LAG, UPDATE_COST, UpdateCost
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class EventLoopBlocked(RuntimeError):
+    pass
+
+
+class LoopMonitor(BaseMiddleware):
+    # A task sleeps for `interval` seconds over and over, how late it wakes up is the
+    # lag of the event loop. A watchdog thread checks that the task keeps waking up,
+    # when it hasn't for `threshold` seconds, the loop is blocked by synchronous code,
+    # whose stack is logged with the update being handled. As an outer middleware of
+    # `Update`s it knows the update of each task, in `strict` mode (for tests)
+    # an update that blocked the loop fails with `EventLoopBlocked`.
+
+    def __init__(
+        self, interval: float = 0.1, threshold: float = 0.25, strict: bool = False
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.strict = strict
+        self.blocks = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id = 0
+        self._beat = 0.0
+        self._task: Optional[asyncio.Task[None]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # The update handled by each task, and how long the tasks blocked the loop
+        self._updates: dict[asyncio.Task[Any], tuple[Update, Optional[UpdateCost]]] = {}
+        self._blocked: dict[asyncio.Task[Any], float] = {}
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: Update,  # type: ignore[override]
+        data: dict[str, Any],
+    ) -> Any:
+        task = asyncio.current_task()
+        assert task is not None
+        self._updates[task] = (event, UPDATE_COST.get())
+        try:
+            result = await handler(event, data)
+        finally:
+            del self._updates[task]
+            blocked = self._blocked.pop(task, None)
+
+        if blocked is not None and self.strict:
+            raise EventLoopBlocked(
+                f"Update {event.update_id} blocked the event loop"
+                f" for at least {blocked * 1000:.0f} ms"
+            )
+        return result
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None or self._watchdog is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.to_thread(self._watchdog.join)
+        self._task = self._watchdog = None
+
+    async def _measure(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(time.monotonic() - self._beat - self.interval, 0.0))
+
+    def _watch(self) -> None:
+        reported = None
+        # Often enough to catch the loop while it's blocked a little over the threshold
+        while not self._stopped.wait(min(self.interval, self.threshold) / 4):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            # Each block is reported once, while it's still going on
+            if blocked >= self.threshold and beat != reported:
+                reported = beat
+                self._report(blocked)
+
+    def _report(self, blocked: float) -> None:
+        self.blocks += 1
+        LOOP_BLOCKS.inc()
+
+        frame = sys._current_frames().get(  # pylint: disable=protected-access
+            self._thread_id
+        )
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        assert self._loop is not None
+        task = asyncio.current_task(self._loop)
+        update, cost = self._updates.get(task, (None, None)) if task else (None, None)
+        if task is not None and update is not None:
+            self._blocked[task] = blocked
+
+        logger.warning(
+            "Event loop is blocked for %d ms by update %s (handler %s):\n%s",
+            blocked * 1000,
+            update.update_id if update is not None else None,
+            cost.handler if cost is not None else None,
+            stack,
+        )
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Hashable
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import (
+    GetMe,
+    GetMyCommands,
+    GetMyDescription,
+    GetMyName,
+    GetMyShortDescription,
+    Response,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+CACHED_METHODS: tuple[type[TelegramMethod[Any]], ...] = (
+    GetMe,
+    GetMyCommands,
+    GetMyDescription,
+    GetMyName,
+    GetMyShortDescription,
+)
+
+
+class MetadataCache(BaseRequestMiddleware):
+    # A request middleware of the bot's session that answers the read-only metadata
+    # methods (`get_me`, `get_my_name`, ...) from memory for `ttl` seconds.
+    # Concurrent requests for an expired value share a single Bot API call,
+    # and any `set_my_*` or `delete_my_commands` call drops the cached values.
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values: dict[Hashable, tuple[float, Any]] = {}
+        self._requests: dict[Hashable, asyncio.Future[Any]] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, CACHED_METHODS):
+            if method.__api_method__.startswith(("setMy", "deleteMy")):
+                self.clear()
+            return await make_request(bot, method)
+
+        key = (bot.id, type(method), method.model_dump_json(exclude_none=True))
+        loop = asyncio.get_running_loop()
+        cached = self._values.get(key)
+        if cached is not None and cached[0] > loop.time():
+            self.hits += 1
+            return cached[1]  # type: ignore[no-any-return]
+
+        request = self._requests.get(key)
+        if request is not None:
+            self.hits += 1
+            return await asyncio.shield(request)
+
+        self.misses += 1
+        logger.debug("Refreshing %s", method.__api_method__)
+        request = self._requests[key] = loop.create_future()
+        try:
+            value = await make_request(bot, method)
+        except asyncio.CancelledError:
+            request.cancel()
+            raise
+        except Exception as error:
+            request.set_exception(error)
+            # Marked as retrieved, so a request without waiters doesn't log it
+            request.exception()
+            raise
+        else:
+            request.set_result(value)
+            self._values[key] = (loop.time() + self.ttl, value)
+            return value
+        finally:
+            del self._requests[key]
+
+    def clear(self) -> None:
+        self._values = {}
@@ -0,0 +1,255 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterator, Mapping, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.apps.core.read_pool import ReadPool
+from app.apps.core.single_flight import SingleFlight
+from app.delivery.bot.scheduler import UpdateScheduler
+from app.delivery.bot.throttling import SendScheduler
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+# Milliseconds to a few seconds, the slowest updates are the interesting ones
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+UPDATE_SECONDS = Histogram(
+    "bot_update_seconds",
+    "Time to handle an update",
+    ["update_type", "handler"],
+    buckets=LATENCY_BUCKETS,
+)
+UPDATE_QUERIES = Histogram(
+    "bot_update_db_queries",
+    "Database queries made while handling an update",
+    ["handler"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+UPDATE_QUERY_SECONDS = Histogram(
+    "bot_update_db_seconds",
+    "Time spent in database queries while handling an update",
+    ["handler"],
+    buckets=LATENCY_BUCKETS,
+)
+API_SECONDS = Histogram(
+    "bot_api_request_seconds",
+    "Time of a Bot API request, without waiting for the rate limits",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+API_ERRORS = Counter(
+    "bot_api_errors",
+    "Failed Bot API requests",
+    ["method", "error"],
+)
+LOOP_LAG = Histogram(
+    "bot_event_loop_lag_seconds",
+    "Delay of the event loop in running a task that is ready",
+    buckets=LATENCY_BUCKETS,
+)
+LOOP_BLOCKS = Counter(
+    "bot_event_loop_blocks",
+    "Times the event loop was blocked longer than the threshold",
+)
+
+
+@dataclass
+class UpdateCost:
+    handler: str = "unhandled"
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+# The cost of the update being handled, shared with `sync_to_async` threads
+UPDATE_COST: ContextVar[Optional[UpdateCost]] = ContextVar("UPDATE_COST", default=None)
+
+
+class UpdateMetrics(BaseMiddleware):
+    # An outer middleware of `Update`s, registered after the scheduler so it measures the
+    # handling only. The handler's name is set by the same object registered as an inner
+    # middleware of the handled event, and the queries by `count_queries`
+    # and `count_pool_query`.
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            cost = UPDATE_COST.get()
+            if cost is not None and "handler" in data:
+                cost.handler = data["handler"].callback.__name__
+            return await handler(event, data)
+
+        cost = UpdateCost()
+        token = UPDATE_COST.set(cost)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_COST.reset(token)
+            UPDATE_SECONDS.labels(event.event_type, cost.handler).observe(
+                time.perf_counter() - started
+            )
+            UPDATE_QUERIES.labels(cost.handler).observe(cost.queries)
+            UPDATE_QUERY_SECONDS.labels(cost.handler).observe(cost.query_seconds)
+
+
+def count_queries(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """
+    A Django `execute_wrapper` adding queries made during an update to its cost.
+    """
+    cost = UPDATE_COST.get()
+    if cost is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        cost.queries += 1
+        cost.query_seconds += time.perf_counter() - started
+
+
+def count_pool_query(seconds: float) -> None:
+    """
+    A `ReadPool` observer adding queries made during an update to its cost.
+    """
+    cost = UPDATE_COST.get()
+    if cost is not None:
+        cost.queries += 1
+        cost.query_seconds += seconds
+
+
+def instrument_connection(connection: BaseDatabaseWrapper, **_: Any) -> None:
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def instrument_read_pool(pool: ReadPool) -> None:
+    if count_pool_query not in pool.observers:
+        pool.observers.append(count_pool_query)
+
+
+class BotApiMetrics(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as error:
+            API_ERRORS.labels(method.__api_method__, type(error).__name__).inc()
+            raise
+        finally:
+            API_SECONDS.labels(method.__api_method__).observe(
+                time.perf_counter() - started
+            )
+
+
+class SchedulersCollector(Collector):
+    # Read on every scrape, so the schedulers don't pay for their metrics.
+    # `flights` are the `SingleFlight`s of shared queries by their label.
+
+    def __init__(
+        self,
+        updates: UpdateScheduler,
+        requests: SendScheduler,
+        flights: Optional[Mapping[str, SingleFlight]] = None,
+    ) -> None:
+        self.updates = updates
+        self.requests = requests
+        self.flights = flights or {}
+
+    def collect(self) -> Iterator[Any]:
+        stats = self.updates.stats()
+        yield GaugeMetricFamily(
+            "bot_updates_pending", "Updates waiting in the queues", value=stats.pending
+        )
+        yield GaugeMetricFamily(
+            "bot_updates_running", "Updates being handled", value=stats.running
+        )
+        yield GaugeMetricFamily(
+            "bot_update_chats", "Chats with waiting updates", value=stats.chats
+        )
+        yield GaugeMetricFamily(
+            "bot_update_deepest_chat",
+            "Waiting updates of the chat with the most of them",
+            value=stats.deepest,
+        )
+        yield CounterMetricFamily(
+            "bot_updates_processed", "Handled updates", value=stats.processed
+        )
+        yield CounterMetricFamily(
+            "bot_updates_throttled",
+            "Updates that had to wait for room in the queues",
+            value=stats.throttled,
+        )
+        yield CounterMetricFamily(
+            "bot_api_retries",
+            "Bot API requests retried after a flood limit",
+            value=self.requests.retries,
+        )
+        yield from self._collect_flights()
+
+    def _collect_flights(self) -> Iterator[Any]:
+        calls = CounterMetricFamily(
+            "bot_single_flight_calls", "Shared queries run", labels=["flight"]
+        )
+        collapsed = CounterMetricFamily(
+            "bot_single_flight_collapsed",
+            "Calls that reused a query in flight, or its recent result",
+            labels=["flight"],
+        )
+        in_flight = GaugeMetricFamily(
+            "bot_single_flight_in_flight", "Shared queries running", labels=["flight"]
+        )
+        for name, flight in self.flights.items():
+            info = flight.info()
+            calls.add_metric([name], info.calls)
+            collapsed.add_metric([name], info.collapsed)
+            in_flight.add_metric([name], info.in_flight)
+        yield calls
+        yield collapsed
+        yield in_flight
+
+
+class MetricsView(View):
+    http_method_names = ["get"]
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return HttpResponse(generate_latest(REGISTRY), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,80 @@
+import asyncio
+import cProfile
+import logging
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.delivery.bot.metrics import UPDATE_COST
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class UpdateProfiler(BaseMiddleware):
+    # An outer middleware of `Update`s that profiles a `sample_rate` fraction of them
+    # and keeps the `.pstats` of those slower than `threshold` seconds, named after
+    # the handler and the update, in `directory` (only its `max_files` newest ones).
+    # A thread has one profiler at a time, so one update is profiled at a time, and the
+    # other updates handled meanwhile show up in its profile too. Profiles are written
+    # by a thread, so the event loop never waits for the disk.
+
+    def __init__(
+        self, sample_rate: float, threshold: float, directory: Path, max_files: int
+    ) -> None:
+        if max_files < 1:
+            raise ValueError(f"max_files must be at least 1, not {max_files}")
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.directory = directory
+        self.max_files = max_files
+        self._profiling = False
+        self._random = random.Random()
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: Update,  # type: ignore[override]
+        data: dict[str, Any],
+    ) -> Any:
+        if self._profiling or self._random.random() >= self.sample_rate:
+            return await handler(event, data)
+
+        self._profiling = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            return await handler(event, data)
+        finally:
+            profile.disable()
+            self._profiling = False
+            seconds = time.perf_counter() - started
+            if seconds >= self.threshold:
+                cost = UPDATE_COST.get()
+                handler_name = cost.handler if cost is not None else "unhandled"
+                await asyncio.to_thread(self._save, profile, handler_name, event, seconds)
+
+    def _save(
+        self, profile: cProfile.Profile, handler: str, update: Update, seconds: float
+    ) -> None:
+        path = self.directory / (
+            f"{datetime.now():%Y%m%d-%H%M%S}-{handler}-{update.update_id}"
+            f"-{seconds * 1000:.0f}ms.pstats"
+        )
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(path)
+            # The names start with the time, so the oldest ones sort first
+            for old in sorted(self.directory.glob("*.pstats"))[: -self.max_files]:
+                old.unlink(missing_ok=True)
+        except OSError:
+            logger.exception("Failed to save the profile of update %s", update.update_id)
+        else:
+            logger.warning("Update %s is slow, its profile is %s", update.update_id, path)
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Update, User
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Update, dict[str, Any]], Awaitable[Any]]
+# The handler, its arguments and when it was queued
+Job = tuple[Handler, Update, dict[str, Any], float]
+
+
+class SchedulerStats(NamedTuple):
+    # Updates waiting in the queues
+    pending: int
+    # Updates being handled
+    running: int
+    # Chats with waiting updates
+    chats: int
+    # Waiting updates of the chat with the most of them
+    deepest: int
+    processed: int
+    # Updates that had to wait for room in the queues
+    throttled: int
+
+
+class UpdateScheduler(BaseMiddleware):
+    # An outer middleware of `Update`s, so it runs after aiogram resolved the chat.
+    # Updates are queued per chat and handled by a fixed pool of workers, a chat is
+    # served by at most one worker at a time, so its updates are handled in order.
+    # When `max_pending` updates are waiting, new ones wait for room, which stalls
+    # polling (run with `handle_as_tasks=False`) or the webhook request.
+
+    def __init__(
+        self, workers: int, max_pending: int, stats_interval: float = 60.0
+    ) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.stats_interval = stats_interval
+        self._chats: dict[Hashable, deque[Job]] = {}
+        self._ready: Optional[asyncio.Queue[Hashable]] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._pending = 0
+        self._running = 0
+        self._processed = 0
+        self._throttled = 0
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: Update,  # type: ignore[override]
+        data: dict[str, Any],
+    ) -> Any:
+        if self._ready is None:
+            # Not started (e.g. updates fed directly), handle it right away
+            return await handler(event, data)
+
+        job = (handler, event, data, asyncio.get_running_loop().time())
+        await self.submit(self._chat_key(event, data), job)
+        return None
+
+    async def submit(self, key: Hashable, job: Job) -> None:
+        assert self._ready is not None and self._slots is not None
+        if self._slots.locked():
+            self._throttled += 1
+            logger.warning(
+                "Update queues are full, %d updates are waiting", self._pending
+            )
+        await self._slots.acquire()
+
+        queue = self._chats.get(key)
+        if queue is None:
+            self._chats[key] = deque([job])
+            self._ready.put_nowait(key)
+        else:
+            queue.append(job)
+        self._pending += 1
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            pending=self._pending,
+            running=self._running,
+            chats=len(self._chats),
+            deepest=max(map(len, self._chats.values()), default=0),
+            processed=self._processed,
+            throttled=self._throttled,
+        )
+
+    async def start(self) -> None:
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._report()))
+
+    async def stop(self) -> None:
+        """
+        Handles the waiting updates and stops the workers.
+        """
+        if self._ready is None:
+            return
+        await self._ready.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._ready = self._slots = None
+
+    async def _work(self) -> None:
+        assert self._ready is not None and self._slots is not None
+        ready, slots = self._ready, self._slots
+        loop = asyncio.get_running_loop()
+        while True:
+            key = await ready.get()
+            queue = self._chats[key]
+            handler, event, data, queued_at = queue.popleft()
+            self._pending -= 1
+            self._running += 1
+            started_at = loop.time()
+            try:
+                result = await handler(event, data)
+                if isinstance(result, TelegramMethod):
+                    await Dispatcher.silent_call_request(data["bot"], result)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to handle update %s", event.update_id)
+            finally:
+                # aiogram only times handing the update over to the queue
+                logger.debug(
+                    "Update id=%s is handled in %d ms after waiting %d ms",
+                    event.update_id,
+                    (loop.time() - started_at) * 1000,
+                    (started_at - queued_at) * 1000,
+                )
+                self._running -= 1
+                self._processed += 1
+                slots.release()
+                # Requeue the chat behind the others, so busy chats can't starve them
+                if queue:
+                    ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                ready.task_done()
+
+    async def _report(self) -> None:
+        reported = None
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            stats = self.stats()
+            # Idle queues are only reported once
+            if stats != reported:
+                logger.info("Update queues: %s", stats)
+                reported = stats
+
+    @staticmethod
+    def _chat_key(event: Update, data: dict[str, Any]) -> Hashable:
+        chat: Optional[Chat] = data.get("event_chat")
+        if chat is not None:
+            return chat.id
+        user: Optional[User] = data.get("event_from_user")
+        if user is not None:
+            return user.id
+        # Nothing to keep in order with
+        return ("update", event.update_id)
@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteMessage, Response, SendChatAction, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    # Replies to the user who is waiting for them
+    INTERACTIVE = 0
+    # Messages nobody is waiting for, e.g. broadcasts
+    BULK = 1
+
+
+SEND_PRIORITY: ContextVar[Priority] = ContextVar(
+    "send_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def send_priority(priority: Priority) -> Iterator[None]:
+    """
+    Sends the Bot API requests made inside the block with the given `priority`.
+    """
+    token = SEND_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        SEND_PRIORITY.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Returns the seconds until a token is available.
+        """
+        self.refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def reserve(self, now: float) -> float:
+        """
+        Takes a token in advance and returns the seconds to wait before using it.
+        """
+        self.refill(now)
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds: float, now: float) -> None:
+        self.refill(now)
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class SendScheduler(BaseRequestMiddleware):
+    # A request middleware of the bot's session, so every Bot API call passes it.
+    # Requests to a chat first wait for the chat's bucket, then for the bot's global
+    # bucket. Requests waiting for the global bucket are released by priority,
+    # so replies to users overtake broadcasts. When Telegram answers with
+    # `retry_after`, the chat is paused for that long and the request is retried.
+
+    def __init__(
+        self,
+        rate: float,
+        chat_rate: float,
+        chat_burst: float,
+        group_rate: float,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+    ) -> None:
+        self.rate = rate
+        # A second worth of requests may go at once by default
+        self.burst = rate if burst is None else burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.retries = 0
+        self._bucket: Optional[TokenBucket] = None
+        self._chat_buckets: dict[Union[int, str], TokenBucket] = {}
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._pump: Optional[asyncio.Task[None]] = None
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = self._chat_id(method)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            await self._acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(
+                    "Retrying %s to chat %s after %s s",
+                    method.__api_method__,
+                    chat_id,
+                    error.retry_after,
+                )
+                loop = asyncio.get_running_loop()
+                self._chat_bucket(chat_id, loop.time()).pause(
+                    error.retry_after, loop.time()
+                )
+
+    async def _acquire(self, chat_id: Union[int, str]) -> None:
+        loop = asyncio.get_running_loop()
+
+        # Requests to the same chat reserve their turns in order
+        delay = self._chat_bucket(chat_id, loop.time()).reserve(loop.time())
+        if delay:
+            await asyncio.sleep(delay)
+
+        waiter = loop.create_future()
+        heapq.heappush(self._waiters, (SEND_PRIORITY.get(), next(self._counter), waiter))
+        if self._pump is None:
+            self._pump = loop.create_task(self._release())
+        await waiter
+
+    async def _release(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._bucket is None:
+            self._bucket = TokenBucket(self.rate, capacity=self.burst, now=loop.time())
+        try:
+            while self._waiters:
+                # Waiters that gave up don't use a token
+                if self._waiters[0][2].cancelled():
+                    heapq.heappop(self._waiters)
+                    continue
+                delay = self._bucket.delay(loop.time())
+                if delay:
+                    # The head may change meanwhile, so it is picked after the sleep
+                    await asyncio.sleep(delay)
+                    continue
+                self._bucket.take()
+                heapq.heappop(self._waiters)[2].set_result(None)
+        finally:
+            self._pump = None
+
+    def _chat_bucket(self, chat_id: Union[int, str], now: float) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= 10_000:
+                # Idle chats have full buckets, forgetting them changes nothing
+                self._chat_buckets = {
+                    key: value
+                    for key, value in self._chat_buckets.items()
+                    if not value.is_full(now)
+                }
+            # Groups (negative ids) and channels (usernames) have lower limits
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate if is_private else self.group_rate,
+                capacity=self.chat_burst,
+                now=now,
+            )
+        return bucket
+
+    @staticmethod
+    def _chat_id(method: TelegramMethod[TelegramType]) -> Optional[Union[int, str]]:
+        # Deleting messages and chat actions don't count against the message limits
+        if isinstance(method, (DeleteMessage, SendChatAction)):
+            return None
+        chat_id: Optional[Union[int, str]] = getattr(method, "chat_id", None)
+        return chat_id
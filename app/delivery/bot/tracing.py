@@ -0,0 +1,51 @@
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from app.apps.core.tracing import TRACER
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+Handler = Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]
+
+
+class UpdateTracing(BaseMiddleware):
+    # As an outer middleware of `Update`s it starts a trace per sampled update,
+    # registered as an inner middleware of the handled events too, it opens the
+    # handler's span, so the time spent before reaching the handler shows up as well.
+
+    async def __call__(
+        self,
+        handler: Handler,
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            if "handler" not in data:
+                return await handler(event, data)
+            with TRACER.span(f"handler {data['handler'].callback.__name__}"):
+                return await handler(event, data)
+
+        with TRACER.trace(
+            "update", update_id=event.update_id, update_type=event.event_type
+        ):
+            return await handler(event, data)
+
+
+class BotApiTracing(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        with TRACER.span(f"bot.{method.__api_method__}"):
+            return await make_request(bot, method)
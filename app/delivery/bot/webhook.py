@@ -0,0 +1,136 @@
+import asyncio
+import fcntl
+import logging
+from functools import cached_property
+from hmac import compare_digest
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from django.http import Http404, HttpRequest, HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from pydantic import ValidationError
+
+from app.config.bot import WEBHOOK_LOCK_FILE, WEBHOOK_SECRET
+
+logger = logging.getLogger(__name__)
+
+
+class Webhook:
+    # The dispatcher is imported and started on the first update, so web workers that
+    # never receive updates (e.g. only serving the admin panel) never build the bot.
+    # The users' states, the Bot API rate limits and the queued registrations live in
+    # the process's memory, so only one web worker may handle updates: it holds a lock
+    # of `lock_path` until it shuts down, and the ASGI lifespan of the other workers
+    # fails (see `app.delivery.web.asgi`).
+
+    def __init__(self, lock_path: Path) -> None:
+        self.lock_path = lock_path
+        self._lock_file: Optional[IO[bytes]] = None
+        self._started = False
+        self._lock = asyncio.Lock()
+
+    @cached_property
+    def bot(self) -> Bot:
+        # pylint: disable-next=import-outside-toplevel
+        from app.delivery.bot.dispatcher import bot
+
+        return bot
+
+    @cached_property
+    def dispatcher(self) -> Dispatcher:
+        # pylint: disable-next=import-outside-toplevel
+        from app.delivery.bot.dispatcher import dispatcher
+
+        return dispatcher
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def acquire(self) -> None:
+        """
+        Locks the updates for this worker, raises `RuntimeError` if another one has them.
+        """
+        if self._lock_file is not None:
+            return
+        lock_file = self.lock_path.open("wb")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"{self.lock_path} is locked by another worker, "
+                "the webhook mode needs a single web worker"
+            ) from None
+        self._lock_file = lock_file
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            # Closing the file releases the lock
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def startup(self) -> None:
+        if self._started:
+            return
+        async with self._lock:
+            if not self._started:
+                self.acquire()
+                await self.dispatcher.emit_startup(
+                    bot=self.bot, dispatcher=self.dispatcher
+                )
+                self._started = True
+
+    async def shutdown(self) -> None:
+        async with self._lock:
+            if self._started:
+                self._started = False
+                await self.dispatcher.emit_shutdown(
+                    bot=self.bot, dispatcher=self.dispatcher
+                )
+                await self.bot.session.close()
+            self.release()
+
+    async def feed_update(self, update: Update) -> None:
+        await self.startup()
+        method: Optional[TelegramMethod[Any]] = await self.dispatcher.feed_webhook_update(
+            self.bot, update
+        )
+        if method is not None:
+            await self.dispatcher.silent_call_request(self.bot, method)
+
+
+WEBHOOK = Webhook(WEBHOOK_LOCK_FILE)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class WebhookView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        # Without a secret anyone could send updates, so the webhook is disabled
+        if not WEBHOOK_SECRET:
+            raise Http404
+
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not compare_digest(token, WEBHOOK_SECRET):
+            return HttpResponse(status=403)
+
+        try:
+            update = Update.model_validate_json(
+                request.body, context={"bot": WEBHOOK.bot}
+            )
+        except ValidationError:
+            return HttpResponse(status=400)
+
+        try:
+            await WEBHOOK.feed_update(update)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Telegram would redeliver the update over and over
+            logger.exception("Failed to handle update %s", update.update_id)
+        return HttpResponse()
@@ -8,9 +8,46 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
 
 import os
+from typing import Any, Awaitable, Callable, Mapping
 
 from django.core.asgi import get_asgi_application
 
+from app.config.bot import RUNNING_MODE, RunningMode
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up, as it loads the bot's models
+from app.delivery.bot.webhook import WEBHOOK  # noqa: E402  # isort: skip
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[Mapping[str, Any]]]
+Send = Callable[[Mapping[str, Any]], Awaitable[None]]
+
+
+async def lifespan(receive: Receive, send: Send) -> None:
+    # Django doesn't support the lifespan protocol, but the webhook's dispatcher
+    # needs a shutdown to save queued users and stop its background tasks,
+    # and the workers other than the one handling updates must not start.
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if RUNNING_MODE == RunningMode.WEBHOOK:
+                try:
+                    WEBHOOK.acquire()
+                except RuntimeError as error:
+                    await send({"type": "lifespan.startup.failed", "message": str(error)})
+                    return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await WEBHOOK.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
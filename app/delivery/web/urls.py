@@ -19,12 +19,19 @@ from django.contrib import admin
 from django.urls import URLPattern, URLResolver, path
 
 from app.config.application import DEBUG
+from app.config.bot import METRICS_PATH, WEBHOOK_PATH
 from app.config.web import STATIC_ROOT, STATIC_URL
+from app.delivery.bot.metrics import MetricsView
+from app.delivery.bot.webhook import WebhookView
 
 urlpatterns: list[URLResolver | URLPattern] = [
     path("admin/", admin.site.urls),
+    path(WEBHOOK_PATH, WebhookView.as_view()),
 ]
 
+if METRICS_PATH:
+    urlpatterns.append(path(METRICS_PATH, MetricsView.as_view()))
+
 if DEBUG:
     # See https://docs.djangoproject.com/en/4.1/howto/static-files/#serving-files
     # https://stackoverflow.com/questions/61770551/how-to-run-django-with-uvicorn-webserver-uploaded-by-a-user-during-development
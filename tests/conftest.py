@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+from django.db import connections
+
+# The bot's config requires a token, tests never reach the Bot API with it
+os.environ.setdefault("TG_TOKEN", "42:TEST")
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix: None,
+) -> None:
+    # Django makes `read` a mirror of the test database only for the tests using it,
+    # but the bot reads through it in every test
+    connections.settings["read"] = connections.settings["default"]
+    connections["read"].creation.set_as_test_mirror(connections["default"].settings_dict)
+
+
+@pytest.fixture
+def file_database(tmp_path: Path) -> Iterator[Callable[[str], str]]:
+    """
+    Adds database aliases of a file database, for what the in-memory one can't do.
+    """
+    aliases = []
+
+    def add(alias: str) -> str:
+        connections.settings[alias] = {
+            **connections["default"].settings_dict,
+            "NAME": str(tmp_path / "db.sqlite3"),
+        }
+        aliases.append(alias)
+        return alias
+
+    yield add
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
@@ -0,0 +1,98 @@
+"""
+A fake Bot API session and helpers to build the updates Telegram sends.
+"""
+from datetime import datetime
+from typing import Any, AsyncGenerator, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import GetMyName, SendMessage, TelegramMethod
+from aiogram.types import BotName, Chat, Message
+
+DATE = 1700000000
+
+
+class FakeSession(BaseSession):
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: list[TelegramMethod[Any]] = []
+        # Chats whose users blocked the bot
+        self.blocked: set[int] = set()
+
+    def sent(self, method: type[TelegramMethod[Any]]) -> list[Any]:
+        return [request for request in self.requests if isinstance(request, method)]
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[Any], timeout: Optional[int] = None
+    ) -> Any:
+        if getattr(method, "chat_id", None) in self.blocked:
+            raise TelegramForbiddenError(method, "Forbidden: bot was blocked by the user")
+        self.requests.append(method)
+        if isinstance(method, GetMyName):
+            return BotName(name="CS Tabriz")
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=2,
+                date=datetime.now(),
+                chat=Chat(id=int(method.chat_id), type="private"),
+                text=method.text,
+            )
+        return True
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def message_update(update_id: int, chat_id: int, **fields: Any) -> dict[str, Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": DATE,
+            "chat": {"id": chat_id, "type": "private", "first_name": "Ali"},
+            "from": {
+                "id": chat_id,
+                "is_bot": False,
+                "first_name": "Ali",
+                "username": "ali",
+            },
+            **fields,
+        },
+    }
+
+
+def command_update(update_id: int, chat_id: int, command: str) -> dict[str, Any]:
+    return message_update(
+        update_id,
+        chat_id,
+        text=command,
+        entities=[{"type": "bot_command", "offset": 0, "length": len(command)}],
+    )
+
+
+def callback_update(update_id: int, chat_id: int, data: str) -> dict[str, Any]:
+    message = message_update(update_id, chat_id, text="-")["message"]
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": message["from"],
+            "chat_instance": str(chat_id),
+            "message": {
+                **message,
+                "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+            },
+            "data": data,
+        },
+    }
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any
+from unittest import mock
+
+import pytest
+from aiogram.methods import GetMyName, SetMyCommands
+from asgiref.sync import async_to_sync
+
+from app.delivery.bot.dispatcher import bot, set_bot_commands
+from app.delivery.bot.metadata import MetadataCache
+from tests.fake_bot import FakeSession
+
+
+class SlowSession(FakeSession):
+    async def make_request(self, *args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(0.01)
+        return await super().make_request(*args, **kwargs)
+
+
+def test_concurrent_refreshes_share_one_request() -> None:
+    session = SlowSession()
+    cache = MetadataCache(ttl=60)
+    session.middleware(cache)
+
+    async def run() -> list[str]:
+        names = await asyncio.gather(*(bot.get_my_name() for _ in range(10)))
+        names.append(await bot.get_my_name())
+        await bot.get_my_name(language_code="fa")
+        return [name.name for name in names]
+
+    with mock.patch.object(bot, "session", session):
+        assert asyncio.run(run()) == ["CS Tabriz"] * 11
+
+    assert len(session.sent(GetMyName)) == 2
+    assert (cache.hits, cache.misses) == (10, 2)
+
+
+def test_expired_and_changed_values_are_refreshed() -> None:
+    session = FakeSession()
+    cache = MetadataCache(ttl=0)
+    session.middleware(cache)
+
+    async def run() -> None:
+        await bot.get_my_name()
+        await bot.get_my_name()
+        cache.ttl = 60
+        await bot.get_my_name()
+        await bot.set_my_name(name="CS")
+        await bot.get_my_name()
+
+    with mock.patch.object(bot, "session", session):
+        asyncio.run(run())
+
+    assert len(session.sent(GetMyName)) == 4
+
+
+def test_failed_refresh_is_not_cached() -> None:
+    session = FakeSession()
+    session.middleware(MetadataCache(ttl=60))
+
+    async def run() -> None:
+        with mock.patch.object(session, "make_request", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                await bot.get_my_name()
+        await bot.get_my_name()
+
+    with mock.patch.object(bot, "session", session):
+        asyncio.run(run())
+
+    assert len(session.sent(GetMyName)) == 1
+
+
+@pytest.mark.django_db
+def test_unchanged_commands_are_not_set_again() -> None:
+    session = FakeSession()
+    with mock.patch.object(bot, "session", session):
+        async_to_sync(set_bot_commands)()
+        async_to_sync(set_bot_commands)()
+
+    assert len(session.sent(SetMyCommands)) == 1
@@ -0,0 +1,193 @@
+import asyncio
+from datetime import timedelta
+from typing import Any
+from unittest import mock
+
+import pytest
+from aiogram.methods import SendMessage
+from asgiref.sync import async_to_sync
+from django.core.management import CommandError, call_command
+from django.test import Client
+from django.utils import timezone
+
+from app.apps.core.models import Broadcast, BroadcastDelivery, ModelVersion, TGUser
+from app.apps.core.use_case import BroadcastTakenOver, BroadcastUseCase, CoreUseCase
+from app.delivery.bot.broadcast import BroadcastEngine
+from app.delivery.bot.dispatcher import bot
+from tests.fake_bot import FakeSession
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def session() -> Any:
+    TGUser.objects.bulk_create(
+        TGUser(id=user_id, full_name=f"User {user_id}") for user_id in range(1, 8)
+    )
+    TGUser.objects.filter(id=7).update(is_active=False)
+    session = FakeSession()
+    with mock.patch.object(bot, "session", session):
+        yield session
+
+
+def recipients(session: FakeSession) -> list[int]:
+    return sorted(int(method.chat_id) for method in session.sent(SendMessage))
+
+
+def test_broadcast_is_sent_once_to_active_users(session: FakeSession) -> None:
+    session.blocked.add(3)
+    use_case = BroadcastUseCase(chunk_size=2)
+    broadcast = use_case.create(Broadcast(text="Deadline!"))
+    assert broadcast.recipients == 6
+
+    async def run() -> Any:
+        claimed = await use_case.aclaim()
+        assert claimed is not None and await use_case.aclaim() is None
+        return await BroadcastEngine(bot, concurrency=2, use_case=use_case).arun(claimed)
+
+    report = async_to_sync(run)()
+
+    assert (report.sent, report.blocked, report.failed) == (5, 1, 0)
+    assert recipients(session) == [1, 2, 4, 5, 6]
+    broadcast.refresh_from_db()
+    assert broadcast.status == Broadcast.Status.DONE
+    assert (broadcast.sent, broadcast.blocked, broadcast.failed) == (5, 1, 0)
+    # Blocked users are skipped by later broadcasts
+    assert not TGUser.objects.get(id=3).is_active
+    assert ModelVersion.objects.filter(name="core.TGUser").exists()
+    assert use_case.create(Broadcast(text="Again")).recipients == 5
+
+
+def test_interrupted_broadcast_resumes_without_duplicates(session: FakeSession) -> None:
+    use_case = BroadcastUseCase(chunk_size=2)
+    broadcast = use_case.create(Broadcast(text="Deadline!"))
+    engine = BroadcastEngine(bot, concurrency=2, use_case=use_case)
+
+    async def interrupt() -> None:
+        claimed = await use_case.aclaim()
+        assert claimed is not None
+        # The process dies while the first chunk is being sent
+        assert await use_case.anext_chunk(claimed, after=0) == [1, 2]
+        await use_case.arelease(claimed)
+
+    async def resume() -> Any:
+        claimed = await use_case.aclaim(broadcast.id)
+        assert claimed is not None
+        return await engine.arun(claimed)
+
+    async_to_sync(interrupt)()
+    report = async_to_sync(resume)()
+
+    assert report.sent == 4
+    assert recipients(session) == [3, 4, 5, 6]
+    assert (
+        BroadcastDelivery.objects.filter(
+            broadcast=broadcast, status=BroadcastDelivery.Status.SENDING
+        ).count()
+        == 2
+    )
+
+
+def test_pending_broadcasts_are_sent_in_the_background(session: FakeSession) -> None:
+    use_case = BroadcastUseCase()
+    use_case.create(Broadcast(text="First"))
+    use_case.create(Broadcast(text="Second"), TGUser.objects.filter(id__lte=2))
+    engine = BroadcastEngine(bot, concurrency=2, use_case=use_case)
+
+    async def run() -> None:
+        await engine.run_pending()
+        await engine.run_pending()
+        assert engine._task is not None
+        await engine._task
+        await engine.stop()
+
+    async_to_sync(run)()
+    assert len(recipients(session)) == 8
+    assert set(Broadcast.objects.values_list("status", flat=True)) == {
+        Broadcast.Status.DONE
+    }
+
+
+def test_command_sends_and_resumes_broadcasts(session: FakeSession) -> None:
+    call_command("broadcast", "Deadline!", stdout=mock.MagicMock())
+    assert recipients(session) == [1, 2, 3, 4, 5, 6]
+
+    broadcast = Broadcast.objects.get()
+    BroadcastDelivery.objects.filter(user_id=6).update(
+        status=BroadcastDelivery.Status.PENDING
+    )
+    Broadcast.objects.update(status=Broadcast.Status.RUNNING, heartbeat_at=timezone.now())
+    # Its owner may still be sending it
+    with pytest.raises(CommandError, match="being sent by another process"):
+        call_command("broadcast", resume=broadcast.id, stdout=mock.MagicMock())
+
+    Broadcast.objects.update(heartbeat_at=timezone.now() - timedelta(hours=1))
+    call_command("broadcast", resume=broadcast.id, stdout=mock.MagicMock())
+    assert recipients(session) == [1, 2, 3, 4, 5, 6, 6]
+    with pytest.raises(CommandError, match="no unfinished broadcast"):
+        call_command("broadcast", resume=broadcast.id, stdout=mock.MagicMock())
+
+
+def test_stale_broadcast_is_taken_over(session: FakeSession) -> None:
+    use_case = BroadcastUseCase(chunk_size=2, heartbeat_timeout=60)
+    broadcast = use_case.create(Broadcast(text="Deadline!"))
+
+    async def run() -> None:
+        first = await use_case.aclaim()
+        assert first is not None
+        assert await use_case.aclaim() is None
+        await Broadcast.objects.filter(id=broadcast.id).aupdate(
+            heartbeat_at=timezone.now() - timedelta(minutes=2)
+        )
+        second = await use_case.aclaim()
+        assert second is not None and second.owner != first.owner
+
+        # The first owner stops at its next chunk and can't finish it
+        with pytest.raises(BroadcastTakenOver):
+            await use_case.arecord(first, {})
+        await use_case.afinish(first)
+        await use_case.arelease(first)
+        assert (await Broadcast.objects.aget(id=broadcast.id)).owner == second.owner
+
+    async_to_sync(run)()
+
+
+def test_chunks_are_claimed_once(session: FakeSession) -> None:
+    use_case = BroadcastUseCase(chunk_size=2)
+    broadcast = use_case.create(Broadcast(text="Deadline!"))
+
+    async def run() -> Any:
+        return await asyncio.gather(
+            use_case.anext_chunk(broadcast, after=0),
+            use_case.anext_chunk(broadcast, after=0),
+            return_exceptions=True,
+        )
+
+    first, second = async_to_sync(run)()
+    assert first == [1, 2]
+    assert isinstance(second, BroadcastTakenOver)
+
+
+def test_admin_action_queues_broadcast_for_selected_users(admin_client: Client) -> None:
+    TGUser.objects.bulk_create(
+        TGUser(id=user_id, full_name=f"User {user_id}") for user_id in range(1, 4)
+    )
+    data = {"action": "broadcast", "_selected_action": ["1", "2"]}
+
+    response = admin_client.post("/admin/core/tguser/", data)
+    assert response.status_code == 200
+    assert not Broadcast.objects.exists()
+
+    admin_client.post("/admin/core/tguser/", {**data, "apply": "1", "text": "Hi"})
+    broadcast = Broadcast.objects.get()
+    assert (broadcast.text, broadcast.recipients) == ("Hi", 2)
+
+
+def test_start_activates_users_again() -> None:
+    TGUser.objects.create(id=1, full_name="Ali", is_active=False)
+    core_use_case = CoreUseCase()
+    async_to_sync(core_use_case.aload_users)()
+
+    assert not async_to_sync(core_use_case.register_bot_user)(1, None, "Ali")
+    assert async_to_sync(core_use_case.flush)() == 1
+    assert TGUser.objects.get(id=1).is_active
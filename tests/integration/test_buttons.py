@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Any
+
+import pytest
+from aiogram.types import Chat, Message
+from asgiref.sync import async_to_sync
+
+from app.apps.core.bot.buttons import BUTTONS, ButtonFilter
+from app.apps.core.bot.keyboards import MainKeyboard
+from app.apps.core.models import Text
+
+pytestmark = pytest.mark.django_db
+
+
+def make_message(text: str) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=1, type="private"),
+        text=text,
+    )
+
+
+def test_labels_are_loaded_in_one_query(django_assert_num_queries: Any) -> None:
+    Text.objects.create(name="MAIN_COURSE", is_button=True, text="Courses")
+    Text.objects.create(name="MAIN_COURSE", is_button=False, text="Not a button")
+
+    with django_assert_num_queries(1):
+        async_to_sync(BUTTONS.aload)()
+
+    markup = MainKeyboard().as_markup()
+    assert markup.keyboard[1][0].text == "Courses"
+    assert BUTTONS["MAIN_PHONE"] == ""
+
+
+def test_filter_follows_edited_labels() -> None:
+    text = Text.objects.create(name="MAIN_COURSE", is_button=True, text="Courses")
+    BUTTONS.load()
+    button_filter = ButtonFilter(MainKeyboard.course_button)
+
+    assert async_to_sync(button_filter)(make_message("Courses"))
+
+    text.text = "All courses"
+    text.save()
+    assert not async_to_sync(button_filter)(make_message("Courses"))
+    assert async_to_sync(button_filter)(make_message("All courses"))
+
+    text.delete()
+    assert not async_to_sync(button_filter)(make_message("All courses"))
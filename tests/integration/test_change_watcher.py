@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.apps.core.changes import ChangeWatcher
+from app.apps.core.models import Course, ModelVersion, Phone, PrerequisiteCourse, Text
+
+pytestmark = pytest.mark.django_db
+
+
+def test_poll_reloads_only_changed_models() -> None:
+    reloads: list[str] = []
+
+    async def reload_texts() -> None:
+        reloads.append("texts")
+
+    async def reload_catalog() -> None:
+        reloads.append("catalog")
+
+    def clear_markups() -> None:
+        reloads.append("markups")
+
+    watcher = ChangeWatcher()
+    watcher.subscribe_invalidate(Text, clear_markups)
+    watcher.subscribe_invalidate(Course, clear_markups)
+    watcher.subscribe(Text, reload_texts)
+    watcher.subscribe(Course, reload_catalog)
+    watcher.subscribe(PrerequisiteCourse, reload_catalog)
+    assert async_to_sync(watcher.poll)() == []
+
+    Phone.objects.create(name="Office", phone_number="09123456789")
+    assert async_to_sync(watcher.poll)() == ["core.Phone"]
+    assert not reloads
+
+    Text.objects.create(name="HELLO", is_button=False, text="Hello")
+    course = Course.objects.create(fa_title="A", credit=3, unit_type=1, course_type=1)
+    course.prerequisite_courses.set(
+        [Course.objects.create(fa_title="B", credit=3, unit_type=1, course_type=1)]
+    )
+    assert async_to_sync(watcher.poll)() == [
+        "core.Text",
+        "core.Course",
+        "core.PrerequisiteCourse",
+    ]
+    assert reloads == ["texts", "catalog", "markups"]
+    assert ModelVersion.objects.get(name="core.Course").version == 2
+
+    assert async_to_sync(watcher.poll)() == []
+    assert reloads == ["texts", "catalog", "markups"]
+
+
+def test_failed_reload_is_retried_on_next_poll() -> None:
+    attempts: list[int] = []
+
+    async def reload_texts() -> None:
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise RuntimeError("Database is gone")
+
+    watcher = ChangeWatcher()
+    watcher.subscribe(Text, reload_texts)
+    async_to_sync(watcher.poll)()
+
+    Text.objects.create(name="HELLO", is_button=False, text="Hello")
+    assert async_to_sync(watcher.poll)() == ["core.Text"]
+    assert async_to_sync(watcher.poll)() == ["core.Text"]
+    assert async_to_sync(watcher.poll)() == []
+    assert attempts == [0, 1]
+
+
+def test_watcher_polls_in_background() -> None:
+    reloaded = asyncio.Event()
+
+    async def reload_texts() -> None:
+        reloaded.set()
+
+    async def run() -> None:
+        watcher = ChangeWatcher()
+        watcher.subscribe(Text, reload_texts)
+        await watcher.start(interval=0.01)
+        await Text.objects.acreate(name="HELLO", is_button=False, text="Hello")
+        await asyncio.wait_for(reloaded.wait(), timeout=1)
+        await watcher.stop()
+        await watcher.stop()
+
+    async_to_sync(run)()
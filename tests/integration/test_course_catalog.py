@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.apps.core.models import Course
+from app.apps.core.use_case import CourseUseCase
+from app.apps.core.web.admin import CourseAdmin
+
+pytestmark = pytest.mark.django_db
+
+
+def test_catalog_is_loaded_in_two_queries_and_swapped_on_change(
+    django_assert_num_queries: Any,
+) -> None:
+    basics = Course.objects.create(
+        fa_title="Basics", offering_semester=1, credit=3, unit_type=1, course_type=2
+    )
+    advanced = Course.objects.create(
+        fa_title="Advanced", offering_semester=2, credit=3, unit_type=1, course_type=3
+    )
+    advanced.prerequisite_courses.set([basics])
+    course_use_case = CourseUseCase()
+
+    with django_assert_num_queries(2):
+        catalog = async_to_sync(course_use_case.aget_catalog)()
+        assert async_to_sync(course_use_case.aget_catalog)() is catalog
+
+    assert catalog.by_semester[2] == (advanced,)
+    assert catalog.prerequisite_courses(advanced.id) == (basics,)
+
+    course_use_case.invalidate()
+    with django_assert_num_queries(2):
+        assert async_to_sync(course_use_case.aget_catalog)() is not catalog
+
+
+def test_concurrent_requests_share_one_build(django_assert_num_queries: Any) -> None:
+    Course.objects.create(fa_title="Basics", credit=3, unit_type=1, course_type=2)
+    course_use_case = CourseUseCase()
+
+    async def open_menu() -> list[Any]:
+        return await asyncio.gather(*(course_use_case.aget_catalog() for _ in range(50)))
+
+    with django_assert_num_queries(2):
+        catalogs = async_to_sync(open_menu)()
+
+    assert all(catalog is catalogs[0] for catalog in catalogs)
+    assert course_use_case.builds.info() == (1, 49, 0)
+
+
+def test_admin_rejects_prerequisite_cycles() -> None:
+    first, second, third = (
+        Course.objects.create(fa_title=title, credit=3, unit_type=1, course_type=2)
+        for title in ("First", "Second", "Third")
+    )
+    second.prerequisite_courses.set([first])
+    third.prerequisite_courses.set([second])
+
+    def make_form(course: Course, prerequisite_courses: list[Course]) -> Any:
+        return CourseAdmin.CourseForm(
+            instance=course,
+            data={
+                "fa_title": course.fa_title,
+                "credit": course.credit,
+                "quiz_credit": course.quiz_credit,
+                "unit_type": course.unit_type,
+                "course_type": course.course_type,
+                "prerequisite_courses": [_.pk for _ in prerequisite_courses],
+            },
+        )
+
+    form = make_form(first, [third])
+    assert not form.is_valid()
+    assert form.errors["prerequisite_courses"] == [
+        "Prerequisite courses can not form a cycle: First → Third → Second → First"
+    ]
+    assert make_form(third, [first, second]).is_valid()
+    assert make_form(
+        Course(fa_title="New", credit=3, unit_type=1, course_type=2), [third]
+    ).is_valid()
+
+    form = make_form(second, [second])
+    assert not form.is_valid()
+    assert form.errors["prerequisite_courses"] == [
+        "Prerequisite courses can not form a cycle: Second → Second"
+    ]
+
+    # An existing cycle does not block editing the courses outside of it
+    first.prerequisite_courses.set([third])
+    other = Course.objects.create(fa_title="Other", credit=3, unit_type=1, course_type=2)
+    assert make_form(other, [first]).is_valid()
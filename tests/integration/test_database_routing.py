@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+import time
+from contextvars import Context
+from typing import Callable
+from unittest import mock
+
+import pytest
+from django.db import connections
+
+from app.apps.core import routers
+from app.apps.core.models import Course, Text, TGUser
+from app.apps.core.routers import BOT_READS, ReadWriteRouter
+
+
+def test_bot_reads_go_to_the_read_database() -> None:
+    router = ReadWriteRouter()
+    # Reads outside of the bot, e.g. the admin panel's, stay on the primary
+    assert Context().run(router.db_for_read, Text) == "default"
+
+    token = BOT_READS.set(True)
+    try:
+        assert router.db_for_read(Text) == router.db_for_read(Course) == "read"
+        assert router.db_for_read(TGUser) == "default"
+        assert router.db_for_write(Text) == router.db_for_write(TGUser) == "default"
+        assert router.allow_migrate("default", "core") and not router.allow_migrate(
+            "read", "core"
+        )
+
+        # Reads inside a transaction see its writes
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            assert router.db_for_read(Text) == "default"
+    finally:
+        BOT_READS.reset(token)
+
+
+@pytest.mark.django_db
+def test_admin_writes_do_not_stall_bot_reads(file_database: Callable[[str], str]) -> None:
+    primary, read = file_database("primary"), file_database("replica")
+    with mock.patch.object(routers, "READ_DATABASE", read):
+        with connections[primary].schema_editor() as editor:
+            editor.create_model(Text)
+        Text.objects.using(primary).create(name="ABOUT", text="Old", is_button=False)
+        Text.objects.using(read).get()
+
+    writer = connections[primary].connection
+    reader = connections[read].connection
+    assert writer.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert reader.execute("PRAGMA query_only").fetchone() == (1,)
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM text")
+
+    # Without WAL, readers wait for an exclusive write transaction until it's committed
+    writer.execute("BEGIN EXCLUSIVE")
+    writer.execute("UPDATE text SET text = 'New'")
+    texts = []
+
+    def bot_read() -> None:
+        texts.append(Text.objects.using(read).get().text)
+        connections[read].close()
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=bot_read)
+    thread.start()
+    thread.join()
+    assert texts == ["Old"] and time.perf_counter() - started < 1
+    writer.execute("COMMIT")
+    assert Text.objects.using(read).get().text == "New"
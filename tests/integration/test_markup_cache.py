@@ -0,0 +1,71 @@
+import pytest
+from aiogram.types import InlineKeyboardMarkup
+from asgiref.sync import async_to_sync
+
+from app.apps.core.bot.keyboards import (
+    MARKUPS,
+    CourseKeyboard,
+    MarkupCache,
+    course_markup,
+    courses_markup,
+)
+from app.apps.core.models import Course
+
+pytestmark = pytest.mark.django_db
+
+
+def test_markups_are_built_once_per_view_state() -> None:
+    markups = MarkupCache()
+    built: list[str] = []
+
+    def build() -> InlineKeyboardMarkup:
+        built.append("courses")
+        return CourseKeyboard().as_markup()
+
+    async def abuild() -> InlineKeyboardMarkup:
+        return build()
+
+    first = markups.get(("courses",), build)
+    assert markups.get(("courses",), build) is first
+    assert async_to_sync(markups.aget)(("courses",), abuild) is first
+    assert async_to_sync(markups.aget)(("courses", "type", None), abuild) is not first
+    assert built == ["courses", "courses"]
+    assert (markups.hits, markups.misses) == (2, 2)
+
+    markups.clear()
+    assert markups.get(("courses",), build) is not first
+
+
+def test_markups_built_during_a_clear_are_not_cached() -> None:
+    markups = MarkupCache()
+
+    async def abuild() -> InlineKeyboardMarkup:
+        markups.clear()
+        return CourseKeyboard().as_markup()
+
+    stale = async_to_sync(markups.aget)(("courses",), abuild)
+    assert async_to_sync(markups.aget)(("courses",), abuild) is not stale
+    assert (markups.hits, markups.misses) == (0, 2)
+
+
+def test_catalog_changes_drop_cached_markups() -> None:
+    markup = async_to_sync(courses_markup)()
+    assert async_to_sync(courses_markup)() is markup
+
+    Course.objects.create(fa_title="A", credit=3, unit_type=1, course_type=1)
+
+    assert async_to_sync(courses_markup)() is not markup
+    MARKUPS.clear()
+
+
+def test_course_markups_are_shared_by_courses_of_a_semester() -> None:
+    first, second, other = (
+        Course(id=index, fa_title="A", offering_semester=semester, course_type=1)
+        for index, semester in ((1, 2), (2, 2), (3, 3))
+    )
+
+    markup = course_markup("semester", first)
+    assert course_markup("semester", second) is markup
+    assert course_markup("semester", other) is not markup
+    assert course_markup("type", first) is not markup
+    MARKUPS.clear()
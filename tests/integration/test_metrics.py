@@ -0,0 +1,108 @@
+from typing import Any, Callable, Optional
+from unittest import mock
+
+import pytest
+from aiogram.types import Update
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client
+from prometheus_client import REGISTRY
+
+from app.apps.core.bot.buttons import BUTTONS
+from app.apps.core.models import Text
+from app.apps.core.read_pool import SQLiteReadPool
+from app.apps.core.use_case import TEXT_USE_CASE
+from app.delivery.bot.dispatcher import bot, dispatcher
+from app.delivery.bot.metrics import (
+    BotApiMetrics,
+    UpdateMetrics,
+    instrument_connection,
+    instrument_read_pool,
+)
+from tests.fake_bot import FakeSession, command_update, message_update
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def session() -> Any:
+    call_command("loaddata", "text", verbosity=0)
+    TEXT_USE_CASE.clear()
+    BUTTONS.load()
+    instrument_connection(connection)
+    session = FakeSession()
+    session.middleware(BotApiMetrics())
+    with mock.patch.object(bot, "session", session):
+        yield session
+    TEXT_USE_CASE.clear()
+
+
+def sample(name: str, **labels: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+def test_updates_are_measured_per_handler(session: FakeSession) -> None:
+    labels = {"update_type": "message", "handler": "start_message_handler"}
+    updates = sample("bot_update_seconds_count", **labels)
+    queries = sample("bot_update_db_queries_sum", handler="start_message_handler")
+    requests = sample("bot_api_request_seconds_count", method="sendMessage")
+
+    async def run() -> None:
+        for update in (
+            command_update(1, chat_id=400, command="/start"),
+            message_update(2, chat_id=400, text="Nothing"),
+        ):
+            await dispatcher.feed_update(bot, Update.model_validate(update))
+
+    async_to_sync(run)()
+
+    assert sample("bot_update_seconds_count", **labels) == updates + 1
+    assert sample("bot_update_seconds_count", update_type="message", handler="unhandled")
+    # The text is loaded
+    assert (
+        sample("bot_update_db_queries_sum", handler="start_message_handler")
+        == queries + 1
+    )
+    assert sample("bot_api_request_seconds_count", method="sendMessage") == requests + 1
+
+
+def test_read_pool_queries_are_counted(file_database: Callable[[str], str]) -> None:
+    # The tests' in-memory database is read on Django's connections
+    alias = file_database("pool")
+    with connections[alias].schema_editor() as editor:
+        editor.create_model(Text)
+    pool = SQLiteReadPool(alias, size=1)
+    instrument_read_pool(pool)
+    queries = sample("bot_update_db_queries_sum", handler="unhandled")
+    seconds = sample("bot_update_db_seconds_sum", handler="unhandled")
+
+    async def handler(*_: Any) -> None:
+        await pool.afetch(Text.objects.values_list("name"))
+        await pool.ainstances(Text.objects.all())
+
+    async def run() -> None:
+        try:
+            update = Update.model_validate(message_update(1, chat_id=1, text="Hi"))
+            await UpdateMetrics()(handler, update, {})
+            # Outside of an update nothing is counted
+            await handler()
+        finally:
+            await pool.close()
+
+    async_to_sync(run)()
+    assert sample("bot_update_db_queries_sum", handler="unhandled") == queries + 2
+    assert sample("bot_update_db_seconds_sum", handler="unhandled") > seconds
+
+
+def test_metrics_are_exported_in_prometheus_format() -> None:
+    response = Client().get("/metrics/")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert b"bot_updates_pending 0.0" in response.content
+    assert b"# TYPE bot_update_seconds histogram" in response.content
+    assert (
+        b'bot_single_flight_collapsed_total{flight="shared_queries"}' in response.content
+    )
@@ -0,0 +1,64 @@
+from typing import Any
+from unittest import mock
+
+import pytest
+from aiogram.methods import SendMessage
+from aiogram.types import Update
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+
+from app.apps.core.bot.buttons import BUTTONS
+from app.apps.core.models import Place
+from app.apps.core.use_case import TEXT_USE_CASE
+from app.delivery.bot.dispatcher import bot, dispatcher
+from tests.fake_bot import FakeSession, callback_update, message_update
+
+pytestmark = pytest.mark.django_db
+
+LOCATION = {"latitude": 38.0500, "longitude": 46.3200}
+
+
+@pytest.fixture
+def session() -> Any:
+    call_command("loaddata", "text", verbosity=0)
+    TEXT_USE_CASE.clear()
+    BUTTONS.load()
+    Place.objects.create(name="Gate", group=1, latitude=38.0501, longitude=46.3201)
+    Place.objects.create(name="Library", group=2, latitude=38.0600, longitude=46.3300)
+    session = FakeSession()
+    with mock.patch.object(bot, "session", session):
+        yield session
+    TEXT_USE_CASE.clear()
+
+
+def feed(*updates: dict[str, Any]) -> None:
+    async def run() -> None:
+        for update in updates:
+            await dispatcher.feed_update(bot, Update.model_validate(update))
+
+    async_to_sync(run)()
+
+
+def test_shared_location_is_answered_with_places_of_all_groups(
+    session: FakeSession,
+) -> None:
+    feed(message_update(1, chat_id=200, location=LOCATION))
+
+    (answer,) = session.sent(SendMessage)
+    assert "Gate" in answer.text and "Library" in answer.text
+
+
+def test_location_requested_from_a_group_is_answered_with_its_places(
+    session: FakeSession,
+) -> None:
+    feed(
+        callback_update(1, chat_id=201, data="n:2"),
+        message_update(2, chat_id=201, location=LOCATION),
+        # The group only applies to the requested location
+        message_update(3, chat_id=201, location=LOCATION),
+    )
+
+    request, group_answer, answer = session.sent(SendMessage)
+    assert request.reply_markup.keyboard[0][0].request_location
+    assert "Library" in group_answer.text and "Gate" not in group_answer.text
+    assert "Gate" in answer.text
@@ -0,0 +1,25 @@
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.apps.core.models import Place
+from app.apps.core.use_case import PLACE_USE_CASE
+
+pytestmark = pytest.mark.django_db
+
+
+def test_index_is_loaded_once_and_dropped_on_change(
+    django_assert_num_queries: Any,
+) -> None:
+    gate = Place.objects.create(name="Gate", group=1, latitude=38.0632, longitude=46.3307)
+
+    with django_assert_num_queries(1):
+        async_to_sync(PLACE_USE_CASE.aload)()
+        index = async_to_sync(PLACE_USE_CASE.aget_index)()
+    assert index.by_group == {1: (gate,)}
+
+    Place.objects.create(name="Food", group=2, latitude=38.0600, longitude=46.3290)
+    index = async_to_sync(PLACE_USE_CASE.aget_index)()
+    assert [_.place.name for _ in index.nearest(38.06, 46.329, k=2)] == ["Food", "Gate"]
+    PLACE_USE_CASE.invalidate()
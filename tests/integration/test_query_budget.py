@@ -0,0 +1,167 @@
+"""
+Query budgets of the bot's handlers: how many queries each one makes on a cold start
+(empty caches) and once warm, and that none of them scans a table to filter it
+or blocks the event loop.
+"""
+from typing import Any, Callable
+from unittest import mock
+
+import pytest
+from aiogram.types import Update
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.apps.core.bot import keyboards
+from app.apps.core.bot.buttons import BUTTONS
+from app.apps.core.bot.handlers import SHARED_QUERIES
+from app.apps.core.models import Link, Phone, Place
+from app.apps.core.use_case import (
+    CORE_USE_CASE,
+    COURSE_USE_CASE,
+    PLACE_USE_CASE,
+    TEXT_USE_CASE,
+)
+from app.delivery.bot.dispatcher import LOOP_MONITOR, bot, dispatcher
+from tests.fake_bot import FakeSession, callback_update, command_update, message_update
+
+pytestmark = pytest.mark.django_db
+
+CHAT_ID = 300
+LOCATION = {"latitude": 38.0632, "longitude": 46.3307}
+
+Updates = Callable[[], list[dict[str, Any]]]
+
+
+def button(name: str) -> Updates:
+    return lambda: [message_update(1, CHAT_ID, text=BUTTONS[name])]
+
+
+def callback(data: Any) -> Updates:
+    return lambda: [callback_update(1, CHAT_ID, data=data.pack())]
+
+
+# Handler: (its updates, queries on a cold start, queries once warm)
+BUDGETS: dict[str, tuple[Updates, int, int]] = {
+    "start": (lambda: [command_update(1, CHAT_ID, "/start")], 1, 0),
+    "freshman": (button(keyboards.MainKeyboard.freshman_button), 1, 0),
+    "freshman_menu": (callback(keyboards.FreshmanKeyboard.Callback(mode="menu")), 1, 0),
+    "freshman_register": (
+        callback(keyboards.FreshmanKeyboard.Callback(mode="register")),
+        1,
+        0,
+    ),
+    "back_main_menu": (callback(keyboards.MainKeyboard.Callback()), 1, 0),
+    "back_main_menu_button": (button(keyboards.MainKeyboard.back_button), 1, 0),
+    "courses": (button(keyboards.MainKeyboard.course_button), 1, 0),
+    "courses_by_semester": (
+        callback(keyboards.CourseKeyboard.CoursesFilterCallback(filter_by="semester")),
+        1,
+        0,
+    ),
+    "semester_courses": (
+        callback(
+            keyboards.CourseKeyboard.CoursesFilterCallback(filter_by="semester", value=1)
+        ),
+        3,
+        0,
+    ),
+    "course_details": (
+        callback(keyboards.CourseKeyboard.CourseCallback(filter_by="semester", id=3)),
+        3,
+        0,
+    ),
+    "places": (button(keyboards.MainKeyboard.place_button), 1, 0),
+    "group_places": (callback(keyboards.PlaceKeyboard.GroupCallback(group=1)), 2, 0),
+    # Looked up in the places index
+    "place": (callback(keyboards.PlaceKeyboard.LocationCallback(id=1)), 2, 0),
+    "nearest_places": (callback(keyboards.PlaceKeyboard.NearestCallback(group=1)), 1, 0),
+    "shared_location": (lambda: [message_update(1, CHAT_ID, location=LOCATION)], 2, 0),
+    "phones": (button(keyboards.MainKeyboard.phone_button), 2, 1),
+    "links": (button(keyboards.MainKeyboard.link_button), 2, 1),
+    "about": (button(keyboards.MainKeyboard.about_button), 1, 0),
+}
+
+
+@pytest.fixture
+def session() -> Any:
+    call_command(
+        "loaddata", "text", "course", "prerequisite_course", "place", verbosity=0
+    )
+    Phone.objects.create(name="Office", phone_number="041-1")
+    Link.objects.create(name="Website", address="https://tabrizu.ac.ir")
+    BUTTONS.load()
+    async_to_sync(CORE_USE_CASE.aload_users)()
+    session = FakeSession()
+    with mock.patch.object(bot, "session", session):
+        yield session
+    clear_caches()
+
+
+def clear_caches() -> None:
+    TEXT_USE_CASE.clear()
+    COURSE_USE_CASE.invalidate()
+    PLACE_USE_CASE.invalidate()
+    keyboards.MARKUPS.clear()
+    SHARED_QUERIES.forget()
+
+
+def feed(updates: list[dict[str, Any]]) -> list[str]:
+    async def run() -> None:
+        for update in updates:
+            await dispatcher.feed_update(bot, Update.model_validate(update))
+
+    with CaptureQueriesContext(connection) as queries:
+        async_to_sync(run)()
+    return [query["sql"] for query in queries.captured_queries]
+
+
+def full_scans(sql: str) -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall() if row[-1].startswith("SCAN")]
+
+
+@pytest.mark.parametrize("handler", BUDGETS)
+def test_handler_stays_within_its_query_budget(
+    session: FakeSession, handler: str
+) -> None:
+    updates, cold_budget, warm_budget = BUDGETS[handler]
+    clear_caches()
+
+    cold = feed(updates())
+    # Warmed up like on startup
+    TEXT_USE_CASE.load()
+    async_to_sync(COURSE_USE_CASE.aload)()
+    async_to_sync(PLACE_USE_CASE.aload)()
+    warm = feed(updates())
+
+    assert session.requests, "The handler didn't answer"
+    assert len(cold) <= cold_budget, cold
+    assert len(warm) <= warm_budget, warm
+    # Whole tables are only loaded into caches, a filtered query must use an index
+    for sql in cold + warm:
+        if " WHERE " in sql:
+            assert not full_scans(sql), sql
+
+
+@pytest.mark.parametrize("handler", BUDGETS)
+def test_handler_does_not_block_the_event_loop(
+    session: FakeSession, handler: str
+) -> None:
+    updates = BUDGETS[handler][0]()
+    clear_caches()
+
+    async def run() -> None:
+        await LOOP_MONITOR.start()
+        try:
+            for update in updates:
+                await dispatcher.feed_update(bot, Update.model_validate(update))
+        finally:
+            await LOOP_MONITOR.stop()
+
+    # Fails with `EventLoopBlocked` when a synchronous call blocks the loop
+    with mock.patch.object(LOOP_MONITOR, "strict", True):
+        async_to_sync(run)()
+    assert session.requests, "The handler didn't answer"
@@ -0,0 +1,105 @@
+import asyncio
+import sqlite3
+from typing import Any, Callable
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+
+from app.apps.core.models import Text
+from app.apps.core.read_pool import ReadPool, SQLiteReadPool, create_read_pool
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def database(file_database: Callable[[str], str]) -> str:
+    # The tests' in-memory database can't be shared by the pool
+    alias = file_database("reads")
+    with connections[alias].schema_editor() as editor:
+        editor.create_model(Text)
+    Text.objects.using(alias).bulk_create(
+        [
+            Text(name="ABOUT", text="About us", is_button=False),
+            Text(name="ABOUT", text="About", is_button=True),
+        ]
+    )
+    return alias
+
+
+def test_pool_runs_concurrent_reads_on_its_own_connections(database: str) -> None:
+    pool = SQLiteReadPool(database, size=2)
+
+    async def run() -> list[Any]:
+        try:
+            return await asyncio.gather(
+                *(
+                    pool.afetch(
+                        Text.objects.filter(name="ABOUT").values_list("text", "is_button")
+                    )
+                    for _ in range(20)
+                ),
+                pool.ainstances(Text.objects.filter(is_button=True)),
+                pool.afetch(Text.objects.filter(name__in=[]).values_list("text")),
+            )
+        finally:
+            await pool.close()
+
+    *rows, buttons, empty = async_to_sync(run)()
+
+    # The rows are converted like Django's, e.g. `is_button` is a `bool`
+    assert rows == [[("About us", False), ("About", True)]] * 20
+    assert [(text.name, text.text, text.is_button) for text in buttons] == [
+        ("ABOUT", "About", True)
+    ]
+    assert empty == []
+
+
+def test_pool_connections_are_read_only(database: str) -> None:
+    pool = SQLiteReadPool(database, size=1)
+
+    async def run() -> None:
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                await pool._aexecute("DELETE FROM text", [])
+            assert await pool.afetch(Text.objects.values_list("name")) == [
+                ("ABOUT",),
+                ("ABOUT",),
+            ]
+        finally:
+            await pool.close()
+
+    async_to_sync(run)()
+
+
+def test_connections_of_cancelled_queries_are_closed(database: str) -> None:
+    pool = SQLiteReadPool(database, size=1)
+
+    async def run() -> None:
+        try:
+            await pool.afetch(Text.objects.values_list("name"))
+            [connection] = pool._idle
+            with mock.patch.object(
+                connection, "execute", side_effect=asyncio.CancelledError
+            ):
+                with pytest.raises(asyncio.CancelledError):
+                    await pool.afetch(Text.objects.values_list("name"))
+            assert not pool._idle
+            assert connection._connection is None
+            assert len(await pool.afetch(Text.objects.values_list("name"))) == 2
+        finally:
+            await pool.close()
+
+    async_to_sync(run)()
+
+
+def test_in_memory_database_is_read_on_django_connection() -> None:
+    Text.objects.create(name="ABOUT", text="About us", is_button=False)
+    pool = create_read_pool(size=4)
+    assert isinstance(pool, SQLiteReadPool)
+    assert type(create_read_pool(size=0)) is ReadPool
+
+    rows = async_to_sync(pool.afetch)(Text.objects.values_list("text"))
+
+    assert rows == [("About us",)]
@@ -0,0 +1,86 @@
+from typing import Any
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.apps.core.models import TGUser
+from app.apps.core.use_case import CoreUseCase
+
+pytestmark = pytest.mark.django_db
+
+
+def test_known_users_are_answered_from_memory(django_assert_num_queries: Any) -> None:
+    TGUser.objects.create(id=1, username="ali", full_name="Ali")
+    core_use_case = CoreUseCase()
+    async_to_sync(core_use_case.aload_users)()
+
+    with django_assert_num_queries(0):
+        assert not async_to_sync(core_use_case.register_bot_user)(1, "ali", "Ali")
+        assert async_to_sync(core_use_case.register_bot_user)(2, None, "Reza")
+        assert not async_to_sync(core_use_case.register_bot_user)(2, "reza", "Reza")
+        assert not async_to_sync(core_use_case.register_bot_user)(1, "ali", "Ali A.")
+
+    with django_assert_num_queries(1):
+        assert async_to_sync(core_use_case.flush)() == 2
+    assert async_to_sync(core_use_case.flush)() == 0
+
+    assert list(TGUser.objects.order_by("id").values_list("username", "full_name")) == [
+        ("ali", "Ali A."),
+        ("reza", "Reza"),
+    ]
+
+
+def test_reloads_keep_queued_users() -> None:
+    core_use_case = CoreUseCase()
+    async_to_sync(core_use_case.aload_users)()
+    assert async_to_sync(core_use_case.register_bot_user)(1, "ali", "Ali")
+
+    async_to_sync(core_use_case.aload_users)()
+    assert not async_to_sync(core_use_case.register_bot_user)(1, "ali", "Ali")
+    assert async_to_sync(core_use_case.flush)() == 1
+
+
+def test_refresh_applies_only_deactivations(django_assert_num_queries: Any) -> None:
+    TGUser.objects.bulk_create(
+        TGUser(id=user_id, full_name=f"User {user_id}") for user_id in range(1, 4)
+    )
+    core_use_case = CoreUseCase()
+    async_to_sync(core_use_case.aload_users)()
+    assert not async_to_sync(core_use_case.register_bot_user)(3, None, "User 3!")
+
+    TGUser.objects.filter(id__in=[2, 3]).update(is_active=False)
+    with django_assert_num_queries(1):
+        async_to_sync(core_use_case.arefresh_active)()
+
+    # The queued profile of the user 3 is newer, so it is kept
+    assert async_to_sync(core_use_case.register_bot_user)(4, None, "User 4")
+    assert async_to_sync(core_use_case.flush)() == 2
+    assert not async_to_sync(core_use_case.register_bot_user)(1, None, "User 1")
+    assert not async_to_sync(core_use_case.register_bot_user)(2, None, "User 2")
+    assert async_to_sync(core_use_case.flush)() == 1
+    assert TGUser.objects.filter(is_active=True).count() == 4
+
+
+def test_flush_on_size_and_on_stop() -> None:
+    async def run() -> None:
+        core_use_case = CoreUseCase(flush_size=2)
+        await core_use_case.start(interval=60)
+        await core_use_case.register_bot_user(1, None, "Ali")
+        await core_use_case.register_bot_user(2, None, "Reza")
+        await core_use_case.register_bot_user(3, None, "Sara")
+        await core_use_case.stop()
+
+    async_to_sync(run)()
+    assert TGUser.objects.count() == 3
+
+
+def test_failed_flush_keeps_queued_users() -> None:
+    core_use_case = CoreUseCase()
+    async_to_sync(core_use_case.register_bot_user)(1, None, "Ali")
+
+    with mock.patch.object(TGUser.objects, "abulk_create", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            async_to_sync(core_use_case.flush)()
+
+    assert async_to_sync(core_use_case.flush)() == 1
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from asgiref.sync import async_to_sync
+
+from app.delivery.bot.throttling import Priority, SendScheduler, send_priority
+
+Scenario = Callable[[Bot, "FakeBotAPI"], Awaitable[None]]
+
+
+class FakeBotAPI:
+    """
+    A local Bot API server that records the chats messages are sent to.
+    """
+
+    def __init__(self) -> None:
+        self.chats: list[int] = []
+        # Chats that are answered with `retry_after` once
+        self.flooded: set[int] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        chat_id = int(str(data["chat_id"]))
+        self.chats.append(chat_id)
+        if chat_id in self.flooded:
+            self.flooded.discard(chat_id)
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": len(self.chats),
+                    "date": 0,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": str(data["text"]),
+                },
+            }
+        )
+
+
+def run(scheduler: SendScheduler, scenario: Scenario) -> FakeBotAPI:
+    api = FakeBotAPI()
+
+    async def main() -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", api.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")
+        )
+        session.middleware(scheduler)
+        bot = Bot("42:TEST", session=session)
+        try:
+            await scenario(bot, api)
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    async_to_sync(main)()
+    return api
+
+
+def make_scheduler(**kwargs: Any) -> SendScheduler:
+    return SendScheduler(
+        **{"rate": 1000, "chat_rate": 1000, "chat_burst": 1, "group_rate": 1000, **kwargs}
+    )
+
+
+def test_global_rate_is_enforced() -> None:
+    async def scenario(bot: Bot, _: FakeBotAPI) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(bot.send_message(chat_id, "Hi") for chat_id in range(1, 21))
+        )
+        # The bucket starts with `rate` tokens, so the rest wait for 1 / rate each
+        assert time.perf_counter() - started >= 0.9
+
+    api = run(make_scheduler(rate=10), scenario)
+    assert sorted(api.chats) == list(range(1, 21))
+
+
+def test_chat_rate_does_not_delay_other_chats() -> None:
+    async def scenario(bot: Bot, _: FakeBotAPI) -> None:
+        busy = asyncio.gather(*(bot.send_message(1, str(index)) for index in range(3)))
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await bot.send_message(2, "Hi")
+        assert time.perf_counter() - started < 0.1
+        await busy
+        assert time.perf_counter() - started >= 0.3
+
+    api = run(make_scheduler(chat_rate=5), scenario)
+    assert api.chats == [1, 2, 1, 1]
+
+
+def test_interactive_replies_overtake_bulk_messages() -> None:
+    async def scenario(bot: Bot, _: FakeBotAPI) -> None:
+        with send_priority(Priority.BULK):
+            bulk = [
+                asyncio.create_task(bot.send_message(chat_id, "News"))
+                for chat_id in range(1, 6)
+            ]
+        await asyncio.sleep(0.01)
+        await bot.send_message(100, "Reply")
+        await asyncio.gather(*bulk)
+
+    # The first bulk message takes the only token, the reply is next in line
+    api = run(make_scheduler(rate=20, burst=1), scenario)
+    assert api.chats.index(100) == 1
+
+
+def test_retry_after_pauses_the_chat_and_retries() -> None:
+    scheduler = make_scheduler()
+
+    async def scenario(bot: Bot, api: FakeBotAPI) -> None:
+        api.flooded.add(1)
+        started = time.perf_counter()
+        message = await bot.send_message(1, "Hi")
+        assert message.chat.id == 1
+        assert time.perf_counter() - started >= 1
+
+    api = run(scheduler, scenario)
+    assert api.chats == [1, 1]
+    assert scheduler.retries == 1
@@ -0,0 +1,77 @@
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.apps.core.models import Text
+from app.apps.core.use_case import TEXT_USE_CASE, TextUseCase
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(name="text_use_case")
+def fixture_text_use_case() -> TextUseCase:
+    Text.objects.create(name="GREETING", is_button=False, text="Hello {name}!")
+    Text.objects.create(name="GREETING", is_button=True, text="Hi")
+    return TextUseCase()
+
+
+def test_warm_cache_serves_texts_without_queries(
+    text_use_case: TextUseCase, django_assert_num_queries: Any
+) -> None:
+    async_to_sync(text_use_case.aload)()
+
+    with django_assert_num_queries(0):
+        assert (
+            async_to_sync(text_use_case.aget_text)("GREETING", name="Ali") == "Hello Ali!"
+        )
+        assert text_use_case.get_text("GREETING", is_button=True) == "Hi"
+        assert text_use_case.get_text("MISSING") == ""
+
+    # Texts that don't exist aren't hits, even though they cost no query
+    assert text_use_case.cache_info() == (2, 1, 2)
+
+
+def test_cold_cache_queries_each_key_once(
+    text_use_case: TextUseCase, django_assert_num_queries: Any
+) -> None:
+    with django_assert_num_queries(3):
+        for _ in range(3):
+            assert text_use_case.get_text("GREETING", is_button=True) == "Hi"
+            assert text_use_case.get_text("MISSING") == ""
+            assert async_to_sync(text_use_case.aget_text)("GREETING", name="Ali") == (
+                "Hello Ali!"
+            )
+
+    assert text_use_case.cache_info() == (6, 3, 3)
+
+
+def test_signals_keep_cache_fresh() -> None:
+    text = Text.objects.create(name="farewell", is_button=False, text=" Bye ")
+    assert TEXT_USE_CASE.get_text("FAREWELL") == "Bye"
+
+    text.text = "Goodbye"
+    text.save()
+    assert TEXT_USE_CASE.get_text("FAREWELL") == "Goodbye"
+
+    TEXT_USE_CASE.load()
+    text.delete()
+    assert TEXT_USE_CASE.get_text("FAREWELL") == ""
+    TEXT_USE_CASE.clear()
+
+
+def test_bulk_lookup_fetches_missing_texts_in_one_query(
+    text_use_case: TextUseCase, django_assert_num_queries: Any
+) -> None:
+    Text.objects.create(name="ITEM", is_button=False, text="- {name}")
+
+    with django_assert_num_queries(1):
+        texts = async_to_sync(text_use_case.aget_texts)("GREETING", "ITEM", "MISSING")
+        texts = async_to_sync(text_use_case.aget_texts)("GREETING", "ITEM", "MISSING")
+
+    assert [texts["ITEM"].render(name=name) for name in ("a", "b")] == ["- a", "- b"]
+    assert texts["MISSING"].render() == ""
+    assert text_use_case.cache_info() == (3, 3, 3)
+
+    with django_assert_num_queries(1):
+        assert text_use_case.get_texts("ITEM", is_button=True)["ITEM"].render() == ""
@@ -0,0 +1,86 @@
+from typing import Any, Iterator
+from unittest import mock
+
+import pytest
+from aiogram.types import Update
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+
+from app.apps.core.bot.buttons import BUTTONS
+from app.apps.core.tracing import TRACER, Trace, TraceExporter
+from app.apps.core.use_case import TEXT_USE_CASE
+from app.delivery.bot.dispatcher import bot, dispatcher
+from app.delivery.bot.tracing import BotApiTracing, UpdateTracing
+from tests.fake_bot import FakeSession, command_update
+
+pytestmark = pytest.mark.django_db
+
+
+class ListExporter(TraceExporter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.traces: list[Trace] = []
+
+    def write(self, trace: Trace) -> None:
+        self.traces.append(trace)
+
+
+@pytest.fixture
+def exporter() -> Iterator[ListExporter]:
+    call_command("loaddata", "text", verbosity=0)
+    TEXT_USE_CASE.clear()
+    BUTTONS.load()
+    exporter = ListExporter()
+    session = FakeSession()
+    session.middleware(BotApiTracing())
+    tracing = UpdateTracing()
+    dispatcher.update.outer_middleware(tracing)
+    dispatcher.message.middleware(tracing)
+    with mock.patch.object(bot, "session", session), mock.patch.multiple(
+        TRACER, exporter=exporter, sample_rate=1.0
+    ):
+        yield exporter
+    dispatcher.update.outer_middleware.unregister(tracing)
+    dispatcher.message.middleware.unregister(tracing)
+    TEXT_USE_CASE.clear()
+
+
+def test_update_is_traced_down_to_queries_and_requests(
+    exporter: ListExporter,
+) -> None:
+    update = Update.model_validate(command_update(1, chat_id=500, command="/start"))
+
+    async_to_sync(dispatcher.feed_update)(bot, update)
+    exporter.close()
+
+    [trace] = exporter.traces
+    spans = {span.span_id: span for span in trace.spans}
+
+    def path(name: str) -> list[str]:
+        span: Any = next(span for span in trace.spans if span.name == name)
+        names = []
+        while span is not None:
+            names.append(span.name)
+            span = spans.get(span.parent_id)
+        return names[::-1]
+
+    assert trace.spans[0].attributes == {"update_id": 1, "update_type": "message"}
+    handler = ["update", "handler start_message_handler"]
+    assert path("CoreUseCase.register_bot_user") == [
+        *handler,
+        "CoreUseCase.register_bot_user",
+    ]
+    assert path("bot.getMyName") == [*handler, "bot.getMyName"]
+    assert path("bot.sendMessage") == [*handler, "bot.sendMessage"]
+    assert path("TextUseCase.aget_texts") == [
+        *handler,
+        "TextUseCase.aget_text",
+        "TextUseCase.aget_texts",
+    ]
+    assert path("db.query") == [
+        *handler,
+        "TextUseCase.aget_text",
+        "TextUseCase.aget_texts",
+        "db.query",
+    ]
+    assert all(span.duration > 0 for span in trace.spans)
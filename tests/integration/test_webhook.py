@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+from aiogram.methods import SendMessage
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient
+
+from app.apps.core.models import TGUser
+from app.config.bot import WEBHOOK_PATH, RunningMode
+from app.delivery.bot.dispatcher import bot
+from app.delivery.bot.webhook import WEBHOOK, Webhook
+from tests.fake_bot import FakeSession, command_update
+
+pytestmark = pytest.mark.django_db
+
+SECRET = "secret"
+
+# A `/start` update as it is sent by Telegram
+START_UPDATE = command_update(1, chat_id=100, command="/start")
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> Any:
+    session = FakeSession()
+    with mock.patch.object(bot, "session", session):
+        with mock.patch("app.delivery.bot.webhook.WEBHOOK_SECRET", SECRET):
+            with mock.patch.object(WEBHOOK, "lock_path", tmp_path / "webhook.lock"):
+                yield session
+
+
+def post(update: Any, secret: str = SECRET) -> Any:
+    async def run() -> Any:
+        try:
+            return await AsyncClient().post(
+                f"/{WEBHOOK_PATH}",
+                update,
+                content_type="application/json",
+                headers={"X-Telegram-Bot-Api-Secret-Token": secret},
+            )
+        finally:
+            await WEBHOOK.shutdown()
+
+    return async_to_sync(run)()
+
+
+def test_update_is_handled(session: FakeSession) -> None:
+    call_command("loaddata", "text", verbosity=0)
+
+    response = post(START_UPDATE)
+
+    assert response.status_code == 200
+    assert not WEBHOOK.started
+    (send_message,) = session.sent(SendMessage)
+    assert send_message.chat_id == 100
+    assert "Ali" in send_message.text
+    # Queued registrations are saved on shutdown
+    assert TGUser.objects.filter(id=100, username="ali").exists()
+
+
+def test_update_with_wrong_secret_is_rejected(session: FakeSession) -> None:
+    assert post(START_UPDATE, secret="wrong").status_code == 403
+    assert not session.requests
+
+
+def test_invalid_update_is_rejected(session: FakeSession) -> None:
+    assert post({"message": "not an update"}).status_code == 400
+    assert not session.requests
+
+
+def test_webhook_is_disabled_without_secret(session: FakeSession) -> None:
+    with mock.patch("app.delivery.bot.webhook.WEBHOOK_SECRET", ""):
+        assert post(START_UPDATE).status_code == 404
+
+
+def test_lifespan_shuts_the_webhook_down(session: FakeSession) -> None:
+    from app.delivery.web.asgi import application
+
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent: list[Any] = []
+
+    async def receive() -> Any:
+        return messages.pop(0)
+
+    async def send(message: Any) -> None:
+        sent.append(message)
+
+    async def run() -> None:
+        await WEBHOOK.startup()
+        await application({"type": "lifespan"}, receive, send)
+
+    async_to_sync(run)()
+    assert not WEBHOOK.started
+    assert [_["type"] for _ in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_only_one_worker_handles_updates(session: FakeSession) -> None:
+    from app.delivery.web.asgi import application
+
+    other_worker = Webhook(WEBHOOK.lock_path)
+    other_worker.acquire()
+    sent: list[Any] = []
+
+    async def receive() -> Any:
+        return {"type": "lifespan.startup"}
+
+    async def send(message: Any) -> None:
+        sent.append(message)
+
+    with mock.patch("app.delivery.web.asgi.RUNNING_MODE", RunningMode.WEBHOOK):
+        async_to_sync(application)({"type": "lifespan"}, receive, send)
+    assert [_["type"] for _ in sent] == ["lifespan.startup.failed"]
+    assert "needs a single web worker" in sent[0]["message"]
+
+    other_worker.release()
+    WEBHOOK.acquire()
+    WEBHOOK.release()
@@ -0,0 +1,148 @@
+"""
+Benchmark of packing, unpacking and routing callback data: aiogram's `CallbackData`
+with the old prefixes and fields against `CompactCallback` routed by prefix.
+
+Run it with `python -m tests.load.bench_callbacks`.
+"""
+import asyncio
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import F
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery, Chat, Message, User
+
+from tests.load import database  # noqa: F401  # pylint: disable=unused-import
+
+from app.apps.core.bot.callbacks import CallbackObserver, decode_callback  # isort: skip
+from app.apps.core.bot.handlers import router  # isort: skip
+from app.apps.core.bot.keyboards import PlaceKeyboard  # isort: skip
+
+
+class OldMain(CallbackData, prefix="main_menu"):
+    pass
+
+
+class OldFreshman(CallbackData, prefix="freshman"):
+    mode: str
+
+
+class OldCoursesFilter(CallbackData, prefix="courses"):
+    filter_by: Optional[str] = None
+    value: Optional[int] = None
+
+
+class OldCourse(CallbackData, prefix="course"):
+    filter_by: str
+    id: int
+
+
+class OldPlace(CallbackData, prefix="place"):
+    pass
+
+
+class OldGroup(CallbackData, prefix="place"):
+    group: int
+
+
+class OldLocation(CallbackData, prefix="place"):
+    latitude: float
+    longitude: float
+
+
+class OldNearest(CallbackData, prefix="nearest"):
+    group: Optional[int] = None
+
+
+async def handle() -> None:
+    pass
+
+
+# The callback query handlers, in the order they were tried
+OLD_HANDLERS = [
+    HandlerObject(callback=handle, filters=[FilterObject(callback_filter)])
+    for callback_filter in (
+        OldMain.filter(),
+        OldFreshman.filter(F.mode == "menu"),
+        OldFreshman.filter(F.mode == "register"),
+        OldCoursesFilter.filter(),
+        OldCourse.filter(),
+        OldLocation.filter(),
+        OldGroup.filter(),
+        OldPlace.filter(),
+        OldNearest.filter(),
+    )
+]
+
+
+def query(data: str) -> CallbackQuery:
+    user = User(id=1, is_bot=False, first_name="User")
+    return CallbackQuery(
+        id="1",
+        from_user=user,
+        chat_instance="1",
+        data=data,
+        message=Message(
+            message_id=1, date=datetime.now(), chat=Chat(id=1, type="private")
+        ),
+    )
+
+
+async def old_route(event: CallbackQuery) -> Any:
+    for handler in OLD_HANDLERS:
+        if (await handler.check(event))[0]:
+            return handler
+    return None
+
+
+async def new_route(event: CallbackQuery) -> Any:
+    # What `CallbackDecoder` and `CallbackObserver` do
+    assert event.data is not None and isinstance(router.callback_query, CallbackObserver)
+    data = {"callback_data": decode_callback(event.data)}
+    for handler in router.callback_query.candidates(data["callback_data"]):
+        if (await handler.check(event, **data))[0]:
+            return handler
+    return None
+
+
+async def time_routes(
+    route: Callable[[CallbackQuery], Awaitable[Any]], event: CallbackQuery, number: int
+) -> float:
+    assert await route(event)
+    started = time.perf_counter()
+    for _ in range(number):
+        await route(event)
+    return time.perf_counter() - started
+
+
+def main(number: int = 20_000) -> None:
+    old = OldLocation(latitude=38.0632811, longitude=46.3306451)
+    new = PlaceKeyboard.LocationCallback(id=1234)
+    print(f"{'old data':>20}: {old.pack()!r}, {len(old.pack())} bytes")
+    print(f"{'new data':>20}: {new.pack()!r}, {len(new.pack())} bytes")
+
+    old_packed, new_packed = old.pack(), new.pack()
+    assert OldLocation.unpack(old_packed) == old and decode_callback(new_packed) == new
+    for name, statement in (
+        ("old pack", old.pack),
+        ("new pack", new.pack),
+        ("old unpack", lambda: OldLocation.unpack(old_packed)),
+        ("new unpack", lambda: decode_callback(new_packed)),
+    ):
+        seconds = min(timeit.repeat(statement, number=number, repeat=5))
+        print(f"{name:>20}: {seconds / number * 1e6:.3f} µs")
+
+    # The place callbacks were among the last ones tried
+    for name, route, event in (
+        ("old route", old_route, query(old_packed)),
+        ("new route", new_route, query(new_packed)),
+    ):
+        seconds = asyncio.run(time_routes(route, event, number))
+        print(f"{name:>20}: {seconds / number * 1e6:.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of nearest-place lookups over tens of thousands of synthetic places.
+
+Run it with `python -m tests.load.bench_nearest_places`.
+"""
+import random
+import statistics
+import time
+
+from app.apps.core.geo import PlaceIndex, haversine
+from app.apps.core.models import Place
+
+# Roughly the area around the University of Tabriz
+LATITUDE = (37.95, 38.15)
+LONGITUDE = (46.20, 46.45)
+
+
+def main(places_count: int = 50_000, queries_count: int = 2_000, k: int = 5) -> None:
+    generator = random.Random(0)
+    places = [
+        Place(
+            id=index,
+            name=f"Place {index}",
+            group=generator.randint(1, 7),
+            latitude=generator.uniform(*LATITUDE),
+            longitude=generator.uniform(*LONGITUDE),
+        )
+        for index in range(places_count)
+    ]
+    queries = [
+        (generator.uniform(*LATITUDE), generator.uniform(*LONGITUDE))
+        for _ in range(queries_count)
+    ]
+
+    started = time.perf_counter()
+    index = PlaceIndex.build(places)
+    print(
+        f"Built index of {places_count} places in {time.perf_counter() - started:.2f} s"
+    )
+
+    for group in (None, 1):
+        durations = []
+        for latitude, longitude in queries:
+            started = time.perf_counter()
+            index.nearest(latitude, longitude, k=k, group=group)
+            durations.append(time.perf_counter() - started)
+        durations.sort()
+        print(
+            f"k={k} group={group}: "
+            f"mean {statistics.mean(durations) * 1e3:.3f} ms, "
+            f"p99 {durations[int(len(durations) * 0.99)] * 1e3:.3f} ms"
+        )
+
+    latitude, longitude = queries[0]
+    started = time.perf_counter()
+    expected = sorted(
+        places,
+        key=lambda place: haversine(latitude, longitude, place.latitude, place.longitude),
+    )[:k]
+    print(f"Full scan with haversine: {(time.perf_counter() - started) * 1e3:.3f} ms")
+    assert [_.place for _ in index.nearest(latitude, longitude, k=k)] == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark of the bot's text lookups at 1, 10 and 100 concurrent updates:
+the ORM through `sync_to_async` against the aiosqlite `SQLiteReadPool`.
+
+Run it with `python -m tests.load.bench_read_pool`.
+"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import async_to_sync
+
+from tests.load.database import test_database
+
+from app.apps.core.models import Text  # isort: skip
+from app.apps.core.read_pool import SQLiteReadPool  # isort: skip
+
+NAMES = ("PHONES", "PHONE_TEMPLATE")
+
+Query = Callable[[], Awaitable[list[Any]]]
+
+
+async def orm_query() -> list[Any]:
+    return [
+        row
+        async for row in Text.objects.filter(name__in=NAMES, is_button=False).values_list(
+            "name", "text"
+        )
+    ]
+
+
+async def run(query: Query, queries_count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handle() -> None:
+        async with semaphore:
+            await query()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle() for _ in range(queries_count)))
+    return time.perf_counter() - started
+
+
+def main(texts_count: int = 500, queries_count: int = 5_000, pool_size: int = 4) -> None:
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        str(Path(directory) / "bench.sqlite3")
+    ):
+        Text.objects.bulk_create(
+            Text(name=f"TEXT_{index}", text="x" * 200, is_button=index % 2 == 0)
+            for index in range(texts_count)
+        )
+        Text.objects.bulk_create(
+            Text(name=name, text=name, is_button=False) for name in NAMES
+        )
+
+        async def benchmark() -> None:
+            pool = SQLiteReadPool(size=pool_size)
+
+            async def pool_query() -> list[Any]:
+                return await pool.afetch(
+                    Text.objects.filter(name__in=NAMES, is_button=False).values_list(
+                        "name", "text"
+                    )
+                )
+
+            assert sorted(await pool_query()) == sorted(await orm_query())
+            for concurrency in (1, 10, 100):
+                for label, query in (
+                    ("sync_to_async", orm_query),
+                    ("read pool", pool_query),
+                ):
+                    duration = await run(query, queries_count, concurrency)
+                    print(
+                        f"{label} x{concurrency}: {queries_count / duration:,.0f} queries/s"
+                    )
+            await pool.close()
+
+        async_to_sync(benchmark)()
+
+
+if __name__ == "__main__":
+    main()
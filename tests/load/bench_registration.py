@@ -0,0 +1,67 @@
+"""
+Benchmark of concurrent `/start` registrations: one `aupdate_or_create` per update
+against the write-behind `CoreUseCase` that flushes in bulk.
+
+Run it with `python -m tests.load.bench_registration`.
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+from asgiref.sync import async_to_sync
+
+from tests.load.database import test_database
+
+from app.apps.core.models import TGUser  # isort: skip
+from app.apps.core.use_case import CoreUseCase  # isort: skip
+
+Register = Callable[[int, Optional[str], str], Awaitable[object]]
+
+
+async def update_or_create(user_id: int, username: Optional[str], full_name: str) -> None:
+    await TGUser.objects.aupdate_or_create(
+        id=user_id,
+        defaults={"username": username, "full_name": full_name},
+    )
+
+
+async def run(register: Register, updates: list[int], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def start(user_id: int) -> None:
+        async with semaphore:
+            await register(user_id, f"user{user_id}", f"User {user_id}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(start(user_id) for user_id in updates))
+    return time.perf_counter() - started
+
+
+def main(
+    users_count: int = 2_000, updates_count: int = 10_000, concurrency: int = 100
+) -> None:
+    generator = random.Random(0)
+    updates = [generator.randrange(users_count) for _ in range(updates_count)]
+
+    with test_database():
+        duration = async_to_sync(run)(update_or_create, updates, concurrency)
+        print(f"aupdate_or_create: {updates_count / duration:,.0f} updates/s")
+
+        TGUser.objects.all().delete()
+
+        async def buffered() -> float:
+            core_use_case = CoreUseCase()
+            await core_use_case.aload_users()
+            duration = await run(core_use_case.register_bot_user, updates, concurrency)
+            started = time.perf_counter()
+            await core_use_case.flush()
+            return duration + time.perf_counter() - started
+
+        duration = async_to_sync(buffered)()
+        print(f"write-behind: {updates_count / duration:,.0f} updates/s")
+        assert TGUser.objects.count() == len(set(updates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Sets up Django against a throwaway test database for the benchmarks that hit the DB.
+"""
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.config.settings")
+django.setup()
+
+from django.db import connection, connections  # noqa: E402
+
+
+@contextmanager
+def test_database(name: Optional[str] = None) -> Iterator[None]:
+    """
+    Creates the tables in memory, or in the file `name` for SQLite.
+    """
+    connection.settings_dict["TEST"]["MIGRATE"] = False
+    connection.settings_dict["TEST"]["NAME"] = name
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    # The bot's reads go to the `read` database, make it the test database too
+    connections.settings["read"] = connection.settings_dict
+    connections["read"].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
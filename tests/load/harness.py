@@ -0,0 +1,217 @@
+"""
+Load test of the whole bot: synthetic users send realistic update streams (`/start`,
+main menu buttons, course and place callback chains) through the real dispatcher,
+with a fake Bot API session and a database loaded from the fixtures.
+
+Run it with `python -m tests.load.harness --users 500 --concurrency 50 --json report.json`
+and diff the JSON reports of two versions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from itertools import count
+from typing import Any, Iterator, Optional
+from unittest import mock
+
+from aiogram.types import Update
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+
+from tests.fake_bot import FakeSession, callback_update, command_update, message_update
+from tests.load.database import test_database
+
+# The bot's config requires a token, the harness never reaches the Bot API with it
+os.environ.setdefault("TG_TOKEN", "42:LOAD")
+
+from app.apps.core.bot import keyboards  # isort: skip
+from app.apps.core.bot.buttons import BUTTONS  # isort: skip
+from app.apps.core.models import Course, Place  # isort: skip
+from app.apps.core.use_case import CORE_USE_CASE  # isort: skip
+from app.delivery.bot.dispatcher import (  # isort: skip
+    SCHEDULER,
+    bot,
+    dispatcher,
+    on_shutdown,
+    on_startup,
+)
+
+# An update stream is a list of `(handler, update)`, sent one at a time like a user does
+Stream = list[tuple[str, dict[str, Any]]]
+
+MAIN_BUTTONS = (
+    keyboards.MainKeyboard.freshman_button,
+    keyboards.MainKeyboard.phone_button,
+    keyboards.MainKeyboard.link_button,
+    keyboards.MainKeyboard.about_button,
+)
+
+
+class StreamGenerator:
+    def __init__(self, seed: int) -> None:
+        self.random = random.Random(seed)
+        self.update_ids = count(1)
+        self.courses = {
+            semester: list(
+                Course.objects.filter(offering_semester=semester).values_list(
+                    "id", flat=True
+                )
+            )
+            for semester in range(1, 9)
+        }
+        self.places = list(Place.objects.all())
+
+    def user(self, chat_id: int) -> Stream:
+        stream = [("start", command_update(next(self.update_ids), chat_id, "/start"))]
+        for _ in range(self.random.randint(1, 4)):
+            stream += self.random.choice(
+                (self.course_chain, self.place_chain, self.main_button)
+            )(chat_id)
+        return stream
+
+    def main_button(self, chat_id: int) -> Stream:
+        name = self.random.choice(MAIN_BUTTONS)
+        return [(name.lower(), self.message(chat_id, text=BUTTONS[name]))]
+
+    def course_chain(self, chat_id: int) -> Stream:
+        semester = self.random.choice([key for key, ids in self.courses.items() if ids])
+        filters = keyboards.CourseKeyboard.CoursesFilterCallback
+        return [
+            (
+                "courses",
+                self.message(chat_id, text=BUTTONS[keyboards.MainKeyboard.course_button]),
+            ),
+            (
+                "courses_by_semester",
+                self.callback(chat_id, filters(filter_by="semester")),
+            ),
+            (
+                "semester_courses",
+                self.callback(chat_id, filters(filter_by="semester", value=semester)),
+            ),
+            (
+                "course_details",
+                self.callback(
+                    chat_id,
+                    keyboards.CourseKeyboard.CourseCallback(
+                        filter_by="semester",
+                        id=self.random.choice(self.courses[semester]),
+                    ),
+                ),
+            ),
+        ]
+
+    def place_chain(self, chat_id: int) -> Stream:
+        place = self.random.choice(self.places)
+        return [
+            (
+                "places",
+                self.message(chat_id, text=BUTTONS[keyboards.MainKeyboard.place_button]),
+            ),
+            (
+                "group_places",
+                self.callback(
+                    chat_id, keyboards.PlaceKeyboard.GroupCallback(group=place.group)
+                ),
+            ),
+            (
+                "place",
+                self.callback(
+                    chat_id,
+                    keyboards.PlaceKeyboard.LocationCallback(id=place.id),
+                ),
+            ),
+        ]
+
+    def message(self, chat_id: int, **fields: Any) -> dict[str, Any]:
+        return message_update(next(self.update_ids), chat_id, **fields)
+
+    def callback(self, chat_id: int, data: Any) -> dict[str, Any]:
+        return callback_update(next(self.update_ids), chat_id, data=data.pack())
+
+
+def percentiles(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) < 2:
+        latencies = latencies * 2
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * 1000, 3),
+        "p95": round(cuts[94] * 1000, 3),
+        "p99": round(cuts[98] * 1000, 3),
+    }
+
+
+async def run(streams: list[Stream], concurrency: int) -> dict[str, Any]:
+    latencies: defaultdict[str, list[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(stream: Stream) -> None:
+        async with semaphore:
+            for handler, update in stream:
+                started = time.perf_counter()
+                await dispatcher.feed_update(bot, Update.model_validate(update))
+                latencies[handler].append(time.perf_counter() - started)
+
+    await on_startup()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(send(stream) for stream in streams))
+    finally:
+        duration = time.perf_counter() - started
+        await on_shutdown()
+
+    updates_count = sum(map(len, latencies.values()))
+    return {
+        "updates": updates_count,
+        "concurrency": concurrency,
+        "seconds": round(duration, 3),
+        "updates_per_second": round(updates_count / duration, 1),
+        "handlers": {
+            handler: {"updates": len(values), **percentiles(values)}
+            for handler, values in sorted(latencies.items())
+        },
+    }
+
+
+def main(
+    users: int = 500, concurrency: int = 50, seed: int = 0, output: Optional[str] = None
+) -> dict[str, Any]:
+    with test_database():
+        call_command(
+            "loaddata", "text", "course", "prerequisite_course", "place", verbosity=0
+        )
+        BUTTONS.load()
+        generator = StreamGenerator(seed)
+        streams = [generator.user(chat_id) for chat_id in range(1, users + 1)]
+
+        session = FakeSession()
+        # Without the scheduler's workers, `feed_update` returns once the update is handled
+        with mock.patch.object(bot, "session", session), mock.patch.object(
+            SCHEDULER, "start"
+        ):
+            report = async_to_sync(run)(streams, concurrency)
+        report["bot_api_requests"] = len(session.requests)
+
+    if output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def parse_args(args: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50, help="users at once")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="output", help="write the report to this file")
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
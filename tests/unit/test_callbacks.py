@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import Any, Optional
+
+import pytest
+from aiogram import F, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import CallbackQuery, Chat, Message, User
+from asgiref.sync import async_to_sync
+
+from app.apps.core.bot.callbacks import (
+    CallbackRouter,
+    CompactCallback,
+    decode_callback,
+    pack_int,
+)
+from app.apps.core.bot.keyboards import CourseKeyboard, PlaceKeyboard
+
+
+class Page(CompactCallback, prefix="test_page"):
+    number: int
+    section: Optional[str] = None
+
+
+class Other(CompactCallback, prefix="test_other"):
+    pass
+
+
+def test_integers_are_packed_in_base_36() -> None:
+    for value in (0, 9, 35, 36, 100, -100, 10**12):
+        assert int(pack_int(value), 36) == value
+    assert Page(number=1295).pack() == "test_page:zz:"
+    assert Page(number=-1, section="a").pack() == "test_page:-1:a"
+
+
+@pytest.mark.parametrize(
+    "callback",
+    [
+        Page(number=71, section="news"),
+        Page(number=0),
+        CourseKeyboard.CourseCallback(filter_by="semester", id=123),
+        CourseKeyboard.CoursesFilterCallback(),
+        PlaceKeyboard.LocationCallback(id=100),
+        PlaceKeyboard.NearestCallback(group=None),
+    ],
+)
+def test_callbacks_are_decoded_by_their_prefix(callback: CompactCallback) -> None:
+    assert decode_callback(callback.pack()) == callback
+
+
+@pytest.mark.parametrize(
+    "data", ["unknown:1", "test_page", "test_page:1:a:b", "test_page:!:", "place:1"]
+)
+def test_unknown_or_malformed_callbacks_are_not_decoded(data: str) -> None:
+    assert decode_callback(data) is None
+
+
+def test_prefixes_are_unique() -> None:
+    with pytest.raises(ValueError, match="already used by Page"):
+
+        class Duplicate(CompactCallback, prefix="test_page"):
+            pass
+
+
+def test_only_the_handlers_of_the_decoded_type_are_tried() -> None:
+    router = CallbackRouter()
+
+    @router.callback_query(Page.filter(F.section == "news"))
+    async def news() -> None:
+        pass
+
+    @router.callback_query(F.data == "plain")
+    async def plain() -> None:
+        pass
+
+    @router.callback_query(Page.filter())
+    async def page() -> None:
+        pass
+
+    @router.callback_query(Other.filter())
+    async def other() -> None:
+        pass
+
+    def candidates(callback: Optional[CompactCallback]) -> list[str]:
+        observer = router.callback_query
+        assert hasattr(observer, "candidates")
+        return [handler.callback.__name__ for handler in observer.candidates(callback)]
+
+    assert candidates(Page(number=1)) == ["news", "plain", "page"]
+    assert candidates(Other()) == ["plain", "other"]
+    assert candidates(None) == ["plain"]
+    assert candidates(PlaceKeyboard.Callback()) == ["plain"]
+
+
+def test_filters_decode_the_data_on_plain_routers() -> None:
+    router = Router()
+
+    @router.callback_query(Page.filter(F.section == "news"))
+    async def news(query: CallbackQuery, callback_data: Page) -> int:
+        return callback_data.number
+
+    def route(data: str) -> Any:
+        query = CallbackQuery(
+            id="1",
+            from_user=User(id=1, is_bot=False, first_name="User"),
+            chat_instance="1",
+            data=data,
+            message=Message(
+                message_id=1, date=datetime.now(), chat=Chat(id=1, type="private")
+            ),
+        )
+        return async_to_sync(router.callback_query.trigger)(query)
+
+    assert route(Page(number=71, section="news").pack()) == 71
+    assert route(Page(number=71).pack()) is UNHANDLED
+    assert route(Other().pack()) is UNHANDLED
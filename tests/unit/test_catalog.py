@@ -0,0 +1,35 @@
+from app.apps.core.catalog import CourseCatalog
+from app.apps.core.models import Course
+
+
+def test_catalog_indexes() -> None:
+    algebra = Course(id=1, fa_title="Algebra", offering_semester=1, course_type=2)
+    physics = Course(id=2, fa_title="Physics", offering_semester=1, course_type=2)
+    thesis = Course(id=3, fa_title="Thesis", offering_semester=None, course_type=3)
+
+    catalog = CourseCatalog.build(
+        courses=[algebra, physics, thesis],
+        prerequisites=[(3, 1), (3, 2), (3, 404)],
+    )
+
+    assert catalog.by_id[2] is physics
+    assert catalog.by_semester == {1: (algebra, physics)}
+    assert catalog.by_type == {2: (algebra, physics), 3: (thesis,)}
+    assert catalog.prerequisite_courses(3) == (algebra, physics)
+    assert catalog.prerequisite_courses(1) == ()
+    assert not CourseCatalog().by_id
+
+
+def test_course_card_shows_both_chains() -> None:
+    catalog = CourseCatalog.build(
+        courses=[
+            Course(id=1, fa_title="First", course_type=2),
+            Course(id=2, fa_title="Second", course_type=2),
+            Course(id=3, fa_title="Third", course_type=2),
+        ],
+        prerequisites=[(2, 1), (3, 2)],
+    )
+
+    assert [_.fa_title for _ in catalog.prerequisite_chain(3)] == ["First", "Second"]
+    assert [_.fa_title for _ in catalog.unlocked_courses(1)] == ["Second", "Third"]
+    assert catalog.prerequisite_courses(3) == (catalog.by_id[2],)
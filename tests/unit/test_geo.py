@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from app.apps.core.geo import KDTree, PlaceIndex, chord_to_meters, haversine, to_point
+from app.apps.core.models import Place
+
+
+def test_chord_distance_matches_haversine() -> None:
+    a, b = to_point(38.0632, 46.3307), to_point(38.0580, 46.3290)
+    squared_chord = sum((i - j) ** 2 for i, j in zip(a, b))
+
+    assert chord_to_meters(squared_chord) == pytest.approx(
+        haversine(38.0632, 46.3307, 38.0580, 46.3290)
+    )
+    assert haversine(0, 0, 0, 180) == pytest.approx(20_015_115, rel=1e-6)
+
+
+def test_kd_tree_matches_brute_force() -> None:
+    generator = random.Random(42)
+    coordinates = [
+        (generator.uniform(-80, 80), generator.uniform(-180, 180)) for _ in range(500)
+    ]
+    tree = KDTree([to_point(*coordinate) for coordinate in coordinates])
+
+    for _ in range(50):
+        query = (generator.uniform(-80, 80), generator.uniform(-180, 180))
+        expected = sorted(
+            range(len(coordinates)),
+            key=lambda index: haversine(*query, *coordinates[index]),
+        )[:5]
+        assert [index for _, index in tree.nearest(to_point(*query), 5)] == expected
+
+    assert not KDTree([]).nearest(to_point(0, 0), 3)
+    assert len(tree) == 500
+
+
+def test_place_index_nearest_overall_and_per_group() -> None:
+    gate = Place(id=1, name="Gate", group=1, latitude=38.0632, longitude=46.3307)
+    food = Place(id=2, name="Food", group=2, latitude=38.0600, longitude=46.3290)
+    dorm = Place(id=3, name="Dorm", group=3, latitude=38.0500, longitude=46.3200)
+    index = PlaceIndex.build([gate, food, dorm])
+
+    nearest = index.nearest(38.0599, 46.3291, k=2)
+    assert [_.place for _ in nearest] == [food, gate]
+    assert nearest[0].distance == pytest.approx(14, abs=1)
+
+    assert [_.place for _ in index.nearest(38.0599, 46.3291, group=3)] == [dorm]
+    assert not index.nearest(38.0599, 46.3291, group=7)
+    assert index.by_group[1] == (gate,)
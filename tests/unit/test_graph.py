@@ -0,0 +1,36 @@
+from app.apps.core.graph import PrerequisiteGraph, find_cycle, find_path
+
+
+def test_graph_precomputes_chains_in_topological_order() -> None:
+    # 1 <- 2 <- 4, 1 <- 3 <- 4, 4 <- 5
+    graph = PrerequisiteGraph({2: [1], 3: [1], 4: [3, 2], 5: [4]})
+
+    assert graph.order == (1, 2, 3, 4, 5)
+    assert graph.cycle is None
+    assert graph.prerequisites(5) == (1, 2, 3, 4)
+    assert graph.prerequisites(1) == ()
+    assert graph.unlocks(1) == (2, 3, 4, 5)
+    assert graph.unlocks(5) == ()
+    assert graph.unlocks(404) == ()
+
+
+def test_graph_tolerates_cycles() -> None:
+    graph = PrerequisiteGraph({1: [2], 2: [3], 3: [1], 4: [1]})
+
+    assert graph.order == ()
+    assert graph.cycle == (1, 2, 3, 1)
+    assert graph.prerequisites(4) == (1, 2, 3)
+    assert graph.unlocks(3) == (1, 2, 4)
+
+
+def test_find_cycle() -> None:
+    assert find_cycle({1: [2], 2: [3], 3: []}) is None
+    assert find_cycle({1: [2, 3], 3: [4], 4: [3]}) == (3, 4, 3)
+    assert find_cycle({7: [7]}) == (7, 7)
+
+
+def test_find_path() -> None:
+    prerequisites = {1: [2, 3], 3: [4], 4: [3]}
+    assert find_path(prerequisites, 1, 4) == (1, 3, 4)
+    assert find_path(prerequisites, 3, 3) == (3,)
+    assert find_path(prerequisites, 4, 1) is None
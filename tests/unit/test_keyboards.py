@@ -0,0 +1,84 @@
+from aiogram.types import InlineKeyboardMarkup
+
+from app.apps.core.bot.keyboards import (
+    CourseKeyboard,
+    FreshmanKeyboard,
+    PlaceKeyboard,
+    right_to_left_markup,
+)
+from app.apps.core.models import Course, Place
+
+
+def callback_data(markup: InlineKeyboardMarkup) -> list[list[str | None]]:
+    return [[button.callback_data for button in row] for row in markup.inline_keyboard]
+
+
+def make_courses(count: int, **kwargs: int) -> list[Course]:
+    return [
+        Course(id=index, fa_title=f"Course {index}", **kwargs)
+        for index in range(1, count + 1)
+    ]
+
+
+def test_right_to_left_markup_swaps_pairs() -> None:
+    assert right_to_left_markup([1, 2, 3, 4, 5]) == [2, 1, 4, 3, 5]
+
+
+def test_freshman_keyboard() -> None:
+    assert callback_data(FreshmanKeyboard().as_markup()) == [
+        ["f:register"],
+        ["m"],
+    ]
+    assert callback_data(FreshmanKeyboard(back=True).as_markup()) == [["f:menu"]]
+
+
+def test_course_keyboard_by_semester() -> None:
+    assert callback_data(CourseKeyboard().as_markup()) == [
+        ["cs:semester:"],
+        ["cs:type:"],
+        ["m"],
+    ]
+    assert callback_data(CourseKeyboard(filter_by="semester").as_markup())[-1] == ["cs::"]
+    assert callback_data(
+        CourseKeyboard(filter_by="semester", courses=make_courses(3)).as_markup()
+    ) == [
+        ["c:semester:2", "c:semester:1"],
+        ["c:semester:3"],
+        ["cs:semester:"],
+    ]
+    assert callback_data(
+        CourseKeyboard(
+            filter_by="semester", course=make_courses(1, offering_semester=5)[0]
+        ).as_markup()
+    ) == [["cs:semester:5"]]
+
+
+def test_course_keyboard_by_type() -> None:
+    assert len(callback_data(CourseKeyboard(filter_by="type").as_markup())) == 3
+    assert callback_data(
+        CourseKeyboard(filter_by="type", courses=make_courses(2)).as_markup()
+    ) == [["c:type:2", "c:type:1"], ["cs:type:"]]
+    assert callback_data(
+        CourseKeyboard(
+            filter_by="type", course=make_courses(1, course_type=3)[0]
+        ).as_markup()
+    ) == [["cs:type:3"]]
+    assert not CourseKeyboard(filter_by="unknown").as_markup().inline_keyboard
+
+
+def test_place_keyboard() -> None:
+    assert callback_data(PlaceKeyboard(mode="group").as_markup())[-4:] == [
+        ["pg:6", "pg:5"],
+        ["pg:7"],
+        ["n:"],
+        ["m"],
+    ]
+    places = [Place(id=100, name="Gate", group=1, latitude=38.05, longitude=46.32)]
+    assert callback_data(
+        PlaceKeyboard(mode="location", places=places, group=1).as_markup()
+    ) == [
+        # Integers are packed in base 36
+        ["pl:2s"],
+        ["n:1"],
+        ["p"],
+    ]
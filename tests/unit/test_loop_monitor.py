@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from aiogram.types import TelegramObject, Update
+
+from app.delivery.bot.loop_monitor import EventLoopBlocked, LoopMonitor
+from app.delivery.bot.metrics import UPDATE_COST, UpdateCost
+
+
+def block_the_loop() -> None:
+    time.sleep(0.3)
+
+
+async def blocking(event: TelegramObject, data: dict[str, Any]) -> str:
+    block_the_loop()
+    return "handled"
+
+
+async def waiting(event: TelegramObject, data: dict[str, Any]) -> str:
+    await asyncio.sleep(0.3)
+    return "handled"
+
+
+def process(monitor: LoopMonitor, handler: Any) -> Any:
+    async def run() -> Any:
+        await monitor.start()
+        token = UPDATE_COST.set(UpdateCost(handler=handler.__name__))
+        try:
+            return await monitor(handler, Update(update_id=7), {})
+        finally:
+            UPDATE_COST.reset(token)
+            await monitor.stop()
+
+    return asyncio.run(run())
+
+
+def test_logs_the_code_blocking_the_loop(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+
+    assert process(monitor, blocking) == "handled"
+
+    assert monitor.blocks == 1
+    assert "by update 7 (handler blocking)" in caplog.text
+    assert "in block_the_loop" in caplog.text
+
+
+def test_strict_mode_fails_the_blocking_update() -> None:
+    monitor = LoopMonitor(interval=0.02, threshold=0.1, strict=True)
+
+    with pytest.raises(EventLoopBlocked, match="Update 7 blocked the event loop"):
+        process(monitor, blocking)
+    assert process(monitor, waiting) == "handled"
+    assert monitor.blocks == 1
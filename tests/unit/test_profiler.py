@@ -0,0 +1,84 @@
+import asyncio
+import pstats
+import threading
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+from aiogram.types import TelegramObject, Update
+
+from app.delivery.bot.metrics import UPDATE_COST, UpdateCost
+from app.delivery.bot.profiler import UpdateProfiler
+
+
+async def handle(event: TelegramObject, data: dict[str, Any]) -> str:
+    cost = UPDATE_COST.get()
+    assert cost is not None
+    cost.handler = "start"
+    await asyncio.sleep(0)
+    return "handled"
+
+
+def process(profiler: UpdateProfiler, *update_ids: int) -> list[Any]:
+    async def run() -> list[Any]:
+        results = []
+        for update_id in update_ids:
+            token = UPDATE_COST.set(UpdateCost())
+            try:
+                update = Update(update_id=update_id)
+                results.append(await profiler(handle, update, {}))
+            finally:
+                UPDATE_COST.reset(token)
+        return results
+
+    return asyncio.run(run())
+
+
+def test_keeps_the_newest_profiles_of_slow_updates(tmp_path: Path) -> None:
+    profiler = UpdateProfiler(
+        sample_rate=1.0, threshold=0.0, directory=tmp_path, max_files=2
+    )
+
+    assert process(profiler, 1, 2, 3) == ["handled"] * 3
+
+    files = sorted(tmp_path.glob("*.pstats"))
+    assert [file.name.split("-")[2:4] for file in files] == [
+        ["start", "2"],
+        ["start", "3"],
+    ]
+    assert pstats.Stats(str(files[-1])).total_calls > 0  # type: ignore[attr-defined]
+
+
+def test_profiles_are_saved_off_the_event_loop(tmp_path: Path) -> None:
+    profiler = UpdateProfiler(
+        sample_rate=1.0, threshold=0.0, directory=tmp_path, max_files=2
+    )
+    save = profiler._save
+    threads = []
+
+    def record_thread(*args: Any) -> None:
+        threads.append(threading.current_thread())
+        save(*args)
+
+    with mock.patch.object(profiler, "_save", side_effect=record_thread):
+        process(profiler, 1)
+    assert threads and threads[0] is not threading.current_thread()
+    assert len(list(tmp_path.glob("*-start-1-*.pstats"))) == 1
+
+
+def test_skips_fast_and_unsampled_updates(tmp_path: Path) -> None:
+    fast = UpdateProfiler(
+        sample_rate=1.0, threshold=60.0, directory=tmp_path, max_files=2
+    )
+    unsampled = UpdateProfiler(
+        sample_rate=0.0, threshold=0.0, directory=tmp_path, max_files=2
+    )
+
+    assert process(fast, 1) == process(unsampled, 2) == ["handled"]
+    assert not list(tmp_path.glob("*.pstats"))
+
+
+def test_keeps_at_least_one_profile(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        UpdateProfiler(sample_rate=1.0, threshold=0.0, directory=tmp_path, max_files=0)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import Any
+
+import pytest
+from aiogram.types import Chat, Update
+from asgiref.sync import async_to_sync
+
+from app.delivery.bot.scheduler import SchedulerStats, UpdateScheduler
+
+
+def chat_data(chat_id: int) -> dict[str, Any]:
+    return {"event_chat": Chat(id=chat_id, type="private")}
+
+
+def test_updates_of_a_chat_are_handled_in_order() -> None:
+    handled: list[tuple[int, int]] = []
+
+    async def handler(event: Update, data: dict[str, Any]) -> None:
+        # Earlier updates take longer, so they would finish last if run concurrently
+        await asyncio.sleep(0.01 * (3 - event.update_id % 3))
+        handled.append((data["event_chat"].id, event.update_id))
+
+    async def run() -> None:
+        scheduler = UpdateScheduler(workers=4, max_pending=100)
+        await scheduler.start()
+        for update_id in range(6):
+            await scheduler(
+                handler, Update(update_id=update_id), chat_data(update_id // 3)
+            )
+        await scheduler.stop()
+
+    async_to_sync(run)()
+    for chat_id in (0, 1):
+        assert [_ for chat, _ in handled if chat == chat_id] == [
+            chat_id * 3,
+            chat_id * 3 + 1,
+            chat_id * 3 + 2,
+        ]
+
+
+def test_concurrency_is_bounded() -> None:
+    running = peak = 0
+
+    async def handler(*_: Any) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.005)
+        running -= 1
+
+    async def run() -> None:
+        scheduler = UpdateScheduler(workers=3, max_pending=100)
+        await scheduler.start()
+        for update_id in range(20):
+            await scheduler(handler, Update(update_id=update_id), chat_data(update_id))
+        await scheduler.stop()
+        assert scheduler.stats().processed == 20
+
+    async_to_sync(run)()
+    assert peak == 3
+
+
+def test_full_queues_apply_backpressure() -> None:
+    async def run() -> None:
+        release = asyncio.Event()
+
+        async def handler(*_: Any) -> None:
+            await release.wait()
+
+        scheduler = UpdateScheduler(workers=1, max_pending=3)
+        await scheduler.start()
+        for update_id in range(2):
+            await scheduler(handler, Update(update_id=update_id), chat_data(1))
+        await asyncio.sleep(0)
+        await scheduler(handler, Update(update_id=2), chat_data(2))
+
+        blocked = asyncio.create_task(scheduler(handler, Update(update_id=3), {}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert scheduler.stats() == SchedulerStats(
+            pending=2, running=1, chats=2, deepest=1, processed=0, throttled=1
+        )
+
+        release.set()
+        await blocked
+        await scheduler.stop()
+        assert scheduler.stats() == SchedulerStats(
+            pending=0, running=0, chats=0, deepest=0, processed=4, throttled=1
+        )
+
+    async_to_sync(run)()
+
+
+def test_failed_update_does_not_stop_the_worker() -> None:
+    handled: list[int] = []
+
+    async def handler(event: Update, _: dict[str, Any]) -> None:
+        if event.update_id == 0:
+            raise RuntimeError
+        handled.append(event.update_id)
+
+    async def run() -> None:
+        scheduler = UpdateScheduler(workers=1, max_pending=10)
+        await scheduler.start()
+        for update_id in range(2):
+            await scheduler(handler, Update(update_id=update_id), chat_data(1))
+        await scheduler.stop()
+
+    async_to_sync(run)()
+    assert handled == [1]
+
+
+def test_updates_are_handled_inline_until_started() -> None:
+    async def handler(event: Update, _: dict[str, Any]) -> int:
+        return event.update_id
+
+    scheduler = UpdateScheduler(workers=1, max_pending=10)
+    assert async_to_sync(scheduler)(handler, Update(update_id=7), {}) == 7
+    async_to_sync(scheduler.stop)()
+
+
+def test_queue_depth_is_reported(caplog: pytest.LogCaptureFixture) -> None:
+    async def handler(*_: Any) -> None:
+        await asyncio.sleep(0.03)
+
+    async def run() -> None:
+        scheduler = UpdateScheduler(workers=1, max_pending=10, stats_interval=0.01)
+        await scheduler.start()
+        for update_id in range(2):
+            await scheduler(handler, Update(update_id=update_id), chat_data(1))
+        await scheduler.stop()
+
+    with caplog.at_level(logging.DEBUG, logger="app.delivery.bot.scheduler"):
+        async_to_sync(run)()
+    assert "pending=1, running=1" in caplog.text
+    assert "Update id=1 is handled in" in caplog.text
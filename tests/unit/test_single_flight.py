@@ -0,0 +1,79 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+from app.apps.core.single_flight import SingleFlight
+
+
+class Query:
+    def __init__(self) -> None:
+        self.runs = 0
+        self.error: Optional[Exception] = None
+
+    async def __call__(self) -> int:
+        self.runs += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return self.runs
+
+
+def test_concurrent_calls_share_one_run() -> None:
+    flight = SingleFlight()
+    query = Query()
+
+    async def run() -> list[int]:
+        results = await asyncio.gather(*(flight.do("key", query) for _ in range(10)))
+        # Different keys and later calls run again without a TTL
+        await asyncio.gather(flight.do("other", query), flight.do("key", query))
+        return results
+
+    assert asyncio.run(run()) == [1] * 10
+    assert query.runs == 3
+    assert flight.info() == (3, 9, 0)
+
+
+def test_results_are_reused_until_expired_or_forgotten() -> None:
+    flight = SingleFlight(ttl=60)
+    query = Query()
+
+    async def run() -> list[int]:
+        results = [await flight.do("key", query), await flight.do("key", query)]
+        flight.forget("key")
+        results.append(await flight.do("key", query))
+        return results
+
+    assert asyncio.run(run()) == [1, 1, 2]
+
+
+def test_failures_are_shared_but_not_reused() -> None:
+    flight = SingleFlight(ttl=60)
+    query = Query()
+    query.error = RuntimeError()
+
+    async def run() -> None:
+        results = await asyncio.gather(
+            flight.do("key", query), flight.do("key", query), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        query.error = None
+        assert await flight.do("key", query) == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_others() -> None:
+    flight = SingleFlight()
+    query = Query()
+
+    async def run() -> int:
+        first = asyncio.ensure_future(flight.do("key", query))
+        second = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,36 @@
+import logging
+
+import pytest
+
+from app.apps.core.text_template import TextTemplate, compile_text
+
+
+def test_render_fills_every_slot_in_one_pass() -> None:
+    template = TextTemplate("<b>{name}</b>: {phone_number}\n{name}")
+
+    assert template.placeholders == {"name", "phone_number"}
+    assert template.render(name="{phone_number}", phone_number="+98") == (
+        "<b>{phone_number}</b>: +98\n{phone_number}"
+    )
+
+
+def test_render_keeps_slots_without_arguments() -> None:
+    template = TextTemplate("{greeting}, {name}!")
+
+    assert template.render(name="Ali", unused=1) == "{greeting}, Ali!"
+    assert TextTemplate("plain").render(name="Ali") == "plain"
+    assert TextTemplate("").render() == ""
+
+
+def test_compile_reports_missing_and_unknown_placeholders(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    with caplog.at_level(logging.WARNING):
+        template = compile_text("PHONE_TEMPLATE", "{name}: {number}")
+
+    assert template.check(frozenset({"name", "phone_number"})) == (
+        frozenset({"phone_number"}),
+        frozenset({"number"}),
+    )
+    assert "missing placeholders: phone_number" in caplog.text
+    assert "unknown placeholders: number" in caplog.text
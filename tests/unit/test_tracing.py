@@ -0,0 +1,88 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from app.apps.core.tracing import JsonLinesExporter, OtlpExporter, Trace, Tracer
+
+
+def traced(tracer: Tracer) -> None:
+    @tracer.traced("child")
+    async def child() -> None:
+        with tracer.span("grandchild", size=2):
+            await asyncio.sleep(0)
+
+    async def run() -> None:
+        with tracer.trace("root", update_id=1):
+            await child()
+            await child()
+
+    asyncio.run(run())
+
+
+def read(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spans_are_nested_and_exported_as_json_lines(tmp_path: Path) -> None:
+    tracer = Tracer()
+    tracer.configure(sample_rate=1.0, exporter=JsonLinesExporter(tmp_path / "t.jsonl"))
+
+    traced(tracer)
+    traced(tracer)
+    tracer.close()
+
+    first, second = read(tmp_path / "t.jsonl")
+    assert first["trace_id"] != second["trace_id"]
+    root, child, grandchild, *others = first["spans"]
+    assert [root["name"], child["name"], grandchild["name"]] == [
+        "root",
+        "child",
+        "grandchild",
+    ]
+    assert root["parent_id"] is None
+    assert child["parent_id"] == others[0]["parent_id"] == root["span_id"]
+    assert grandchild["parent_id"] == child["span_id"]
+    assert grandchild["attributes"] == {"size": 2}
+
+
+def test_traces_are_sampled_and_bounded(tmp_path: Path) -> None:
+    tracer = Tracer()
+    exporter = JsonLinesExporter(tmp_path / "t.jsonl")
+
+    # Not configured, nothing is recorded
+    traced(tracer)
+    tracer.configure(sample_rate=0.0, exporter=exporter)
+    traced(tracer)
+    tracer.configure(sample_rate=1.0, exporter=exporter, max_spans=3)
+    traced(tracer)
+    tracer.close()
+
+    [trace] = read(tmp_path / "t.jsonl")
+    assert len(trace["spans"]) == 3
+    assert trace["dropped"] == 2
+
+
+def test_failed_span_records_the_error() -> None:
+    tracer = Tracer()
+    exporter = OtlpExporter("http://localhost:4318/v1/traces")
+    tracer.configure(sample_rate=1.0, exporter=exporter)
+    traces: list[Trace] = []
+
+    with mock.patch.object(exporter, "export", traces.append):
+        with pytest.raises(ValueError), tracer.trace("root"):
+            with tracer.span("query", rows=3, sql="SELECT 1"):
+                raise ValueError
+
+    [span] = exporter.encode(traces[0])["resourceSpans"][0]["scopeSpans"][0]["spans"][1:]
+    assert span["name"] == "query"
+    assert span["parentSpanId"] == traces[0].spans[0].span_id
+    assert span["attributes"] == [
+        {"key": "rows", "value": {"intValue": "3"}},
+        {"key": "sql", "value": {"stringValue": "SELECT 1"}},
+        {"key": "error", "value": {"stringValue": "ValueError"}},
+    ]
+    assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])